@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Archive old candidate_stage_history partitions
+
+Creates upcoming monthly partitions, then exports every month older than the
+hot window (STAGE_HISTORY_HOT_MONTHS, default 12) to zstd-compressed Parquet
+in the stage-history-archive bucket and drops the partition. Archived months
+stay readable through StageHistoryService when a historical range is requested.
+
+Run monthly, e.g. from cron: python archive_stage_history.py [--dry-run]
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.stage_history_service import stage_history_service, HOT_MONTHS  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List partitions that would be archived without touching them")
+    args = parser.parse_args()
+
+    print(f"🗄️  Archiving stage history older than {HOT_MONTHS} months\n")
+    result = stage_history_service.archive_old_partitions(dry_run=args.dry_run)
+
+    print(f"📅 Partitions created ahead: {result['partitions_created']}")
+    if not result["due"]:
+        print("✅ Nothing to archive")
+        return
+    if args.dry_run:
+        for name in result["due"]:
+            print(f"   would archive {name}")
+        return
+
+    for archived in result["archived"]:
+        print(f"✅ {archived['partition_name']}: {archived['row_count']} rows → "
+              f"{archived['storage_path']} ({archived['bytes'] / 1024:.1f} KB)")
+    for failed in result["failed"]:
+        print(f"❌ {failed['partition_name']}: {failed['error']}")
+    if result["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Backfill candidate file previews
+
+New candidate_files rows get a thumbnail and text preview in the background
+when they are created; this renders them for rows uploaded before that, in
+batches, until none are left.
+
+Usage: python backfill_file_previews.py [--batch-size 100]
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.file_preview_service import file_preview_service  # noqa: E402
+from services.text_extraction_service import text_extraction_service  # noqa: E402
+
+
+async def backfill(batch_size: int) -> int:
+    total = 0
+    while True:
+        # Every row gets a preview_status (even 'failed'), so the loop ends
+        result = await file_preview_service.backfill(limit=batch_size)
+        if not result["processed"]:
+            return total
+        total += result["processed"]
+        print(f"🖼️  {total} files processed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    print("🖼️  Backfilling candidate file previews\n")
+    try:
+        total = asyncio.run(backfill(args.batch_size))
+    finally:
+        text_extraction_service.shutdown()
+    print(f"✅ Done: {total} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark interviewer lookups on the interviews table
+
+Seeds synthetic interviews in growing batches and times
+InterviewService.get_interviews_by_interviewer / get_interview_availability
+at each table size. With the interviewer_ids GIN index (migration 012) the
+response time should stay flat as the table grows.
+
+Usage: python benchmark_interviewer_lookup.py [--sizes 1000 5000 20000] [--runs 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from supabase_client import supabase  # noqa: E402
+from services.interview_service import InterviewService  # noqa: E402
+
+BENCHMARK_TAG = "benchmark_interviewer_lookup"
+BATCH_SIZE = 500
+INTERVIEWER_POOL = 50
+TARGET_INTERVIEWS = 10
+
+
+def create_candidate() -> str:
+    """Candidate the seeded interviews belong to (interviews.candidate_id is NOT NULL)"""
+    result = supabase.table("candidates").insert({
+        "name": "Benchmark Candidate",
+        "email": f"{uuid.uuid4()}@benchmark.invalid",
+        "phone": "0000000000",
+        "current_position": "Benchmark",
+        "years_experience": 0,
+        "salary_expectations": 0,
+        "source": "benchmark",
+        "notes": BENCHMARK_TAG
+    }).execute()
+    return result.data[0]["id"]
+
+
+def seed(count: int, candidate_id: str, interviewers: list, start_index: int) -> None:
+    rows = []
+    for i in range(start_index, start_index + count):
+        day = date.today() + timedelta(days=i % 60)
+        rows.append({
+            "candidate_id": candidate_id,
+            "interviewer": {"id": interviewers[i % len(interviewers)]},
+            "date": day.isoformat(),
+            "time": f"{9 + i % 8:02d}:00",
+            "duration_minutes": 60,
+            "status": "scheduled",
+            "notes": BENCHMARK_TAG
+        })
+        if len(rows) == BATCH_SIZE:
+            supabase.table("interviews").insert(rows).execute()
+            rows = []
+    if rows:
+        supabase.table("interviews").insert(rows).execute()
+
+
+def time_call(fn, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def cleanup() -> None:
+    supabase.table("interviews").delete().eq("notes", BENCHMARK_TAG).execute()
+    supabase.table("candidates").delete().eq("notes", BENCHMARK_TAG).execute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[1000, 5000, 20000])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    # The measured interviewer keeps a fixed number of interviews while the
+    # rest of the table grows, so result size stays constant
+    target = str(uuid.uuid4())
+    interviewers = [str(uuid.uuid4()) for _ in range(INTERVIEWER_POOL)]
+    target_day = date.today().isoformat()
+
+    print("⏱️  Interviewer lookup benchmark\n")
+    print(f"{'rows':>8} | {'by_interviewer (ms)':>20} | {'availability (ms)':>18}")
+    print("-" * 53)
+
+    seeded = 0
+    try:
+        candidate_id = create_candidate()
+        seed(TARGET_INTERVIEWS, candidate_id, [target], 0)
+        for size in sorted(args.sizes):
+            seed(size - seeded, candidate_id, interviewers, seeded)
+            seeded = size
+
+            # Make sure the timed lookups actually find the target's rows
+            found = len(InterviewService.get_interviews_by_interviewer(target))
+            assert found == TARGET_INTERVIEWS, \
+                f"Expected {TARGET_INTERVIEWS} interviews for the target, found {found}"
+            booked = InterviewService.get_interview_availability(
+                target_day, target).get("total_booked")
+            assert booked == 1, f"Expected 1 booking on {target_day}, found {booked}"
+
+            by_interviewer = time_call(
+                lambda: InterviewService.get_interviews_by_interviewer(target), args.runs)
+            availability = time_call(
+                lambda: InterviewService.get_interview_availability(target_day, target), args.runs)
+            print(f"{size:>8} | {by_interviewer:>20.1f} | {availability:>18.1f}")
+    finally:
+        cleanup()
+        print("\n🧹 Removed benchmark rows")
+
+
+if __name__ == "__main__":
+    main()
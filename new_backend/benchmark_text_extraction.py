@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Benchmark document text extraction
+
+Extracts every PDF/DOCX in a corpus directory and reports pages/sec and the
+longest event-loop stall, both inline (how StorageService used to parse) and
+through the TextExtractionService process pool with concurrent files. Without
+--corpus a synthetic corpus of text PDFs and DOCX files is generated.
+
+Usage: python benchmark_text_extraction.py [--corpus DIR] [--runs 3] [--workers 2]
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils.text_extraction import count_pages, extract_text  # noqa: E402
+
+# Loaded from its file: importing through the services package would pull in
+# every service and require Supabase credentials
+_spec = importlib.util.spec_from_file_location(
+    "text_extraction_service",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "services", "text_extraction_service.py"))
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+TextExtractionService = _module.TextExtractionService
+
+SYNTHETIC_PAGES = [1, 2, 3, 5, 10, 40]
+LINE = "Experienced engineer: Python, FastAPI, PostgreSQL, Kubernetes, event-driven systems."
+
+
+def make_pdf(pages: int, lines_per_page: int = 40) -> bytes:
+    """Minimal multi-page PDF with Helvetica text on every page"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = "".join(f"({LINE} p{page + 1}.{line + 1}) Tj T* " for line in range(lines_per_page))
+        stream = f"BT /F1 9 Tf 11 TL 40 800 Td {text}ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), pages)
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(paragraphs: int = 200) -> bytes:
+    import docx
+    document = docx.Document()
+    for index in range(paragraphs):
+        document.add_paragraph(f"{LINE} ({index + 1})")
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def load_corpus(directory: str) -> list:
+    files = []
+    for name in sorted(os.listdir(directory)):
+        if os.path.splitext(name)[1].lower() in ('.pdf', '.doc', '.docx'):
+            with open(os.path.join(directory, name), "rb") as f:
+                files.append((name, f.read()))
+    return files
+
+
+def synthetic_corpus() -> list:
+    files = [(f"synthetic_{pages}p.pdf", make_pdf(pages)) for pages in SYNTHETIC_PAGES]
+    files.append(("synthetic.docx", make_docx()))
+    return files
+
+
+def run_inline(files: list) -> tuple:
+    """Total seconds and the longest single parse (how long the event loop would stall)"""
+    started = time.perf_counter()
+    stall = 0.0
+    for name, content in files:
+        file_started = time.perf_counter()
+        extract_text(content, name)
+        stall = max(stall, time.perf_counter() - file_started)
+    return time.perf_counter() - started, stall
+
+
+async def run_pool(service: TextExtractionService, files: list) -> tuple:
+    """Total seconds and the longest gap between event-loop ticks while extracting"""
+    stall = 0.0
+
+    async def heartbeat():
+        nonlocal stall
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    ticker = asyncio.create_task(heartbeat())
+    started = time.perf_counter()
+    await asyncio.gather(*[service.extract(content, name) for name, content in files])
+    elapsed = time.perf_counter() - started
+    ticker.cancel()
+    return elapsed, stall
+
+
+def report(label: str, results: list, pages: int) -> None:
+    seconds = statistics.median(r[0] for r in results)
+    stall = max(r[1] for r in results)
+    print(f"{label:>20} | {seconds:>8.3f} | {pages / seconds:>10.1f} | {stall * 1000:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="Directory of .pdf/.docx files")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    files = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    if not files:
+        print("❌ No .pdf/.doc/.docx files in corpus")
+        return
+    pages = sum(count_pages(content, name) for name, content in files)
+    size = sum(len(content) for _, content in files)
+
+    print("⏱️  Text extraction benchmark\n")
+    print(f"📄 {len(files)} files, {pages} pages, {size / 1024:.0f} KB\n")
+    print(f"{'mode':>20} | {'seconds':>8} | {'pages/sec':>10} | {'loop stall (ms)':>14}")
+    print("-" * 62)
+
+    report("inline", [run_inline(files) for _ in range(args.runs)], pages)
+
+    service = TextExtractionService(workers=args.workers)
+    try:
+        # First call pays for starting the worker processes
+        asyncio.run(run_pool(service, files[:1]))
+        report(f"pool ({args.workers} workers)",
+               [asyncio.run(run_pool(service, files)) for _ in range(args.runs)], pages)
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
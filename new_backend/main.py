@@ -4,6 +4,7 @@ import os
 from dotenv import load_dotenv
 from routers.jobs_router import router as jobs_router
 from routers.candidates_router_simplified import router as candidates_router
+from routers.candidate_uploads_router import router as candidate_uploads_router
 from routers.events_router import router as events_router
 from routers.interviews_router import router as interviews_router
 from routers.ai_router import router as ai_router
@@ -11,6 +12,7 @@ from routers.dashboard_router import router as dashboard_router
 from routers.workflow_router import router as workflow_router
 from routers.evaluation_router import router as evaluation_router
 from routers.scheduling_router import router as scheduling_router
+from routers.search_router import router as search_router
 import logging
 
 # Configure logging
@@ -134,6 +136,9 @@ app.add_middleware(
 
 # Mount routers
 app.include_router(candidates_router)
+# Registration and file uploads (POST /candidates/, /quick-register, /{id}/uploads*).
+# None of these overlap candidates_router; the legacy temp_candidates_router is not mounted
+app.include_router(candidate_uploads_router)
 app.include_router(jobs_router)
 app.include_router(events_router)
 app.include_router(interviews_router)
@@ -142,6 +147,7 @@ app.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
 app.include_router(workflow_router, prefix="/workflow", tags=["workflow"])
 app.include_router(evaluation_router)
 app.include_router(scheduling_router)
+app.include_router(search_router)
 
 
 @app.on_event("startup")
@@ -151,12 +157,23 @@ async def startup_event():
 
     # Setup Supabase
     if setup_supabase():
+        # Build the duplicate-candidate index off the request path
+        import asyncio
+        from services.dedup_service import duplicate_detection_service
+        asyncio.get_running_loop().run_in_executor(None, duplicate_detection_service.warm)
         logger.info("✅ Application startup completed successfully")
     else:
         logger.error(
             "❌ Application startup failed - Supabase setup incomplete")
 
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Run on application shutdown"""
+    from services.text_extraction_service import text_extraction_service
+    text_extraction_service.shutdown()
+
+
 @app.get("/")
 async def root():
     return {"message": "HireMau API is running"}
@@ -0,0 +1,49 @@
+-- Migration 010: Nearest-neighbour search over candidates.profile_embedding
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- HNSW index for cosine distance queries on candidate profiles
+CREATE INDEX IF NOT EXISTS idx_candidates_profile_embedding
+    ON candidates USING hnsw (profile_embedding vector_cosine_ops);
+
+CREATE INDEX IF NOT EXISTS idx_event_registrations_event_candidate
+    ON event_registrations(event_id, candidate_id);
+
+-- Find candidates similar to a query embedding with optional stage/event filters
+CREATE OR REPLACE FUNCTION match_similar_candidates(
+    query_embedding vector(1536),
+    exclude_candidate_id uuid DEFAULT NULL,
+    match_count int DEFAULT 10,
+    filter_stage text DEFAULT NULL,
+    filter_event_id uuid DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    name text,
+    email text,
+    stage text,
+    current_position text,
+    skills text[],
+    similarity float
+)
+LANGUAGE sql STABLE
+SET hnsw.ef_search = 100
+AS $$
+SELECT
+    c.id,
+    c.name,
+    c.email,
+    c.stage::text,
+    c.current_position,
+    c.skills,
+    (1 - (c.profile_embedding <=> query_embedding))::float AS similarity
+FROM candidates c
+WHERE c.profile_embedding IS NOT NULL
+  AND (exclude_candidate_id IS NULL OR c.id <> exclude_candidate_id)
+  AND (filter_stage IS NULL OR c.stage::text = filter_stage)
+  AND (filter_event_id IS NULL OR EXISTS (
+        SELECT 1 FROM event_registrations er
+        WHERE er.candidate_id = c.id AND er.event_id = filter_event_id
+  ))
+ORDER BY c.profile_embedding <=> query_embedding
+LIMIT match_count;
+$$;
@@ -0,0 +1,80 @@
+-- Migration 011: Panel interviews (one booking, several interviewers)
+-- Each panelist gets an interview_schedules row sharing the same panel_id;
+-- the room is held on the lead row only (UNIQUE(room_id, scheduled_date, scheduled_time)).
+ALTER TABLE interview_schedules ADD COLUMN IF NOT EXISTS panel_id UUID;
+
+CREATE INDEX IF NOT EXISTS idx_interview_schedules_panel_id ON interview_schedules(panel_id);
+CREATE INDEX IF NOT EXISTS idx_interview_schedules_interviewer_date
+    ON interview_schedules(interviewer_id, scheduled_date) WHERE status = 'scheduled';
+CREATE INDEX IF NOT EXISTS idx_interview_schedules_room_date
+    ON interview_schedules(room_id, scheduled_date) WHERE status = 'scheduled';
+
+-- Reserve all panelists (and the room) in one transaction, or none of them
+CREATE OR REPLACE FUNCTION book_panel_interview(
+    p_candidate_id uuid,
+    p_interviewer_ids uuid[],
+    p_scheduled_date date,
+    p_scheduled_time time,
+    p_duration_minutes int DEFAULT 60,
+    p_room_id uuid DEFAULT NULL,
+    p_interview_type text DEFAULT 'technical',
+    p_interview_mode text DEFAULT 'in-person',
+    p_notes text DEFAULT NULL,
+    p_meeting_link text DEFAULT NULL,
+    p_created_by uuid DEFAULT NULL
+)
+RETURNS SETOF interview_schedules
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_panel_id uuid := gen_random_uuid();
+    -- On timestamps, so a booking running past midnight compares correctly
+    v_start timestamp := p_scheduled_date + p_scheduled_time;
+    v_end timestamp := p_scheduled_date + p_scheduled_time + make_interval(mins => p_duration_minutes);
+BEGIN
+    -- Serialize concurrent bookings on the same resources (sorted to avoid deadlocks)
+    PERFORM pg_advisory_xact_lock(hashtext(resource_id::text))
+    FROM (
+        SELECT DISTINCT unnest(p_interviewer_ids || p_room_id) AS resource_id
+    ) resources
+    WHERE resource_id IS NOT NULL
+    ORDER BY resource_id;
+
+    IF EXISTS (
+        SELECT 1 FROM interview_schedules s
+        WHERE s.status = 'scheduled'
+          AND s.scheduled_date BETWEEN p_scheduled_date - 1 AND p_scheduled_date + 1
+          AND (s.interviewer_id = ANY(p_interviewer_ids)
+               OR (p_room_id IS NOT NULL AND s.room_id = p_room_id))
+          AND s.scheduled_date + s.scheduled_time < v_end
+          AND v_start < s.scheduled_date + s.scheduled_time
+                        + make_interval(mins => COALESCE(s.duration_minutes, 60))
+    ) THEN
+        RAISE EXCEPTION 'Panel interview conflicts with an existing booking'
+            USING ERRCODE = 'exclusion_violation';
+    END IF;
+
+    RETURN QUERY
+    INSERT INTO interview_schedules (
+        candidate_id, interviewer_id, room_id, scheduled_date, scheduled_time,
+        duration_minutes, interview_type, interview_mode, status, notes,
+        meeting_link, created_by, panel_id
+    )
+    SELECT
+        p_candidate_id,
+        panelist.interviewer_id,
+        CASE WHEN panelist.position = 1 THEN p_room_id END,
+        p_scheduled_date,
+        p_scheduled_time,
+        p_duration_minutes,
+        p_interview_type,
+        p_interview_mode,
+        'scheduled',
+        p_notes,
+        p_meeting_link,
+        p_created_by,
+        v_panel_id
+    FROM unnest(p_interviewer_ids) WITH ORDINALITY AS panelist(interviewer_id, position)
+    RETURNING *;
+END;
+$$;
@@ -0,0 +1,58 @@
+-- Migration 012: Queryable interviewer assignments on interviews
+-- interviews.interviewer holds free-form text/JSON ({"id": ...}, a list of
+-- panelists, or a plain name). Mirror it into a GIN-indexed array so lookups
+-- by interviewer are index scans instead of full-table reads.
+ALTER TABLE interviews ADD COLUMN IF NOT EXISTS interviewer_ids TEXT[] NOT NULL DEFAULT '{}';
+
+CREATE OR REPLACE FUNCTION extract_interviewer_ids(raw text)
+RETURNS text[]
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+DECLARE
+    parsed jsonb;
+BEGIN
+    IF raw IS NULL OR btrim(raw) = '' THEN
+        RETURN '{}';
+    END IF;
+
+    BEGIN
+        parsed := raw::jsonb;
+    EXCEPTION WHEN others THEN
+        -- Plain interviewer name/id
+        RETURN ARRAY[btrim(raw)];
+    END;
+
+    IF jsonb_typeof(parsed) = 'object' THEN
+        RETURN ARRAY(SELECT parsed->>'id' WHERE parsed ? 'id');
+    ELSIF jsonb_typeof(parsed) = 'array' THEN
+        RETURN ARRAY(
+            SELECT COALESCE(element->>'id', element #>> '{}')
+            FROM jsonb_array_elements(parsed) AS element
+            WHERE COALESCE(element->>'id', element #>> '{}') IS NOT NULL
+        );
+    ELSIF jsonb_typeof(parsed) = 'string' THEN
+        RETURN ARRAY[parsed #>> '{}'];
+    END IF;
+    RETURN '{}';
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION sync_interviewer_ids()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.interviewer_ids := extract_interviewer_ids(NEW.interviewer::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_interviews_interviewer_ids ON interviews;
+CREATE TRIGGER sync_interviews_interviewer_ids
+    BEFORE INSERT OR UPDATE OF interviewer ON interviews
+    FOR EACH ROW EXECUTE FUNCTION sync_interviewer_ids();
+
+-- Backfill existing rows
+UPDATE interviews SET interviewer_ids = extract_interviewer_ids(interviewer::text);
+
+CREATE INDEX IF NOT EXISTS idx_interviews_interviewer_ids ON interviews USING GIN (interviewer_ids);
+CREATE INDEX IF NOT EXISTS idx_interviews_date ON interviews(date);
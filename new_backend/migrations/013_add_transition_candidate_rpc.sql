@@ -0,0 +1,173 @@
+-- Migration 013: Single-transaction workflow transitions
+-- WorkflowStateMachine.TRANSITIONS is mirrored into workflow_transitions so the
+-- database can validate an action, move the candidate and log history in one
+-- round trip. Regenerate the data section with `python workflow_state_machine.py`
+-- whenever TRANSITIONS changes.
+CREATE TABLE IF NOT EXISTS workflow_transitions (
+    from_stage TEXT NOT NULL,
+    action TEXT NOT NULL,
+    to_stage TEXT,              -- NULL = return to the stage before the current one
+    candidate_status TEXT,      -- status set alongside the move, if any
+    PRIMARY KEY (from_stage, action)
+);
+
+CREATE TABLE IF NOT EXISTS workflow_stage_aliases (
+    alias TEXT PRIMARY KEY,
+    stage TEXT NOT NULL
+);
+
+-- Generated by WorkflowStateMachine.export_sql(); do not edit by hand
+DELETE FROM workflow_transitions;
+INSERT INTO workflow_transitions (from_stage, action, to_stage, candidate_status) VALUES
+    ('applied', 'shortlist', 'screening', 'shortlisted'),
+    ('applied', 'reject', 'rejected', 'rejected'),
+    ('applied', 'put-on-hold', 'on-hold', NULL),
+    ('applied', 'view-profile', 'applied', NULL),
+    ('applied', 'analyze-resume', 'applied', NULL),
+    ('screening', 'schedule-interview', 'interview-scheduled', 'interview-scheduled'),
+    ('screening', 'reject-after-screening', 'rejected', 'rejected'),
+    ('screening', 'put-on-hold', 'on-hold', NULL),
+    ('screening', 'update-screening-notes', 'screening', NULL),
+    ('interview-scheduled', 'start-interview', 'interviewing', 'interviewing'),
+    ('interview-scheduled', 'reschedule', 'interview-scheduled', NULL),
+    ('interview-scheduled', 'cancel-and-reject', 'rejected', NULL),
+    ('interview-scheduled', 'remind-candidate', 'interview-scheduled', NULL),
+    ('interviewing', 'complete-interview', 'interview-completed', NULL),
+    ('interviewing', 'pause-interview', 'interviewing', NULL),
+    ('interviewing', 'cancel-interview', 'interview-scheduled', NULL),
+    ('interview-completed', 'move-to-final-review', 'final-review', 'final-review'),
+    ('interview-completed', 'request-another-interview', 'additional-interview', NULL),
+    ('interview-completed', 'reject-after-interview', 'rejected', 'rejected'),
+    ('interview-completed', 'update-interview-notes', 'interview-completed', NULL),
+    ('additional-interview', 'schedule-next-interview', 'interview-scheduled', NULL),
+    ('additional-interview', 'reject', 'rejected', 'rejected'),
+    ('additional-interview', 'skip-additional', 'final-review', NULL),
+    ('final-review', 'extend-offer', 'offer-extended', 'offer-extended'),
+    ('final-review', 'final-reject', 'rejected', 'rejected'),
+    ('final-review', 'put-on-hold-for-review', 'on-hold', NULL),
+    ('final-review', 'compare-candidates', 'final-review', NULL),
+    ('offer-extended', 'offer-accepted', 'hired', 'hired'),
+    ('offer-extended', 'offer-declined', 'rejected', NULL),
+    ('offer-extended', 'negotiate-offer', 'negotiating', NULL),
+    ('offer-extended', 'withdraw-offer', 'rejected', NULL),
+    ('negotiating', 'update-offer', 'offer-extended', NULL),
+    ('negotiating', 'negotiation-failed', 'rejected', NULL),
+    ('negotiating', 'accept-counter-offer', 'hired', NULL),
+    ('on-hold', 'reactivate', NULL, NULL),
+    ('on-hold', 'reject-from-hold', 'rejected', NULL),
+    ('on-hold', 'update-hold-reason', 'on-hold', NULL);
+
+DELETE FROM workflow_stage_aliases;
+INSERT INTO workflow_stage_aliases (alias, stage) VALUES
+    ('screened', 'screening'),
+    ('interviewed', 'interview-completed'),
+    ('shortlisted', 'final-review');
+
+CREATE INDEX IF NOT EXISTS idx_candidate_stage_history_candidate_timestamp
+    ON candidate_stage_history(candidate_id, timestamp DESC);
+
+-- Validate, move and log a workflow action atomically.
+-- The candidate row is locked for the duration, and the stage update is a
+-- compare-and-set on the stage that was validated, so two recruiters acting on
+-- the same candidate are serialized instead of overwriting each other.
+CREATE OR REPLACE FUNCTION transition_candidate(
+    p_candidate_id uuid,
+    p_action text,
+    p_performed_by text DEFAULT 'system',
+    p_notes text DEFAULT NULL,
+    p_expected_stage text DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_stored_stage text;
+    v_current text;
+    v_next text;
+    v_status text;
+    v_found boolean;
+    v_history_id uuid;
+    v_allowed text[];
+    v_now timestamptz := now();
+BEGIN
+    SELECT stage::text INTO v_stored_stage
+    FROM candidates WHERE id = p_candidate_id
+    FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN jsonb_build_object('success', false, 'error', 'not_found',
+                                  'message', 'Candidate not found');
+    END IF;
+
+    v_current := COALESCE(
+        (SELECT a.stage FROM workflow_stage_aliases a WHERE a.alias = v_stored_stage),
+        v_stored_stage, 'applied');
+
+    -- Optimistic check for callers that rendered the actions from a known stage
+    IF p_expected_stage IS NOT NULL AND p_expected_stage <> v_current
+       AND p_expected_stage <> v_stored_stage THEN
+        RETURN jsonb_build_object('success', false, 'error', 'stage_changed',
+                                  'message', format('Candidate moved to stage ''%s'' since it was loaded', v_current),
+                                  'current_stage', v_current);
+    END IF;
+
+    SELECT t.to_stage, t.candidate_status, true INTO v_next, v_status, v_found
+    FROM workflow_transitions t
+    WHERE t.from_stage = v_current AND t.action = p_action;
+
+    IF v_found IS NULL THEN
+        SELECT COALESCE(array_agg(t.action ORDER BY t.action), '{}') INTO v_allowed
+        FROM workflow_transitions t WHERE t.from_stage = v_current;
+        RETURN jsonb_build_object('success', false, 'error', 'invalid_transition',
+                                  'message', format('Action ''%s'' not allowed in stage ''%s''. Allowed actions: %s',
+                                                    p_action, v_current, v_allowed),
+                                  'current_stage', v_current,
+                                  'allowed_actions', to_jsonb(v_allowed));
+    END IF;
+
+    IF v_next IS NULL THEN
+        -- Return to the stage the candidate was in before entering this one
+        SELECT h.from_stage INTO v_next
+        FROM candidate_stage_history h
+        WHERE h.candidate_id = p_candidate_id AND h.to_stage = v_current
+          AND h.from_stage <> v_current
+        ORDER BY h.timestamp DESC
+        LIMIT 1;
+        v_next := COALESCE(v_next, 'applied');
+    END IF;
+
+    UPDATE candidates
+    SET stage = CASE WHEN v_next <> v_current THEN v_next ELSE stage END,
+        status = COALESCE(v_status, status),
+        updated_at = v_now
+    WHERE id = p_candidate_id AND stage::text IS NOT DISTINCT FROM v_stored_stage;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Candidate % changed stage concurrently', p_candidate_id
+            USING ERRCODE = 'serialization_failure';
+    END IF;
+
+    INSERT INTO candidate_stage_history (
+        candidate_id, action, from_stage, to_stage, performed_by, timestamp, notes, status
+    ) VALUES (
+        p_candidate_id, p_action, v_current, v_next, p_performed_by, v_now,
+        COALESCE(p_notes, 'Performed action: ' || p_action), 'completed'
+    )
+    RETURNING id INTO v_history_id;
+
+    SELECT COALESCE(array_agg(t.action ORDER BY t.action), '{}') INTO v_allowed
+    FROM workflow_transitions t WHERE t.from_stage = v_next;
+
+    RETURN jsonb_build_object(
+        'success', true,
+        'candidate_id', p_candidate_id,
+        'action', p_action,
+        'from_stage', v_current,
+        'to_stage', v_next,
+        'stage_changed', v_next <> v_current,
+        'status', v_status,
+        'history_id', v_history_id,
+        'next_actions', to_jsonb(v_allowed)
+    );
+END;
+$$;
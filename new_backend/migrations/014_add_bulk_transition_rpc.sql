@@ -0,0 +1,104 @@
+-- Migration 014: Set-based bulk workflow transitions
+-- Applies one action to many candidates with a single UPDATE and a single
+-- history INSERT, validated against workflow_transitions (migration 013).
+CREATE OR REPLACE FUNCTION transition_candidates(
+    p_candidate_ids uuid[],
+    p_action text,
+    p_performed_by text DEFAULT 'system',
+    p_notes text DEFAULT NULL
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_now timestamptz := now();
+    v_results jsonb;
+BEGIN
+    -- Lock in id order so overlapping bulk calls cannot deadlock
+    PERFORM 1 FROM candidates
+    WHERE id = ANY(p_candidate_ids)
+    ORDER BY id
+    FOR UPDATE;
+
+    WITH requested AS (
+        SELECT DISTINCT unnest(p_candidate_ids) AS id
+    ),
+    current_stages AS (
+        SELECT r.id,
+               c.id IS NOT NULL AS found,
+               c.stage::text AS stored_stage,
+               COALESCE(a.stage, c.stage::text, 'applied') AS current_stage
+        FROM requested r
+        LEFT JOIN candidates c ON c.id = r.id
+        LEFT JOIN workflow_stage_aliases a ON a.alias = c.stage::text
+    ),
+    planned AS (
+        SELECT cs.*,
+               t.from_stage IS NOT NULL AS allowed,
+               t.candidate_status,
+               CASE
+                   WHEN t.from_stage IS NULL THEN NULL
+                   WHEN t.to_stage IS NOT NULL THEN t.to_stage
+                   -- Return to the stage the candidate was in before this one
+                   ELSE COALESCE((
+                       SELECT h.from_stage FROM candidate_stage_history h
+                       WHERE h.candidate_id = cs.id AND h.to_stage = cs.current_stage
+                         AND h.from_stage <> cs.current_stage
+                       ORDER BY h.timestamp DESC
+                       LIMIT 1
+                   ), 'applied')
+               END AS next_stage
+        FROM current_stages cs
+        LEFT JOIN workflow_transitions t
+            ON t.from_stage = cs.current_stage AND t.action = p_action
+    ),
+    updated AS (
+        UPDATE candidates c
+        SET stage = CASE WHEN p.next_stage <> p.current_stage THEN p.next_stage ELSE c.stage END,
+            status = COALESCE(p.candidate_status, c.status),
+            updated_at = v_now
+        FROM planned p
+        WHERE c.id = p.id AND p.allowed AND c.stage::text IS NOT DISTINCT FROM p.stored_stage
+        RETURNING c.id
+    ),
+    history AS (
+        INSERT INTO candidate_stage_history (
+            candidate_id, action, from_stage, to_stage, performed_by, timestamp, notes, status
+        )
+        SELECT p.id, p_action, p.current_stage, p.next_stage, p_performed_by, v_now,
+               COALESCE(p_notes, 'Performed action: ' || p_action), 'completed'
+        FROM planned p
+        JOIN updated u ON u.id = p.id
+        RETURNING candidate_id, id
+    )
+    SELECT jsonb_agg(jsonb_build_object(
+        'candidate_id', p.id,
+        'success', u.id IS NOT NULL,
+        'from_stage', p.current_stage,
+        'to_stage', CASE WHEN u.id IS NOT NULL THEN p.next_stage ELSE p.current_stage END,
+        'stage_changed', u.id IS NOT NULL AND p.next_stage <> p.current_stage,
+        'history_id', h.id,
+        'error', CASE
+            WHEN NOT p.found THEN 'not_found'
+            WHEN NOT p.allowed THEN 'invalid_transition'
+            WHEN u.id IS NULL THEN 'stage_changed'
+        END,
+        'message', CASE
+            WHEN NOT p.found THEN 'Candidate not found'
+            WHEN NOT p.allowed THEN format('Action ''%s'' not allowed in stage ''%s''', p_action, p.current_stage)
+            WHEN u.id IS NULL THEN 'Candidate changed stage concurrently'
+            WHEN p.next_stage <> p.current_stage THEN format('Successfully performed action ''%s'' and moved to stage ''%s''', p_action, p.next_stage)
+            ELSE format('Successfully performed action ''%s''', p_action)
+        END
+    ))
+    INTO v_results
+    FROM planned p
+    LEFT JOIN updated u ON u.id = p.id
+    LEFT JOIN history h ON h.candidate_id = p.id;
+
+    RETURN jsonb_build_object(
+        'action', p_action,
+        'results', COALESCE(v_results, '[]'::jsonb)
+    );
+END;
+$$;
@@ -0,0 +1,72 @@
+-- Migration 015: Incremental time-in-stage analytics
+-- PipelineAnalyticsService consumes candidate_stage_history past a watermark,
+-- folds dwell times into log-bucketed histograms and persists them here, so
+-- dashboard quantiles never replay the full history.
+CREATE TABLE IF NOT EXISTS pipeline_analytics_state (
+    name TEXT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,           -- compare-and-set guard between workers
+    last_timestamp TIMESTAMP WITH TIME ZONE,     -- keyset watermark into candidate_stage_history
+    last_history_id UUID,
+    time_in_stage JSONB NOT NULL DEFAULT '{}',   -- stage -> histogram
+    time_to_hire JSONB NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO pipeline_analytics_state (name) VALUES ('stage_dwell')
+ON CONFLICT (name) DO NOTHING;
+
+-- Stage each candidate is currently in and since when (the open interval)
+CREATE TABLE IF NOT EXISTS candidate_stage_cursors (
+    candidate_id UUID PRIMARY KEY REFERENCES candidates(id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    entered_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_candidate_stage_history_timestamp_id
+    ON candidate_stage_history(timestamp, id);
+
+-- Commit one consumed batch: the compare-and-set on the watermark and the
+-- cursor upsert happen in one transaction, so a crash can neither advance the
+-- watermark without the cursors nor leave cursors ahead of the watermark.
+-- Cursors of candidates that no longer exist are skipped. Returns false when
+-- another worker advanced the state first.
+CREATE OR REPLACE FUNCTION commit_pipeline_analytics_batch(
+    p_name text,
+    p_version bigint,
+    p_last_timestamp timestamptz,
+    p_last_history_id uuid,
+    p_time_in_stage jsonb,
+    p_time_to_hire jsonb,
+    p_cursors jsonb
+)
+RETURNS boolean
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE pipeline_analytics_state
+    SET version = p_version + 1,
+        last_timestamp = p_last_timestamp,
+        last_history_id = p_last_history_id,
+        time_in_stage = p_time_in_stage,
+        time_to_hire = p_time_to_hire,
+        updated_at = now()
+    WHERE name = p_name AND version = p_version;
+
+    IF NOT FOUND THEN
+        RETURN false;
+    END IF;
+
+    INSERT INTO candidate_stage_cursors (candidate_id, stage, entered_at, applied_at)
+    SELECT c.candidate_id, c.stage, c.entered_at, c.applied_at
+    FROM jsonb_to_recordset(p_cursors)
+        AS c(candidate_id uuid, stage text, entered_at timestamptz, applied_at timestamptz)
+    WHERE EXISTS (SELECT 1 FROM candidates WHERE id = c.candidate_id)
+    ON CONFLICT (candidate_id) DO UPDATE
+    SET stage = EXCLUDED.stage,
+        entered_at = EXCLUDED.entered_at,
+        applied_at = EXCLUDED.applied_at;
+
+    RETURN true;
+END;
+$$;
@@ -0,0 +1,24 @@
+-- Migration 016: Stage history joined with candidate names
+-- Lets the workflow history/audit endpoints read transitions and candidate
+-- names in one query instead of one candidates lookup per row.
+CREATE OR REPLACE VIEW candidate_stage_history_view AS
+SELECT
+    h.id,
+    h.candidate_id,
+    h.action,
+    h.from_stage,
+    h.to_stage,
+    h.performed_by,
+    h.timestamp,
+    h.notes,
+    h.status,
+    c.name AS candidate_name,
+    c.stage AS candidate_stage
+FROM candidate_stage_history h
+LEFT JOIN candidates c ON c.id = h.candidate_id;
+
+-- Keyset paging over (timestamp, id): the unfiltered scan uses
+-- idx_candidate_stage_history_timestamp_id (migration 015), per-candidate
+-- paging uses this one
+CREATE INDEX IF NOT EXISTS idx_candidate_stage_history_candidate_keyset
+    ON candidate_stage_history(candidate_id, timestamp, id);
@@ -0,0 +1,168 @@
+-- Migration 017: Monthly partitions for candidate_stage_history
+-- The history table is append-only and grows without bound. Rebuild it as a
+-- range-partitioned table (one partition per month, named
+-- candidate_stage_history_pYYYY_MM) so time-bounded reads prune to the hot
+-- months, and old months can be exported to Parquet and dropped
+-- (see services/stage_history_service.py and archive_stage_history.py).
+
+DROP VIEW IF EXISTS candidate_stage_history_view;
+
+ALTER TABLE candidate_stage_history RENAME TO candidate_stage_history_unpartitioned;
+
+CREATE TABLE candidate_stage_history (
+    LIKE candidate_stage_history_unpartitioned INCLUDING DEFAULTS
+) PARTITION BY RANGE (timestamp);
+
+ALTER TABLE candidate_stage_history ALTER COLUMN timestamp SET DEFAULT now();
+ALTER TABLE candidate_stage_history ALTER COLUMN timestamp SET NOT NULL;
+-- The partition key must be part of the primary key
+ALTER TABLE candidate_stage_history ADD PRIMARY KEY (id, timestamp);
+
+-- Rows outside every monthly partition (e.g. a month whose partition was not
+-- created in time) land here instead of failing the insert
+CREATE TABLE IF NOT EXISTS candidate_stage_history_default
+    PARTITION OF candidate_stage_history DEFAULT;
+
+CREATE OR REPLACE FUNCTION ensure_stage_history_partitions(
+    p_from date DEFAULT CURRENT_DATE,
+    p_months_ahead int DEFAULT 3
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_month date := date_trunc('month', p_from)::date;
+    v_last date := (date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead))::date;
+    v_name text;
+    v_created int := 0;
+BEGIN
+    WHILE v_month <= v_last LOOP
+        v_name := format('candidate_stage_history_p%s', to_char(v_month, 'YYYY_MM'));
+        IF to_regclass(v_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF candidate_stage_history FOR VALUES FROM (%L) TO (%L)',
+                v_name, v_month, (v_month + interval '1 month')::date);
+            v_created := v_created + 1;
+        END IF;
+        v_month := (v_month + interval '1 month')::date;
+    END LOOP;
+    RETURN v_created;
+END;
+$$;
+
+-- Partitions for every month that has history, plus a few months ahead
+SELECT ensure_stage_history_partitions(
+    COALESCE((SELECT min(timestamp)::date FROM candidate_stage_history_unpartitioned), CURRENT_DATE));
+
+UPDATE candidate_stage_history_unpartitioned SET timestamp = now() WHERE timestamp IS NULL;
+
+INSERT INTO candidate_stage_history
+SELECT * FROM candidate_stage_history_unpartitioned;
+
+DROP TABLE candidate_stage_history_unpartitioned;
+
+-- LIKE does not copy foreign keys
+ALTER TABLE candidate_stage_history
+    ADD CONSTRAINT candidate_stage_history_candidate_id_fkey
+    FOREIGN KEY (candidate_id) REFERENCES candidates(id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_candidate_stage_history_candidate_id
+    ON candidate_stage_history(candidate_id);
+CREATE INDEX IF NOT EXISTS idx_candidate_stage_history_timestamp_id
+    ON candidate_stage_history(timestamp, id);
+CREATE INDEX IF NOT EXISTS idx_candidate_stage_history_candidate_keyset
+    ON candidate_stage_history(candidate_id, timestamp, id);
+
+COMMENT ON TABLE candidate_stage_history IS 'Audit trail of candidate stage transitions (partitioned by month)';
+
+-- Recreate the name-joined view from migration 016 on the partitioned table
+CREATE OR REPLACE VIEW candidate_stage_history_view AS
+SELECT
+    h.id,
+    h.candidate_id,
+    h.action,
+    h.from_stage,
+    h.to_stage,
+    h.performed_by,
+    h.timestamp,
+    h.notes,
+    h.status,
+    c.name AS candidate_name,
+    c.stage AS candidate_stage
+FROM candidate_stage_history h
+LEFT JOIN candidates c ON c.id = h.candidate_id;
+
+-- Months that have been exported to cold storage and dropped from Postgres
+CREATE TABLE IF NOT EXISTS stage_history_archives (
+    partition_name TEXT PRIMARY KEY,
+    range_start DATE NOT NULL,
+    range_end DATE NOT NULL,
+    storage_bucket TEXT NOT NULL,
+    storage_path TEXT NOT NULL,
+    row_count BIGINT NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_stage_history_archives_range
+    ON stage_history_archives(range_start, range_end);
+
+CREATE OR REPLACE FUNCTION list_stage_history_partitions()
+RETURNS TABLE (partition_name text, range_start date, range_end date)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT c.relname::text,
+           to_date(substring(c.relname from '_p(\d{4}_\d{2})$'), 'YYYY_MM'),
+           (to_date(substring(c.relname from '_p(\d{4}_\d{2})$'), 'YYYY_MM') + interval '1 month')::date
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'candidate_stage_history'::regclass
+      AND c.relname ~ '_p\d{4}_\d{2}$'
+    ORDER BY 2;
+$$;
+
+-- Detach and drop a month once its Parquet export is safely stored. The row
+-- count must still match the export, so late inserts are never lost.
+CREATE OR REPLACE FUNCTION archive_stage_history_partition(
+    p_partition_name text,
+    p_storage_bucket text,
+    p_storage_path text,
+    p_row_count bigint
+)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_start date;
+    v_count bigint;
+BEGIN
+    SELECT p.range_start INTO v_start
+    FROM list_stage_history_partitions() p
+    WHERE p.partition_name = p_partition_name;
+
+    IF v_start IS NULL THEN
+        RETURN jsonb_build_object('success', false,
+                                  'message', format('%s is not a monthly history partition', p_partition_name));
+    END IF;
+
+    EXECUTE format('LOCK TABLE %I IN ACCESS EXCLUSIVE MODE', p_partition_name);
+    EXECUTE format('SELECT count(*) FROM %I', p_partition_name) INTO v_count;
+    IF v_count <> p_row_count THEN
+        RETURN jsonb_build_object('success', false,
+                                  'message', format('%s has %s rows but %s were exported', p_partition_name, v_count, p_row_count));
+    END IF;
+
+    EXECUTE format('ALTER TABLE candidate_stage_history DETACH PARTITION %I', p_partition_name);
+    EXECUTE format('DROP TABLE %I', p_partition_name);
+
+    INSERT INTO stage_history_archives (
+        partition_name, range_start, range_end, storage_bucket, storage_path, row_count
+    ) VALUES (
+        p_partition_name, v_start, (v_start + interval '1 month')::date,
+        p_storage_bucket, p_storage_path, p_row_count
+    );
+
+    RETURN jsonb_build_object('success', true, 'partition_name', p_partition_name,
+                              'row_count', p_row_count);
+END;
+$$;
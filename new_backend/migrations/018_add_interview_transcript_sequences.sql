@@ -0,0 +1,17 @@
+-- Migration 018: Sequenced live transcript rows
+-- Utterances streamed over the interview WebSocket carry a client sequence
+-- number; the unique index makes resends after a reconnect idempotent.
+CREATE TABLE IF NOT EXISTS interview_transcripts (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    interview_id UUID NOT NULL REFERENCES interviews(id) ON DELETE CASCADE,
+    speaker TEXT NOT NULL,
+    text TEXT NOT NULL,
+    timestamp TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE interview_transcripts ADD COLUMN IF NOT EXISTS sequence BIGINT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_interview_transcripts_interview_sequence
+    ON interview_transcripts(interview_id, sequence);
+CREATE INDEX IF NOT EXISTS idx_interview_transcripts_interview_timestamp
+    ON interview_transcripts(interview_id, timestamp);
@@ -0,0 +1,21 @@
+-- Migration 019: Chunk summaries of interview transcripts
+-- The live assistant summarizes each block of utterances as it leaves its
+-- rolling window; end-of-interview summarization reuses these and only
+-- summarizes the tail that was never folded (map), then combines them (reduce).
+CREATE TABLE IF NOT EXISTS interview_transcript_chunks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    interview_id UUID NOT NULL REFERENCES interviews(id) ON DELETE CASCADE,
+    first_sequence BIGINT NOT NULL,
+    last_sequence BIGINT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_interview_transcript_chunks_interview_first
+    ON interview_transcript_chunks(interview_id, first_sequence);
+
+COMMENT ON TABLE interview_transcript_chunks IS 'Summaries of contiguous transcript ranges, reused by end-of-interview summarization';
+
+-- Written by end_interview along with the final status
+ALTER TABLE interviews ADD COLUMN IF NOT EXISTS end_time TIMESTAMP WITH TIME ZONE;
+ALTER TABLE interviews ADD COLUMN IF NOT EXISTS summary JSONB;
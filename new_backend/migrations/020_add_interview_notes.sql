@@ -0,0 +1,36 @@
+-- Migration 020: Append-only interview notes
+-- Notes used to be appended to interviews.notes with a read-modify-write,
+-- so concurrent interviewers could overwrite each other and every note
+-- rewrote the whole text. Each note is now one inserted row. interviews.notes
+-- keeps the text entered when scheduling (and notes written before this
+-- migration); all_notes(interviews) renders it together with the appended
+-- notes in the old format, computed only when a query selects it.
+CREATE TABLE IF NOT EXISTS interview_notes (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    interview_id UUID NOT NULL REFERENCES interviews(id) ON DELETE CASCADE,
+    author TEXT NOT NULL DEFAULT 'system',
+    note TEXT NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_interview_notes_interview_keyset
+    ON interview_notes(interview_id, created_at, id);
+
+COMMENT ON TABLE interview_notes IS 'Append-only notes on interviews';
+
+-- PostgREST exposes this as a computed column: select=*,all_notes
+CREATE OR REPLACE FUNCTION all_notes(interviews)
+RETURNS text
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT concat_ws(E'\n\n',
+        NULLIF($1.notes, ''),
+        (SELECT string_agg(
+                    format('[%s] %s: %s',
+                           to_char(n.created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US'),
+                           n.author, n.note),
+                    E'\n\n' ORDER BY n.created_at, n.id)
+         FROM interview_notes n
+         WHERE n.interview_id = $1.id));
+$$;
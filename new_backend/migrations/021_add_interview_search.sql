@@ -0,0 +1,140 @@
+-- Migration 021: Full-text search over interview transcripts, notes and evaluations
+-- Stored tsvector columns with GIN indexes, so a search touches only the
+-- matching rows instead of scanning every utterance.
+
+-- Written by the interview flows; declared here so the search column can use them
+ALTER TABLE interviews ADD COLUMN IF NOT EXISTS evaluation JSONB;
+ALTER TABLE interviews ADD COLUMN IF NOT EXISTS summary JSONB;
+
+ALTER TABLE interview_transcripts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(text, ''))) STORED;
+CREATE INDEX IF NOT EXISTS idx_interview_transcripts_search
+    ON interview_transcripts USING gin (search_vector);
+
+ALTER TABLE interview_notes ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(note, ''))) STORED;
+CREATE INDEX IF NOT EXISTS idx_interview_notes_search
+    ON interview_notes USING gin (search_vector);
+
+-- Scheduling notes plus every string inside the evaluation and summary documents
+ALTER TABLE interviews ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(notes, ''))
+        || jsonb_to_tsvector('english', jsonb_build_array(evaluation, summary), '["string"]')
+    ) STORED;
+CREATE INDEX IF NOT EXISTS idx_interviews_search
+    ON interviews USING gin (search_vector);
+
+-- Snippets are returned as HTML: the source text is escaped before ts_headline
+-- adds <mark> tags, so the only markup in a snippet is the highlighting
+CREATE OR REPLACE FUNCTION html_escape(p_text text)
+RETURNS text
+LANGUAGE sql
+IMMUTABLE
+AS $$
+SELECT replace(replace(replace(replace(replace(p_text,
+    '&', '&amp;'), '<', '&lt;'), '>', '&gt;'), '"', '&quot;'), '''', '&#39;');
+$$;
+
+-- Ranked, highlighted matches. Each source ranks at most p_max_matches of its
+-- most recent matches, so very common terms stay cheap; ts_headline (the
+-- expensive part) only runs on the page being returned.
+CREATE OR REPLACE FUNCTION search_interviews(
+    p_query text,
+    p_limit int DEFAULT 20,
+    p_offset int DEFAULT 0,
+    p_sources text[] DEFAULT ARRAY['transcript', 'note', 'evaluation'],
+    p_candidate_id uuid DEFAULT NULL,
+    p_max_matches int DEFAULT 2000
+)
+RETURNS TABLE (
+    source text,
+    item_id uuid,
+    interview_id uuid,
+    candidate_id uuid,
+    candidate_name text,
+    speaker text,
+    occurred_at timestamptz,
+    rank real,
+    snippet text
+)
+LANGUAGE sql
+STABLE
+AS $$
+WITH q AS (
+    SELECT websearch_to_tsquery('english', p_query) AS query
+),
+transcript_hits AS (
+    SELECT 'transcript'::text AS source, t.id AS item_id, t.interview_id, t.speaker,
+           t.timestamp AS occurred_at, ts_rank_cd(t.search_vector, q.query) AS rank
+    FROM (
+        SELECT t.*
+        FROM interview_transcripts t, q
+        WHERE 'transcript' = ANY(p_sources)
+          AND t.search_vector @@ q.query
+          AND (p_candidate_id IS NULL OR t.interview_id IN (
+                SELECT i.id FROM interviews i WHERE i.candidate_id = p_candidate_id))
+        ORDER BY t.timestamp DESC
+        LIMIT p_max_matches
+    ) t, q
+),
+note_hits AS (
+    SELECT 'note'::text, n.id, n.interview_id, n.author,
+           n.created_at, ts_rank_cd(n.search_vector, q.query)
+    FROM (
+        SELECT n.*
+        FROM interview_notes n, q
+        WHERE 'note' = ANY(p_sources)
+          AND n.search_vector @@ q.query
+          AND (p_candidate_id IS NULL OR n.interview_id IN (
+                SELECT i.id FROM interviews i WHERE i.candidate_id = p_candidate_id))
+        ORDER BY n.created_at DESC
+        LIMIT p_max_matches
+    ) n, q
+),
+evaluation_hits AS (
+    SELECT 'evaluation'::text, i.id, i.id, NULL::text,
+           i.updated_at, ts_rank_cd(i.search_vector, q.query)
+    FROM (
+        SELECT i.*
+        FROM interviews i, q
+        WHERE 'evaluation' = ANY(p_sources)
+          AND i.search_vector @@ q.query
+          AND (p_candidate_id IS NULL OR i.candidate_id = p_candidate_id)
+        ORDER BY i.updated_at DESC NULLS LAST
+        LIMIT p_max_matches
+    ) i, q
+),
+page AS (
+    SELECT * FROM transcript_hits
+    UNION ALL SELECT * FROM note_hits
+    UNION ALL SELECT * FROM evaluation_hits
+    ORDER BY rank DESC, occurred_at DESC
+    LIMIT p_limit OFFSET p_offset
+)
+SELECT
+    p.source,
+    p.item_id,
+    p.interview_id,
+    i.candidate_id,
+    c.name,
+    p.speaker,
+    p.occurred_at,
+    p.rank,
+    ts_headline('english', html_escape(
+        CASE p.source
+            WHEN 'transcript' THEN (SELECT t.text FROM interview_transcripts t WHERE t.id = p.item_id)
+            WHEN 'note' THEN (SELECT n.note FROM interview_notes n WHERE n.id = p.item_id)
+            ELSE concat_ws(' ', i.notes, (
+                SELECT string_agg(v #>> '{}', ' ')
+                FROM jsonb_path_query(jsonb_build_array(i.evaluation, i.summary),
+                                      'strict $.** ? (@.type() == "string")') v))
+        END),
+        q.query,
+        'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10, FragmentDelimiter=" … "')
+FROM page p
+CROSS JOIN q
+LEFT JOIN interviews i ON i.id = p.interview_id
+LEFT JOIN candidates c ON c.id = i.candidate_id
+ORDER BY p.rank DESC, p.occurred_at DESC;
+$$;
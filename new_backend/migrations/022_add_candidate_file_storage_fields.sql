@@ -0,0 +1,9 @@
+-- Migration 022: Content hash and storage location for candidate files
+-- Uploads are streamed once to storage; the same pass records a SHA-256 of
+-- the content and the extracted text, and the bucket/path the object lives at.
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS content_sha256 TEXT;
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS storage_bucket TEXT;
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS storage_path TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_candidate_files_content_sha256
+    ON candidate_files(content_sha256);
@@ -0,0 +1,10 @@
+-- Migration 023: Direct-to-storage uploads
+-- Clients upload to signed URLs and then register the object; the row is
+-- written with processing_status 'pending' until the background step has
+-- hashed it and extracted its text ('processed' or 'failed').
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS processing_status TEXT;
+
+-- Completion callbacks may be retried; one row per stored object
+CREATE UNIQUE INDEX IF NOT EXISTS idx_candidate_files_storage_object
+    ON candidate_files(storage_bucket, storage_path)
+    WHERE storage_path IS NOT NULL;
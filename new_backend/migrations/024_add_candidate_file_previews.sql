@@ -0,0 +1,8 @@
+-- Migration 024: Precomputed file previews
+-- A first-page JPEG thumbnail (stored next to the original under previews/)
+-- and a short text excerpt, rendered in the background after upload so
+-- listings never open the original documents. preview_status is NULL until
+-- the background step has run ('processed' or 'failed').
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS thumbnail_url TEXT;
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS preview_text TEXT;
+ALTER TABLE candidate_files ADD COLUMN IF NOT EXISTS preview_status TEXT;
@@ -0,0 +1,97 @@
+-- Migration 025: Apply a previewed reschedule plan atomically
+-- ReschedulePlanner previews moves; applying them must not re-plan. The moves
+-- the user approved are applied as-is, all or nothing: every booking must still
+-- be where the preview found it and every new slot must still be free.
+-- Moved rows are parked (interviewer and room cleared) before being placed, so
+-- the UNIQUE(interviewer_id/room_id, scheduled_date, scheduled_time)
+-- constraints hold whatever order the moves are in.
+CREATE OR REPLACE FUNCTION apply_interview_moves(p_moves jsonb)
+RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_stale uuid[];
+    v_applied int;
+BEGIN
+    CREATE TEMP TABLE moves ON COMMIT DROP AS
+    SELECT *
+    FROM jsonb_to_recordset(p_moves) AS m(
+        interview_id uuid,
+        old_interviewer_id uuid,
+        old_date date,
+        old_time time,
+        new_interviewer_id uuid,
+        room_id uuid,
+        new_date date,
+        new_time time,
+        duration_minutes int
+    );
+
+    -- Serialize with other bookings on the same resources (sorted to avoid deadlocks)
+    PERFORM pg_advisory_xact_lock(hashtext(resource_id::text))
+    FROM (
+        SELECT old_interviewer_id AS resource_id FROM moves
+        UNION SELECT new_interviewer_id FROM moves
+        UNION SELECT room_id FROM moves
+    ) resources
+    WHERE resource_id IS NOT NULL
+    ORDER BY resource_id;
+
+    PERFORM 1 FROM interview_schedules s JOIN moves m ON m.interview_id = s.id FOR UPDATE OF s;
+
+    SELECT array_agg(m.interview_id) INTO v_stale
+    FROM moves m
+    LEFT JOIN interview_schedules s
+        ON s.id = m.interview_id
+       AND s.status = 'scheduled'
+       AND s.interviewer_id IS NOT DISTINCT FROM m.old_interviewer_id
+       AND s.scheduled_date = m.old_date
+       AND s.scheduled_time = m.old_time
+    WHERE s.id IS NULL;
+
+    IF v_stale IS NOT NULL THEN
+        RETURN jsonb_build_object('success', false, 'error', 'stale',
+                                  'message', 'Some interviews changed since the preview',
+                                  'interview_ids', to_jsonb(v_stale));
+    END IF;
+
+    -- New slots must not overlap bookings made since the preview (on timestamps,
+    -- so bookings running past midnight compare correctly)
+    SELECT array_agg(DISTINCT m.interview_id) INTO v_stale
+    FROM moves m
+    JOIN interview_schedules s
+        ON s.status = 'scheduled'
+       AND s.scheduled_date BETWEEN m.new_date - 1 AND m.new_date + 1
+       AND (s.interviewer_id = m.new_interviewer_id
+            OR (m.room_id IS NOT NULL AND s.room_id = m.room_id))
+       AND s.scheduled_date + s.scheduled_time
+           < m.new_date + m.new_time + make_interval(mins => COALESCE(m.duration_minutes, 60))
+       AND m.new_date + m.new_time
+           < s.scheduled_date + s.scheduled_time + make_interval(mins => COALESCE(s.duration_minutes, 60))
+    WHERE NOT EXISTS (SELECT 1 FROM moves other WHERE other.interview_id = s.id);
+
+    IF v_stale IS NOT NULL THEN
+        RETURN jsonb_build_object('success', false, 'error', 'conflict',
+                                  'message', 'Some new slots were booked since the preview',
+                                  'interview_ids', to_jsonb(v_stale));
+    END IF;
+
+    UPDATE interview_schedules s
+    SET interviewer_id = NULL, room_id = NULL
+    FROM moves m
+    WHERE s.id = m.interview_id;
+
+    UPDATE interview_schedules s
+    SET interviewer_id = m.new_interviewer_id,
+        room_id = m.room_id,
+        scheduled_date = m.new_date,
+        scheduled_time = m.new_time,
+        status = 'scheduled',
+        updated_at = now()
+    FROM moves m
+    WHERE s.id = m.interview_id;
+    GET DIAGNOSTICS v_applied = ROW_COUNT;
+
+    RETURN jsonb_build_object('success', true, 'applied', v_applied);
+END;
+$$;
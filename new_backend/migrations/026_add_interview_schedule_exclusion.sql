@@ -0,0 +1,26 @@
+-- Migration 026: Enforce non-overlapping bookings in the database
+-- The UNIQUE(interviewer_id/room_id, scheduled_date, scheduled_time) constraints
+-- only catch bookings that start at the same minute, and the advisory locks in
+-- book_panel_interview / apply_interview_moves only serialize those functions
+-- with each other. Every insert or update of a scheduled booking is now checked
+-- against time-range overlap per interviewer and per room, whichever path it
+-- comes through. Ranges are on date + time, so bookings running past midnight
+-- overlap the next day's bookings too.
+-- Fails if overlapping scheduled bookings already exist; resolve those first.
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+ALTER TABLE interview_schedules ADD COLUMN IF NOT EXISTS booked_during tsrange
+    GENERATED ALWAYS AS (
+        tsrange(scheduled_date + scheduled_time,
+                scheduled_date + scheduled_time + make_interval(mins => COALESCE(duration_minutes, 60)))
+    ) STORED;
+
+ALTER TABLE interview_schedules DROP CONSTRAINT IF EXISTS interview_schedules_interviewer_overlap;
+ALTER TABLE interview_schedules ADD CONSTRAINT interview_schedules_interviewer_overlap
+    EXCLUDE USING gist (interviewer_id WITH =, booked_during WITH &&)
+    WHERE (status = 'scheduled' AND interviewer_id IS NOT NULL);
+
+ALTER TABLE interview_schedules DROP CONSTRAINT IF EXISTS interview_schedules_room_overlap;
+ALTER TABLE interview_schedules ADD CONSTRAINT interview_schedules_room_overlap
+    EXCLUDE USING gist (room_id WITH =, booked_during WITH &&)
+    WHERE (status = 'scheduled' AND room_id IS NOT NULL);
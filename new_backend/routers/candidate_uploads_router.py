@@ -0,0 +1,372 @@
+from fastapi import APIRouter, HTTPException, File, UploadFile, Form, BackgroundTasks
+from typing import List, Optional, Dict, Any
+from services.candidate_service import CandidateService
+from services.storage_service import StorageService, MAX_RESUME_BYTES
+from services.evaluation_service import evaluation_service
+from services.dedup_service import duplicate_detection_service
+from services.file_preview_service import file_preview_service
+import json
+from pydantic import BaseModel
+import logging
+from datetime import datetime
+import uuid
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/candidates", tags=["candidates"])
+candidate_service = CandidateService()
+storage_service = StorageService()
+
+
+def _merge_target(data: Dict[str, Any], duplicates: List[Dict[str, Any]]) -> Optional[str]:
+    """Existing candidate to merge into when the client asks for it and contact details match"""
+    if data.get("on_duplicate") != "merge":
+        return None
+    for duplicate in duplicates:
+        if {"email", "phone"} & set(duplicate["matched_on"]):
+            return duplicate["candidate_id"]
+    return None
+
+
+@router.post("/", response_model=Dict[str, Any])
+async def create_candidate(
+    background_tasks: BackgroundTasks,
+    candidate_data: str = Form(...),
+    resume_file: Optional[UploadFile] = File(None),
+    supporting_docs: Optional[List[UploadFile]] = File(None)
+):
+    """Create a new candidate with optional resume upload and trigger evaluation"""
+    try:
+        # Parse candidate data
+        data = json.loads(candidate_data)
+        logger.info(f"Creating candidate with data: {data}")
+
+        # Check for likely duplicates before inserting; the bytes read here are
+        # then stored without reading the resume again
+        resume_head, resume_text = await storage_service.read_upload_head(
+            resume_file) if resume_file else (None, None)
+        duplicates = duplicate_detection_service.find_duplicates(
+            data, resume_text)
+        merge_target = _merge_target(data, duplicates)
+
+        if merge_target:
+            candidate_id = merge_target
+            logger.info(
+                f"Merging registration into existing candidate {candidate_id}")
+        else:
+            # Create candidate in database
+            candidate_id = await candidate_service.create_candidate(data)
+            logger.info(f"Created candidate with ID: {candidate_id}")
+            duplicate_detection_service.add_candidate(
+                {**data, "id": candidate_id}, resume_text)
+
+        # Upload the resume and supporting documents concurrently
+        uploads = []
+        if resume_file:
+            # Text was already extracted for the duplicate check
+            uploads.append({"file": resume_file, "category": "resume", "head": resume_head,
+                            "extract": False, "extracted_text": resume_text})
+        for doc in supporting_docs or []:
+            uploads.append({"file": doc, "category": "supporting_document"})
+        stored_files = await storage_service.store_uploads(candidate_id, uploads)
+
+        # One insert for every file record
+        records = [f["record"] for f in stored_files if "record" in f]
+        if records:
+            try:
+                from supabase_client import supabase
+                result = supabase.table("candidate_files").insert(
+                    records).execute()
+                logger.info(f"Saved {len(result.data or [])} file records")
+                background_tasks.add_task(
+                    file_preview_service.generate_many, result.data or [])
+            except Exception as record_error:
+                logger.error(
+                    f"Error saving file records: {str(record_error)}")
+
+        resume_url = next((f["record"]["file_url"] for f in stored_files
+                           if f["category"] == "resume" and "record" in f), None)
+        supporting_doc_urls = [f["record"]["file_url"] for f in stored_files
+                               if f["category"] == "supporting_document" and "record" in f]
+
+        if resume_url:
+            # Trigger evaluation in background
+            background_tasks.add_task(
+                evaluation_service.process_candidate_evaluation_async,
+                candidate_id,
+                resume_url,
+                data.get("name", "Unknown"),
+                data.get("job_id", "")
+            )
+            logger.info(
+                f"Triggered evaluation for candidate {candidate_id}")
+
+        return {
+            "success": True,
+            "id": candidate_id,
+            "candidate_id": candidate_id,
+            "resume_url": resume_url,
+            "supporting_doc_urls": supporting_doc_urls,
+            "files": [{k: v for k, v in f.items() if k != "record"} for f in stored_files],
+            "merged": merge_target is not None,
+            "possible_duplicates": duplicates,
+            "evaluation_triggered": resume_url is not None,
+            "message": f"Candidate created successfully{'with resume' if resume_url else ''}"
+        }
+
+    except Exception as e:
+        logger.error(f"Error creating candidate: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class UploadRequest(BaseModel):
+    file_name: str
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    category: str = "resume"
+
+
+class UploadCompletion(BaseModel):
+    bucket: str
+    path: str
+    file_name: Optional[str] = None
+    content_type: Optional[str] = None
+    category: str = "resume"
+
+
+@router.post("/{candidate_id}/uploads", response_model=Dict[str, Any])
+async def create_upload_urls(candidate_id: str, files: List[UploadRequest]):
+    """Issue signed URLs so files are uploaded straight to storage, not through the API"""
+    try:
+        uploads = storage_service.create_upload_urls(
+            candidate_id, [f.dict() for f in files])
+        return {"success": True, "uploads": uploads}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error creating upload URLs: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/{candidate_id}/uploads/complete", response_model=Dict[str, Any])
+async def complete_upload(
+    candidate_id: str,
+    upload: UploadCompletion,
+    background_tasks: BackgroundTasks
+):
+    """Register a file uploaded to a signed URL, then extract its text and evaluate resumes"""
+    try:
+        candidate = await candidate_service.get_candidate_by_id(candidate_id)
+        if not candidate:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        # A retried callback finds the existing row and does not enqueue again
+        file_record, created = storage_service.complete_upload(
+            candidate_id, upload.dict())
+        evaluation_triggered = False
+        if created:
+            background_tasks.add_task(
+                storage_service.process_uploaded_file, file_record)
+            if file_record.get("file_category") == "resume":
+                background_tasks.add_task(
+                    evaluation_service.process_candidate_evaluation_async,
+                    candidate_id,
+                    file_record["file_url"],
+                    candidate.get("name", "Unknown"),
+                    candidate.get("job_id", "")
+                )
+                evaluation_triggered = True
+
+        return {
+            "success": True,
+            "file": file_record,
+            "evaluation_triggered": evaluation_triggered
+        }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error completing upload: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/quick-register")
+async def quick_register_candidate(
+    candidate_data: str = Form(...),
+    resume_file: Optional[UploadFile] = None,
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+) -> Dict[str, Any]:
+    """
+    Quick register a candidate with basic info and optional resume.
+    """
+    try:
+        logger.info("Starting quick register process")
+        logger.info(f"Received raw candidate data: {candidate_data}")
+        logger.info(f"Resume file received: {True if resume_file else False}")
+
+        # Parse the candidate data
+        data = json.loads(candidate_data)
+
+        logger.info(f"Parsed candidate registration data: {data}")
+
+        # Generate unique candidate ID
+        candidate_id = str(uuid.uuid4())
+        logger.info(f"Generated candidate ID: {candidate_id}")
+
+        # Prepare candidate data for database - only include fields that exist in the candidates table
+        candidate_db_data = {
+            "id": candidate_id,
+            "name": data["name"],
+            "email": data["email"],
+            "phone": data["phone"],
+            "current_position": data.get("current_position", ""),
+            "years_experience": int(data.get("years_experience", 0)) if data.get("years_experience") else 0,
+            "education": data.get("education", ""),
+            "experience": data.get("experience", ""),
+            "skills": data.get("skills", []),
+            "linkedin_url": data.get("linkedin_url", ""),
+            "github_url": data.get("github_url", ""),
+            "portfolio_url": data.get("portfolio_url", ""),
+            "availability": data.get("availability", "immediately"),
+            "salary_expectations": float(data.get("salary_expectations", 0)) if data.get("salary_expectations") else None,
+            "preferred_work_type": data.get("preferred_work_type", "full_time"),
+            "source": data.get("source", "direct"),
+            "stage": "applied",
+            "status": "active",
+            "notes": f"Registered from {data.get('source', 'direct')} - Malaysia",
+            "certifications": data.get("certifications", []),
+            "languages": data.get("languages", ["English", "Bahasa Malaysia"])
+        }
+
+        logger.info(
+            f"Prepared candidate data for database: {candidate_db_data}")
+
+        # Check for likely duplicates (walk-ins re-registering) before inserting
+        resume_head, resume_text = await storage_service.read_upload_head(
+            resume_file) if resume_file else (None, None)
+        duplicates = duplicate_detection_service.find_duplicates(
+            candidate_db_data, resume_text)
+        merge_target = _merge_target(data, duplicates)
+
+        if merge_target:
+            created_candidate_id = merge_target
+            logger.info(
+                f"Merging registration into existing candidate {created_candidate_id}")
+        else:
+            # Create candidate in database
+            created_candidate_id = await candidate_service.create_candidate(candidate_db_data)
+
+            if not created_candidate_id:
+                raise Exception("Failed to create candidate in database")
+
+            logger.info(
+                f"Successfully created candidate with ID: {created_candidate_id}")
+            duplicate_detection_service.add_candidate(
+                candidate_db_data, resume_text)
+
+        # Handle resume upload if provided
+        resume_url = None
+        if resume_file:
+            try:
+                logger.info(
+                    f"Processing resume upload for candidate {created_candidate_id}")
+                stored = await storage_service.store_upload(
+                    resume_file, created_candidate_id, "resume", MAX_RESUME_BYTES,
+                    extract=False, head=resume_head)
+                resume_url = stored["url"]
+
+                if resume_url:
+                    from supabase_client import supabase
+                    file_result = supabase.table("candidate_files").insert(storage_service.file_record(
+                        resume_file, stored, created_candidate_id, "resume", resume_text)).execute()
+                    background_tasks.add_task(
+                        file_preview_service.generate_many, file_result.data or [])
+
+                    # Trigger evaluation in background
+                    background_tasks.add_task(
+                        evaluation_service.process_candidate_evaluation_async,
+                        created_candidate_id,
+                        resume_url,
+                        data["name"],
+                        data.get("job_id", "")
+                    )
+
+                    logger.info(
+                        f"Resume uploaded and evaluation triggered for candidate {created_candidate_id}")
+
+            except Exception as e:
+                logger.error(f"Error handling resume upload: {str(e)}")
+                # Continue without resume if upload fails
+                pass
+
+        # Create event registration if event_id is provided
+        if data.get("event_id"):
+            try:
+                logger.info(
+                    f"Creating event registration for candidate {created_candidate_id} and event {data['event_id']}")
+
+                success = await candidate_service.create_event_registration(
+                    created_candidate_id,
+                    data["event_id"]
+                )
+
+                if success:
+                    logger.info(f"Event registration created successfully")
+                else:
+                    logger.warning(f"Failed to create event registration")
+
+            except Exception as e:
+                logger.error(f"Error creating event registration: {str(e)}")
+                # Continue without event registration if it fails
+                pass
+
+        # Store job application info in notes if job_id is provided
+        if data.get("job_id"):
+            try:
+                logger.info(
+                    f"Adding job application note for candidate {created_candidate_id} and job {data['job_id']}")
+
+                # Get current notes and append job info
+                current_notes = candidate_db_data.get("notes", "")
+                job_note = f"Applied for job ID: {data['job_id']}"
+                updated_notes = f"{current_notes} | {job_note}" if current_notes else job_note
+
+                # Update candidate notes
+                candidate_service.db.table("candidates").update({
+                    "notes": updated_notes,
+                    "updated_at": datetime.utcnow().isoformat()
+                }).eq("id", created_candidate_id).execute()
+
+                logger.info(
+                    f"Job application noted for candidate {created_candidate_id}")
+
+            except Exception as e:
+                logger.error(f"Error noting job application: {str(e)}")
+                # Continue without job application note if it fails
+                pass
+
+        logger.info(
+            f"Candidate registration completed successfully: {created_candidate_id}")
+
+        return {
+            "success": True,
+            "id": created_candidate_id,
+            "message": "Candidate registered successfully",
+            "evaluation_status": "processing" if resume_file else "no_resume",
+            "resume_url": resume_url,
+            "merged": merge_target is not None,
+            "possible_duplicates": duplicates,
+            "country": "Malaysia",
+            "currency": "MYR",
+            "timezone": "Asia/Kuala_Lumpur",
+            "formatted_phone": data["phone"].replace("+60", "").strip() if data.get("phone") else "",
+            "formatted_salary": f"RM {data.get('salary_expectations', 0):,.2f}" if data.get('salary_expectations') else "Not specified",
+            # Include the event and job IDs for reference
+            "event_id": data.get("event_id"),
+            "job_id": data.get("job_id")
+        }
+
+    except Exception as e:
+        logger.error(f"Error in quick register: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
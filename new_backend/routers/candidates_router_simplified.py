@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
 import json
 import logging
 import requests
 from services.candidate_service_simplified import SimplifiedCandidateService
+from services.matching_service import matching_service
+from services.file_preview_service import FILE_LIST_COLUMNS
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/candidates", tags=["candidates"])
@@ -260,7 +262,7 @@ async def get_candidate_files(candidate_id: str):
     try:
         # Get candidate files from database
         files_response = candidate_service.supabase.table("candidate_files").select(
-            "*"
+            FILE_LIST_COLUMNS
         ).eq("candidate_id", candidate_id).execute()
 
         candidate_files = files_response.data if files_response.data else []
@@ -301,7 +303,7 @@ async def get_candidate_interview_data(candidate_id: str):
         # Get candidate files (resume, etc.)
         try:
             files_response = candidate_service.supabase.table("candidate_files").select(
-                "*"
+                FILE_LIST_COLUMNS
             ).eq("candidate_id", candidate_id).execute()
             candidate_files = files_response.data if files_response.data else []
         except Exception as e:
@@ -375,3 +377,39 @@ async def get_candidate_interview_data(candidate_id: str):
         logger.error(
             f"Error fetching interview data for candidate {candidate_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{candidate_id}/similar")
+def get_similar_candidates(
+    candidate_id: str,
+    limit: int = Query(10, ge=1, le=100),
+    stage: Optional[str] = Query(None),
+    event_id: Optional[str] = Query(None)
+):
+    """Get candidates with the most similar profiles"""
+    try:
+        result = matching_service.find_similar_candidates(
+            candidate_id, limit=limit, stage=stage, event_id=event_id)
+
+        if result is None:
+            raise HTTPException(status_code=404, detail="Candidate not found")
+
+        return JSONResponse(content=result)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(
+            f"Error finding similar candidates for {candidate_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/embeddings/backfill")
+def backfill_profile_embeddings(limit: int = Query(100, ge=1, le=1000)):
+    """Generate profile embeddings for candidates that are missing them"""
+    try:
+        return JSONResponse(content=matching_service.backfill_missing_embeddings(limit))
+
+    except Exception as e:
+        logger.error(f"Error backfilling profile embeddings: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, BackgroundTasks
 from typing import Dict, Any
 from datetime import datetime, timedelta
 from services.candidate_service import CandidateService
 from services.job_service import JobService
 from services.event_service import EventService
 from services.interview_service import InterviewService
+from services.pipeline_analytics_service import pipeline_analytics_service
 
 router = APIRouter(tags=["dashboard"])
 
@@ -211,7 +212,7 @@ def get_recent_activity():
 
 
 @router.get("/analytics/pipeline")
-def get_pipeline_analytics():
+def get_pipeline_analytics(background_tasks: BackgroundTasks):
     """Get detailed pipeline analytics"""
     try:
         candidates = CandidateService.get_all_candidates()
@@ -249,6 +250,15 @@ def get_pipeline_analytics():
                 pipeline_data["conversion_rates"][f"{current_stage}_to_{next_stage}"] = round(
                     conversion_rate, 2)
 
+        # Dwell times come from the incrementally maintained histograms; new
+        # history is folded in after the response, so reads never wait on it
+        background_tasks.add_task(pipeline_analytics_service.refresh)
+        dwell = pipeline_analytics_service.time_in_stage()
+        pipeline_data["time_in_stage"] = dwell["time_in_stage"]
+        pipeline_data["time_to_hire"] = dwell["time_to_hire"]
+        pipeline_data["bottlenecks"].extend(
+            pipeline_analytics_service.dwell_bottlenecks(dwell["time_in_stage"]))
+
         # Identify bottlenecks (stages with low conversion rates)
         for stage_pair, rate in pipeline_data["conversion_rates"].items():
             if rate < 20:  # Less than 20% conversion rate
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, WebSocket, Depends, HTTPException
 from typing import Dict, List
 from services.interview_service import InterviewService
+from fastapi.responses import StreamingResponse
+from services.transcript_stream_service import transcript_stream_service
+from services.interview_assistant_service import interview_assistant_service
 from models import InterviewCreate, InterviewUpdate
 
 router = APIRouter(prefix="/api/interviews", tags=["interviews"])
@@ -18,6 +21,12 @@ async def update_transcript(interview_id: str, transcript_data: Dict, service: I
     return await service.update_transcript(interview_id, transcript_data)
 
 
+@router.websocket("/{interview_id}/transcript/stream")
+async def stream_transcript(websocket: WebSocket, interview_id: str):
+    """Stream live utterances; batched writes acknowledged by sequence number"""
+    await transcript_stream_service.serve(websocket, interview_id)
+
+
 @router.post("/{interview_id}/questions")
 async def get_suggested_questions(
     interview_id: str,
@@ -26,7 +35,21 @@ async def get_suggested_questions(
     service: InterviewService = Depends()
 ):
     """Get AI-suggested questions"""
-    return await service.get_suggested_questions(transcript, context)
+    return await service.get_suggested_questions(interview_id, transcript, context)
+
+
+@router.get("/{interview_id}/questions/stream")
+async def stream_suggested_questions(interview_id: str):
+    """Stream AI-suggested questions as server-sent events"""
+    return StreamingResponse(interview_assistant_service.sse(interview_id),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/{interview_id}/suggestions/stream")
+async def stream_suggestions(websocket: WebSocket, interview_id: str):
+    """Push streamed suggestions whenever the candidate finishes an answer"""
+    await interview_assistant_service.serve(websocket, interview_id)
 
 
 @router.post("/{interview_id}/analyze")
@@ -36,7 +59,7 @@ async def analyze_response(
     service: InterviewService = Depends()
 ):
     """Get real-time analysis of responses"""
-    return await service.analyze_response(transcript)
+    return await service.analyze_response(interview_id, transcript)
 
 
 @router.post("/{interview_id}/end")
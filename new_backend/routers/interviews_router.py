@@ -1,7 +1,12 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional, Dict
+import base64
+import uuid
+from fastapi import APIRouter, WebSocket, HTTPException, Query, Depends
+from typing import List, Optional, Dict, Tuple
 from models import Interview, InterviewCreate, InterviewUpdate, InterviewStatus, InterviewType
 from services.interview_service import InterviewService
+from fastapi.responses import StreamingResponse
+from services.transcript_stream_service import transcript_stream_service
+from services.interview_assistant_service import interview_assistant_service
 from datetime import datetime
 
 router = APIRouter(prefix="/api/interviews", tags=["interviews"])
@@ -239,6 +244,44 @@ def add_interview_note(interview_id: str, note_text: str, author: str = "system"
             status_code=500, detail=f"Error adding interview note: {str(e)}")
 
 
+def _encode_note_cursor(note: Dict) -> str:
+    return base64.urlsafe_b64encode(
+        f"{note['created_at']}|{note['id']}".encode()).decode()
+
+
+def _decode_note_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, note_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split("|", 1)
+        # Both halves go into a PostgREST filter, so re-emit them from parsed values
+        return datetime.fromisoformat(created_at.replace("Z", "+00:00")).isoformat(), str(uuid.UUID(note_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/{interview_id}/notes")
+def get_interview_notes(
+    interview_id: str,
+    limit: int = Query(50, ge=1, le=200, description="Number of notes to return"),
+    cursor: Optional[str] = Query(
+        None, description="nextCursor from the previous page")
+):
+    """Get notes on an interview, oldest first"""
+    try:
+        notes = InterviewService.get_interview_notes(
+            interview_id, limit, _decode_note_cursor(cursor) if cursor else None)
+        return {
+            "notes": notes,
+            "total": len(notes),
+            "nextCursor": _encode_note_cursor(notes[-1]) if len(notes) == limit else None
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching interview notes: {str(e)}")
+
+
 @router.post("/{interview_id}/reschedule")
 def reschedule_interview(
     interview_id: str,
@@ -453,6 +496,12 @@ async def update_transcript(
     return await service.update_transcript(interview_id, transcript_data)
 
 
+@router.websocket("/{interview_id}/transcript/stream")
+async def stream_transcript(websocket: WebSocket, interview_id: str):
+    """Stream live utterances; batched writes acknowledged by sequence number"""
+    await transcript_stream_service.serve(websocket, interview_id)
+
+
 @router.post("/{interview_id}/questions")
 async def get_suggested_questions(
     interview_id: str,
@@ -461,7 +510,21 @@ async def get_suggested_questions(
     service: InterviewService = Depends(InterviewService.get_instance)
 ):
     """Get AI-suggested questions"""
-    return await service.get_suggested_questions(transcript, context)
+    return await service.get_suggested_questions(interview_id, transcript, context)
+
+
+@router.get("/{interview_id}/questions/stream")
+async def stream_suggested_questions(interview_id: str):
+    """Stream AI-suggested questions as server-sent events"""
+    return StreamingResponse(interview_assistant_service.sse(interview_id),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/{interview_id}/suggestions/stream")
+async def stream_suggestions(websocket: WebSocket, interview_id: str):
+    """Push streamed suggestions whenever the candidate finishes an answer"""
+    await interview_assistant_service.serve(websocket, interview_id)
 
 
 @router.post("/{interview_id}/analyze")
@@ -471,7 +534,7 @@ async def analyze_response(
     service: InterviewService = Depends(InterviewService.get_instance)
 ):
     """Get real-time analysis of responses"""
-    return await service.analyze_response(transcript)
+    return await service.analyze_response(interview_id, transcript)
 
 
 @router.post("/{interview_id}/end")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List, Optional, Dict, Any
 from services.job_service import JobService
+from services.matching_service import matching_service
 from models import Job, JobCreate, JobUpdate
 from pydantic import BaseModel
 from supabase_client import supabase
@@ -239,3 +240,24 @@ async def get_job_applications(job_id: str):
         logger.error(f"Error fetching job applications {job_id}: {str(e)}")
         raise HTTPException(
             status_code=500, detail=f"Error fetching job applications: {str(e)}")
+
+
+@router.get("/{job_id}/ranked-candidates")
+def get_ranked_candidates(
+    job_id: str,
+    limit: int = Query(20, ge=1, le=200),
+    stage: Optional[str] = Query(None)
+):
+    """Get a ranked shortlist of candidates for a job"""
+    try:
+        ranking = matching_service.rank_candidates_for_job(
+            job_id, top_k=limit, stage=stage)
+        if ranking is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return ranking
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error ranking candidates for job {job_id}: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error ranking candidates: {str(e)}")
@@ -7,6 +7,10 @@ import os
 from dotenv import load_dotenv
 import json
 
+from services.scheduling_service import scheduling_service, is_booking_conflict
+from services.availability_service import availability_service
+from services.reschedule_service import reschedule_planner, StalePlanError
+
 # Load environment variables
 load_dotenv()
 
@@ -73,6 +77,60 @@ class InterviewSchedule(InterviewScheduleBase):
     updated_at: datetime
 
 
+class ScheduleValidationRequest(BaseModel):
+    bookings: List[InterviewScheduleBase]
+
+
+class PanelInterviewRequest(BaseModel):
+    candidate_id: str
+    interviewer_ids: List[str] = Field(..., min_length=1)
+    room_id: Optional[str] = None
+    scheduled_date: date
+    scheduled_time: time
+    duration_minutes: int = 60
+    interview_type: str = "technical"
+    interview_mode: str = "in-person"
+    notes: Optional[str] = None
+    meeting_link: Optional[str] = None
+    created_by: Optional[str] = None
+
+
+class AutoAssignRequest(BaseModel):
+    candidate_ids: List[str]
+    start_date: date
+    end_date: date
+    interview_types: List[str] = Field(default_factory=lambda: ["technical"])
+    duration_minutes: int = 60
+    interviewer_ids: Optional[List[str]] = None
+    room_ids: Optional[List[str]] = None
+    event_id: Optional[str] = None
+    min_room_capacity: int = 2
+    # Restrict an interview type to interviewers of one department
+    type_departments: Dict[str, str] = Field(default_factory=dict)
+    interview_mode: str = "in-person"
+    created_by: Optional[str] = None
+    dry_run: bool = False
+
+
+class RescheduleMove(BaseModel):
+    interview_id: str
+    reason: str
+    old_interviewer_id: str
+    new_interviewer_id: str
+    room_id: Optional[str] = None
+    old_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    old_time: str = Field(..., pattern=r"^\d{2}:\d{2}$")
+    new_date: str = Field(..., pattern=r"^\d{4}-\d{2}-\d{2}$")
+    new_time: str = Field(..., pattern=r"^\d{2}:\d{2}$")
+    duration_minutes: int = Field(..., gt=0)
+
+
+class RescheduleApplyRequest(BaseModel):
+    # The plan_token and moves returned by the preview, unchanged
+    plan_token: str
+    moves: List[RescheduleMove]
+
+
 class AvailabilitySlot(BaseModel):
     date: date
     start_time: time
@@ -146,6 +204,56 @@ async def create_interviewer(interviewer: InterviewerBase):
         raise HTTPException(
             status_code=500, detail=f"Error creating interviewer: {str(e)}")
 
+
+@router.put("/interviewers/{interviewer_id}/deactivate")
+async def deactivate_interviewer(interviewer_id: str):
+    """Mark interviewer inactive and preview rescheduling of their interviews"""
+    try:
+        result = supabase.table("interviewers").update(
+            {"is_active": False}).eq("id", interviewer_id).execute()
+        if not result.data:
+            raise HTTPException(
+                status_code=404, detail="Interviewer not found")
+
+        return {
+            "interviewer": result.data[0],
+            "reschedule_preview": reschedule_planner.plan(interviewer_id)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error deactivating interviewer: {str(e)}")
+
+
+@router.post("/interviewers/{interviewer_id}/availability")
+async def add_interviewer_availability(interviewer_id: str, slot: AvailabilitySlot):
+    """Add a date-specific availability override and preview affected interviews"""
+    try:
+        override = {
+            "interviewer_id": interviewer_id,
+            "date": slot.date.isoformat(),
+            "start_time": slot.start_time.isoformat(),
+            "end_time": slot.end_time.isoformat(),
+            "is_available": slot.is_available,
+            "reason": slot.reason
+        }
+        result = supabase.table("interviewer_availability").insert(
+            override).execute()
+
+        preview = None
+        if not slot.is_available:
+            preview = reschedule_planner.plan(
+                interviewer_id, slot.date, slot.date)
+
+        return {
+            "availability": result.data[0] if result.data else override,
+            "reschedule_preview": preview
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error adding interviewer availability: {str(e)}")
+
 # Room endpoints
 
 
@@ -230,110 +338,195 @@ async def get_interview_schedules(
 async def create_interview_schedule(interview: InterviewScheduleBase):
     """Create new interview schedule"""
     try:
-        # Check for conflicts
-        existing_query = supabase.table("interview_schedules").select("*").eq(
-            "interviewer_id", interview.interviewer_id
-        ).eq("scheduled_date", interview.scheduled_date.isoformat()).eq(
-            "scheduled_time", interview.scheduled_time.isoformat()
-        ).eq("status", "scheduled")
-
-        existing_result = existing_query.execute()
-        if existing_result.data:
+        # Check interviewer and room conflicts by time-range overlap
+        conflicts = scheduling_service.find_conflicts(interview.dict())
+        if conflicts:
+            resources = {conflict["resource"] for conflict in conflicts}
+            detail = "Interviewer already has an interview scheduled at this time" \
+                if "interviewer" in resources else "Room already booked at this time"
             raise HTTPException(
                 status_code=409,
-                detail="Interviewer already has an interview scheduled at this time"
+                detail={"message": detail, "conflicts": conflicts}
             )
 
-        # Check room conflict if room specified
-        if interview.room_id:
-            room_query = supabase.table("interview_schedules").select("*").eq(
-                "room_id", interview.room_id
-            ).eq("scheduled_date", interview.scheduled_date.isoformat()).eq(
-                "scheduled_time", interview.scheduled_time.isoformat()
-            ).eq("status", "scheduled")
-
-            room_result = room_query.execute()
-            if room_result.data:
-                raise HTTPException(
-                    status_code=409,
-                    detail="Room already booked at this time"
-                )
-
+        # The overlap constraints (migration 026) catch a booking made since the check
         result = supabase.table("interview_schedules").insert(
             interview.dict()).execute()
         return result.data[0]
+    except HTTPException:
+        raise
     except Exception as e:
-        if "409" in str(e):
-            raise e
+        if is_booking_conflict(e):
+            raise HTTPException(
+                status_code=409, detail="Interviewer or room was booked at this time meanwhile")
         raise HTTPException(
             status_code=500, detail=f"Error creating interview schedule: {str(e)}")
 
 
-@router.get("/availability/interviewers/{interviewer_id}")
-async def get_interviewer_availability(
-    interviewer_id: str,
-    start_date: date = Query(...,
-                             description="Start date for availability check"),
-    end_date: date = Query(..., description="End date for availability check")
+@router.post("/interviews/validate")
+async def validate_interview_schedules(request: ScheduleValidationRequest):
+    """Validate a batch of proposed interview bookings for conflicts"""
+    try:
+        results = scheduling_service.validate_bookings(
+            [booking.dict() for booking in request.bookings])
+        return {
+            "valid": all(result["valid"] for result in results),
+            "results": results
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error validating interview schedules: {str(e)}")
+
+
+@router.get("/common-slots")
+async def get_common_slots(
+    interviewer_ids: List[str] = Query(...,
+                                       description="Interviewers who must all attend"),
+    start_date: date = Query(..., description="Start date for the search"),
+    end_date: date = Query(..., description="End date for the search"),
+    room_id: Optional[str] = Query(None, description="Room that must be free"),
+    duration_minutes: int = Query(60, ge=15, le=480),
+    limit: int = Query(20, ge=1, le=200)
 ):
-    """Get interviewer availability for date range"""
+    """Find ranked slots where all interviewers and the room are free"""
     try:
-        # Get interviewer's general availability pattern
-        interviewer_result = supabase.table("interviewers").select(
-            "availability_pattern").eq("id", interviewer_id).execute()
-        if not interviewer_result.data:
+        if end_date < start_date:
             raise HTTPException(
-                status_code=404, detail="Interviewer not found")
-
-        availability_pattern = interviewer_result.data[0].get(
-            "availability_pattern", {})
+                status_code=400, detail="end_date must not be before start_date")
+
+        result = availability_service.common_slots(
+            start_date, end_date, interviewer_ids, room_id, duration_minutes, limit)
+        if not result["success"]:
+            raise HTTPException(status_code=404, detail=result["error"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error finding common slots: {str(e)}")
 
-        # Get specific availability overrides
-        availability_query = supabase.table("interviewer_availability").select("*").eq(
-            "interviewer_id", interviewer_id
-        ).gte("date", start_date.isoformat()).lte("date", end_date.isoformat())
 
-        availability_result = availability_query.execute()
+@router.post("/panel-interviews")
+async def create_panel_interview(request: PanelInterviewRequest):
+    """Book one interview for several interviewers at once"""
+    try:
+        result = scheduling_service.book_panel(**request.dict())
+        if not result["success"]:
+            raise HTTPException(
+                status_code=409,
+                detail={"message": "Panel interview conflicts with existing bookings",
+                        "conflicts": result["conflicts"]}
+            )
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        if is_booking_conflict(e):
+            raise HTTPException(
+                status_code=409, detail="Panel interview conflicts with an existing booking")
+        raise HTTPException(
+            status_code=500, detail=f"Error creating panel interview: {str(e)}")
 
-        # Get existing bookings
-        bookings_query = supabase.table("interview_schedules").select("scheduled_date, scheduled_time").eq(
-            "interviewer_id", interviewer_id
-        ).eq("status", "scheduled").gte("scheduled_date", start_date.isoformat()).lte("scheduled_date", end_date.isoformat())
 
-        bookings_result = bookings_query.execute()
-        booked_slots = {
-            f"{booking['scheduled_date']}_{booking['scheduled_time']}" for booking in bookings_result.data}
+@router.post("/auto-assign")
+async def auto_assign_interviews(request: AutoAssignRequest):
+    """Assign interviews for many candidates at once without conflicts"""
+    try:
+        if request.end_date < request.start_date:
+            raise HTTPException(
+                status_code=400, detail="end_date must not be before start_date")
+
+        result = scheduling_service.auto_assign(
+            candidate_ids=request.candidate_ids,
+            start_date=request.start_date,
+            end_date=request.end_date,
+            interview_types=request.interview_types,
+            duration_minutes=request.duration_minutes,
+            interviewer_ids=request.interviewer_ids,
+            room_ids=request.room_ids,
+            event_id=request.event_id,
+            min_room_capacity=request.min_room_capacity,
+            type_departments=request.type_departments,
+            interview_mode=request.interview_mode,
+            created_by=request.created_by,
+            commit=not request.dry_run
+        )
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        if is_booking_conflict(e):
+            # Another booking took one of the slots after planning; nothing was inserted
+            raise HTTPException(
+                status_code=409, detail="Some assigned slots were booked meanwhile; try again")
+        raise HTTPException(
+            status_code=500, detail=f"Error auto-assigning interviews: {str(e)}")
 
-        # Generate availability slots
-        availability_slots = []
-        current_date = start_date
 
-        while current_date <= end_date:
-            day_name = current_date.strftime("%A").lower()
-            day_slots = availability_pattern.get(day_name, [])
+@router.get("/reschedule/{interviewer_id}/preview")
+async def preview_reschedule(
+    interviewer_id: str,
+    start_date: Optional[date] = Query(
+        None, description="First day to check (default today)"),
+    end_date: Optional[date] = Query(
+        None, description="Last day to check (default 30 days ahead)"),
+    search_days: int = Query(7, ge=0, le=30)
+):
+    """Preview how an interviewer's affected interviews would be moved"""
+    try:
+        plan = reschedule_planner.plan(
+            interviewer_id, start_date, end_date, search_days)
+        if plan is None:
+            raise HTTPException(
+                status_code=404, detail="Interviewer not found")
+        return plan
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error planning reschedule: {str(e)}")
 
-            # Generate hourly slots for this day
-            available_times = []
-            for time_slot in day_slots:
-                slot_key = f"{current_date.isoformat()}_{time_slot}:00"
-                is_available = slot_key not in booked_slots
 
-                available_times.append({
-                    "time": time_slot,
-                    "is_available": is_available,
-                    "status": "available" if is_available else "booked"
-                })
+@router.post("/reschedule/{interviewer_id}/apply")
+async def apply_reschedule(interviewer_id: str, request: RescheduleApplyRequest):
+    """Apply exactly the previewed moves in one transaction"""
+    try:
+        return reschedule_planner.apply(
+            interviewer_id, [move.dict() for move in request.moves], request.plan_token)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except StalePlanError as e:
+        # Preview again and let the user approve the new plan
+        raise HTTPException(
+            status_code=409,
+            detail={"message": str(e), "interview_ids": e.interview_ids})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error applying reschedule: {str(e)}")
 
-            if available_times:
-                availability_slots.append({
-                    "date": current_date.isoformat(),
-                    "day": day_name.title(),
-                    "slots": available_times
-                })
 
-            current_date = current_date.replace(day=current_date.day + 1)
+@router.get("/availability/interviewers/{interviewer_id}")
+async def get_interviewer_availability(
+    interviewer_id: str,
+    start_date: date = Query(...,
+                             description="Start date for availability check"),
+    end_date: date = Query(..., description="End date for availability check")
+):
+    """Get interviewer availability for date range"""
+    try:
+        grid = availability_service.interviewer_grid(
+            start_date, end_date, [interviewer_id])
+        if interviewer_id not in grid.index:
+            raise HTTPException(
+                status_code=404, detail="Interviewer not found")
 
-        return availability_slots
+        return grid.hourly_slots(interviewer_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching interviewer availability: {str(e)}")
@@ -348,46 +541,37 @@ async def get_room_availability(
 ):
     """Get room availability for date range"""
     try:
-        # Get existing bookings for this room
-        bookings_query = supabase.table("interview_schedules").select("scheduled_date, scheduled_time").eq(
-            "room_id", room_id
-        ).eq("status", "scheduled").gte("scheduled_date", start_date.isoformat()).lte("scheduled_date", end_date.isoformat())
-
-        bookings_result = bookings_query.execute()
-        booked_slots = {
-            f"{booking['scheduled_date']}_{booking['scheduled_time']}" for booking in bookings_result.data}
-
-        # Generate availability slots (9 AM to 5 PM by default)
-        availability_slots = []
-        current_date = start_date
-
-        while current_date <= end_date:
-            available_times = []
-            for hour in range(9, 17):  # 9 AM to 5 PM
-                time_str = f"{hour:02d}:00"
-                slot_key = f"{current_date.isoformat()}_{time_str}:00"
-                is_available = slot_key not in booked_slots
-
-                available_times.append({
-                    "time": time_str,
-                    "is_available": is_available,
-                    "status": "available" if is_available else "booked"
-                })
-
-            availability_slots.append({
-                "date": current_date.isoformat(),
-                "day": current_date.strftime("%A"),
-                "slots": available_times
-            })
-
-            current_date = current_date.replace(day=current_date.day + 1)
-
-        return availability_slots
+        grid = availability_service.room_grid(start_date, end_date, [room_id])
+        if room_id not in grid.index:
+            raise HTTPException(status_code=404, detail="Room not found")
+
+        return grid.hourly_slots(room_id)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error fetching room availability: {str(e)}")
 
 
+@router.get("/availability/free-busy")
+async def get_free_busy(
+    start_date: date = Query(...,
+                             description="Start date for availability check"),
+    end_date: date = Query(..., description="End date for availability check"),
+    interviewer_ids: Optional[List[str]] = Query(
+        None, description="Limit to these interviewers"),
+    room_ids: Optional[List[str]] = Query(
+        None, description="Limit to these rooms")
+):
+    """Get free/busy time ranges for interviewers and rooms in one call"""
+    try:
+        return availability_service.free_busy(
+            start_date, end_date, interviewer_ids, room_ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error fetching free/busy: {str(e)}")
+
+
 @router.get("/availability/summary")
 async def get_availability_summary(
     start_date: date = Query(...,
@@ -396,23 +580,25 @@ async def get_availability_summary(
 ):
     """Get overall availability summary"""
     try:
-        # Get all active interviewers
-        interviewers_result = supabase.table("interviewers").select(
-            "id, name, role").eq("is_active", True).execute()
-
-        # Get all active rooms
-        rooms_result = supabase.table("rooms").select(
-            "id, name, type").eq("is_active", True).execute()
-
-        # Get all scheduled interviews in the date range
+        # Get all scheduled interviews in the date range once and reuse them for both grids
         interviews_result = supabase.table("interview_schedules").select("*").eq(
             "status", "scheduled"
         ).gte("scheduled_date", start_date.isoformat()).lte("scheduled_date", end_date.isoformat()).execute()
+        bookings = interviews_result.data or []
+
+        interviewer_grid = availability_service.interviewer_grid(
+            start_date, end_date, bookings=bookings)
+        room_grid = availability_service.room_grid(
+            start_date, end_date, bookings=bookings)
 
         return {
-            "interviewers": interviewers_result.data,
-            "rooms": rooms_result.data,
-            "scheduled_interviews": interviews_result.data,
+            "interviewers": interviewer_grid.resources,
+            "rooms": room_grid.resources,
+            "scheduled_interviews": bookings,
+            "free_busy": {
+                "interviewers": interviewer_grid.free_busy(),
+                "rooms": room_grid.free_busy()
+            },
             "date_range": {
                 "start": start_date.isoformat(),
                 "end": end_date.isoformat()
@@ -0,0 +1,46 @@
+import uuid
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from services.interview_service import InterviewService
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SEARCH_SOURCES = {"transcript", "note", "evaluation"}
+
+
+@router.get("/interviews")
+def search_interviews(
+    q: str = Query(..., min_length=2,
+                   description="Search terms; supports \"quoted phrases\", OR and -exclusions"),
+    source: Optional[List[str]] = Query(
+        None, description="Limit to transcript, note and/or evaluation"),
+    candidate_id: Optional[str] = Query(
+        None, description="Only this candidate's interviews"),
+    limit: int = Query(20, ge=1, le=100, description="Number of results"),
+    offset: int = Query(0, ge=0, le=1000, description="Results to skip")
+):
+    """Search interview transcripts, notes and evaluations; snippets are HTML-escaped, matches in <mark>"""
+    try:
+        unknown = set(source or []) - SEARCH_SOURCES
+        if unknown:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown source(s): {', '.join(sorted(unknown))}")
+        if candidate_id:
+            try:
+                candidate_id = str(uuid.UUID(candidate_id))
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid candidate_id")
+
+        results = InterviewService.search_interviews(
+            q, limit, offset, source, candidate_id)
+        return {
+            "query": q,
+            "results": results,
+            "total": len(results),
+            "nextOffset": offset + limit if len(results) == limit else None
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error searching interviews: {str(e)}")
@@ -11,6 +11,8 @@ from services.storage_service import StorageService
 from services.agent_service import AgentService
 from services.evaluation_service import evaluation_service
 from services.stage_management_service import stage_management_service
+from services.dedup_service import duplicate_detection_service
+from services.file_preview_service import FILE_LIST_COLUMNS
 import json
 from pydantic import BaseModel
 import os
@@ -26,106 +28,6 @@ storage_service = StorageService()
 agent_service = AgentService()
 
 
-@router.post("/", response_model=Dict[str, Any])
-async def create_candidate(
-    background_tasks: BackgroundTasks,
-    candidate_data: str = Form(...),
-    resume_file: Optional[UploadFile] = File(None),
-    supporting_docs: Optional[List[UploadFile]] = File(None)
-):
-    """Create a new candidate with optional resume upload and trigger evaluation"""
-    try:
-        # Parse candidate data
-        data = json.loads(candidate_data)
-        logger.info(f"Creating candidate with data: {data}")
-
-        # Create candidate in database
-        candidate_id = await candidate_service.create_candidate(data)
-        logger.info(f"Created candidate with ID: {candidate_id}")
-
-        # Handle resume upload if provided
-        resume_url = None
-        if resume_file:
-            try:
-                # Upload resume to storage
-                resume_url = await storage_service.upload_resume(resume_file, candidate_id)
-
-                # Save file record to candidate_files table
-                file_record = {
-                    "candidate_id": candidate_id,
-                    "file_type": resume_file.content_type,
-                    "file_url": resume_url,
-                    "file_name": resume_file.filename,
-                    "file_size": resume_file.size,
-                    "file_category": "resume"
-                }
-
-                # Insert file record
-                from supabase_client import supabase
-                result = supabase.table("candidate_files").insert(
-                    file_record).execute()
-                logger.info(f"Saved resume file record: {result.data}")
-
-                # Update candidate with resume URL
-                await candidate_service.update_candidate_resume(candidate_id, resume_url)
-
-                # Trigger evaluation in background
-                background_tasks.add_task(
-                    evaluation_service.process_candidate_evaluation_async,
-                    candidate_id,
-                    resume_url,
-                    data.get("name", "Unknown"),
-                    data.get("job_id", "")
-                )
-                logger.info(
-                    f"Triggered evaluation for candidate {candidate_id}")
-            except Exception as upload_error:
-                logger.error(f"Error uploading resume: {str(upload_error)}")
-                # Continue without resume - don't fail the entire candidate creation
-                resume_url = None
-
-        # Handle supporting documents if provided
-        supporting_doc_urls = []
-        if supporting_docs:
-            for doc in supporting_docs:
-                try:
-                    doc_url = await storage_service.upload_supporting_doc(doc, candidate_id)
-                    supporting_doc_urls.append(doc_url)
-
-                    # Save file record
-                    file_record = {
-                        "candidate_id": candidate_id,
-                        "file_type": doc.content_type,
-                        "file_url": doc_url,
-                        "file_name": doc.filename,
-                        "file_size": doc.size,
-                        "file_category": "supporting_document"
-                    }
-
-                    result = supabase.table("candidate_files").insert(
-                        file_record).execute()
-                    logger.info(
-                        f"Saved supporting doc file record: {result.data}")
-                except Exception as doc_error:
-                    logger.error(
-                        f"Error uploading supporting document: {str(doc_error)}")
-                    # Continue with other documents
-
-        return {
-            "success": True,
-            "id": candidate_id,
-            "candidate_id": candidate_id,
-            "resume_url": resume_url,
-            "supporting_doc_urls": supporting_doc_urls,
-            "evaluation_triggered": resume_url is not None,
-            "message": f"Candidate created successfully{'with resume' if resume_url else ''}"
-        }
-
-    except Exception as e:
-        logger.error(f"Error creating candidate: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
 @router.get("/{candidate_id}", response_model=Dict[str, Any])
 async def get_candidate(
     candidate_id: str,
@@ -165,6 +67,7 @@ async def delete_candidate(
     """Delete a candidate"""
     try:
         result = service.delete_candidate(candidate_id)
+        duplicate_detection_service.remove_candidate(candidate_id)
         return result
     except Exception as e:
         logger.error(f"Error deleting candidate: {str(e)}")
@@ -196,6 +99,8 @@ async def perform_candidate_action(
     try:
         result = service.perform_action(candidate_id, action, metadata)
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error performing action: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -204,11 +109,13 @@ async def perform_candidate_action(
 @router.get("/{candidate_id}/history", response_model=List[Dict[str, Any]])
 async def get_candidate_history(
     candidate_id: str,
+    since: Optional[str] = Query(
+        None, description="Include archived history from this date"),
     service: CandidateService = Depends(CandidateService.get_instance)
 ):
     """Get candidate action history"""
     try:
-        history = service.get_stage_history(candidate_id)
+        history = service.get_stage_history(candidate_id, since)
         return history
     except Exception as e:
         logger.error(f"Error fetching candidate history: {str(e)}")
@@ -276,9 +183,9 @@ async def get_candidate_files(
     try:
         from supabase_client import supabase
 
-        # Get files from candidate_files table
+        # Previews instead of the full extracted text
         result = supabase.table("candidate_files").select(
-            "*").eq("candidate_id", candidate_id).execute()
+            FILE_LIST_COLUMNS).eq("candidate_id", candidate_id).execute()
 
         return result.data if result.data else []
 
@@ -388,164 +295,6 @@ async def update_candidate_stage(candidate_id: str, stage: str):
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.post("/quick-register")
-async def quick_register_candidate(
-    candidate_data: str = Form(...),
-    resume_file: Optional[UploadFile] = None,
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-) -> Dict[str, Any]:
-    """
-    Quick register a candidate with basic info and optional resume.
-    """
-    try:
-        logger.info("Starting quick register process")
-        logger.info(f"Received raw candidate data: {candidate_data}")
-        logger.info(f"Resume file received: {True if resume_file else False}")
-
-        # Parse the candidate data
-        data = json.loads(candidate_data)
-
-        logger.info(f"Parsed candidate registration data: {data}")
-
-        # Generate unique candidate ID
-        candidate_id = str(uuid.uuid4())
-        logger.info(f"Generated candidate ID: {candidate_id}")
-
-        # Prepare candidate data for database - only include fields that exist in the candidates table
-        candidate_db_data = {
-            "id": candidate_id,
-            "name": data["name"],
-            "email": data["email"],
-            "phone": data["phone"],
-            "current_position": data.get("current_position", ""),
-            "years_experience": int(data.get("years_experience", 0)) if data.get("years_experience") else 0,
-            "education": data.get("education", ""),
-            "experience": data.get("experience", ""),
-            "skills": data.get("skills", []),
-            "linkedin_url": data.get("linkedin_url", ""),
-            "github_url": data.get("github_url", ""),
-            "portfolio_url": data.get("portfolio_url", ""),
-            "availability": data.get("availability", "immediately"),
-            "salary_expectations": float(data.get("salary_expectations", 0)) if data.get("salary_expectations") else None,
-            "preferred_work_type": data.get("preferred_work_type", "full_time"),
-            "source": data.get("source", "direct"),
-            "stage": "applied",
-            "status": "active",
-            "notes": f"Registered from {data.get('source', 'direct')} - Malaysia",
-            "certifications": data.get("certifications", []),
-            "languages": data.get("languages", ["English", "Bahasa Malaysia"])
-        }
-
-        logger.info(
-            f"Prepared candidate data for database: {candidate_db_data}")
-
-        # Create candidate in database
-        created_candidate_id = await candidate_service.create_candidate(candidate_db_data)
-
-        if not created_candidate_id:
-            raise Exception("Failed to create candidate in database")
-
-        logger.info(
-            f"Successfully created candidate with ID: {created_candidate_id}")
-
-        # Handle resume upload if provided
-        resume_url = None
-        if resume_file:
-            try:
-                logger.info(
-                    f"Processing resume upload for candidate {created_candidate_id}")
-                resume_url = await storage_service.upload_resume(resume_file, created_candidate_id)
-
-                if resume_url:
-                    await candidate_service.update_candidate_resume(created_candidate_id, resume_url)
-
-                    # Trigger evaluation in background
-                    background_tasks.add_task(
-                        evaluation_service.process_candidate_evaluation_async,
-                        created_candidate_id,
-                        resume_url,
-                        data["name"],
-                        data.get("job_id", "")
-                    )
-
-                    logger.info(
-                        f"Resume uploaded and evaluation triggered for candidate {created_candidate_id}")
-
-            except Exception as e:
-                logger.error(f"Error handling resume upload: {str(e)}")
-                # Continue without resume if upload fails
-                pass
-
-        # Create event registration if event_id is provided
-        if data.get("event_id"):
-            try:
-                logger.info(
-                    f"Creating event registration for candidate {created_candidate_id} and event {data['event_id']}")
-
-                success = await candidate_service.create_event_registration(
-                    created_candidate_id,
-                    data["event_id"]
-                )
-
-                if success:
-                    logger.info(f"Event registration created successfully")
-                else:
-                    logger.warning(f"Failed to create event registration")
-
-            except Exception as e:
-                logger.error(f"Error creating event registration: {str(e)}")
-                # Continue without event registration if it fails
-                pass
-
-        # Store job application info in notes if job_id is provided
-        if data.get("job_id"):
-            try:
-                logger.info(
-                    f"Adding job application note for candidate {created_candidate_id} and job {data['job_id']}")
-
-                # Get current notes and append job info
-                current_notes = candidate_db_data.get("notes", "")
-                job_note = f"Applied for job ID: {data['job_id']}"
-                updated_notes = f"{current_notes} | {job_note}" if current_notes else job_note
-
-                # Update candidate notes
-                candidate_service.db.table("candidates").update({
-                    "notes": updated_notes,
-                    "updated_at": datetime.utcnow().isoformat()
-                }).eq("id", created_candidate_id).execute()
-
-                logger.info(
-                    f"Job application noted for candidate {created_candidate_id}")
-
-            except Exception as e:
-                logger.error(f"Error noting job application: {str(e)}")
-                # Continue without job application note if it fails
-                pass
-
-        logger.info(
-            f"Candidate registration completed successfully: {created_candidate_id}")
-
-        return {
-            "success": True,
-            "id": created_candidate_id,
-            "message": "Candidate registered successfully",
-            "evaluation_status": "processing" if resume_file else "no_resume",
-            "resume_url": resume_url,
-            "country": "Malaysia",
-            "currency": "MYR",
-            "timezone": "Asia/Kuala_Lumpur",
-            "formatted_phone": data["phone"].replace("+60", "").strip() if data.get("phone") else "",
-            "formatted_salary": f"RM {data.get('salary_expectations', 0):,.2f}" if data.get('salary_expectations') else "Not specified",
-            # Include the event and job IDs for reference
-            "event_id": data.get("event_id"),
-            "job_id": data.get("job_id")
-        }
-
-    except Exception as e:
-        logger.error(f"Error in quick register: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
-
-
 @router.get("/", response_model=List[Dict[str, Any]])
 async def get_candidates(
     stage: Optional[str] = Query(None),
@@ -558,7 +307,7 @@ async def get_candidates(
         # Build query with proper joins using the actual database schema
         query = candidate_service.db.table("candidates").select(
             "*",
-            "candidate_files(id, file_type, file_url, file_name, uploaded_at)",
+            "candidate_files(id, file_type, file_category, file_url, file_name, uploaded_at, thumbnail_url)",
             "candidate_stage_history(id, action, from_stage, to_stage, notes, performed_by, timestamp)",
             "event_registrations(event_id, events(id, title, name, location, date))"
         )
@@ -607,8 +356,8 @@ async def get_candidates(
                 "formatted_salary": f"RM {candidate.get('salary_expectations', 0):,.2f}" if candidate.get('salary_expectations') else "Not specified",
                 "formatted_phone": candidate.get("phone", "").replace("+60", "").strip() if candidate.get("phone") else "",
                 "evaluation_data": evaluation_data,
-                "resume_files": [f for f in candidate.get("candidate_files", []) if f.get("file_type") == "resume"],
-                "other_files": [f for f in candidate.get("candidate_files", []) if f.get("file_type") != "resume"],
+                "resume_files": [f for f in candidate.get("candidate_files", []) if "resume" in (f.get("file_type"), f.get("file_category"))],
+                "other_files": [f for f in candidate.get("candidate_files", []) if "resume" not in (f.get("file_type"), f.get("file_category"))],
                 "stage_history": candidate.get("candidate_stage_history", []),
                 "events": [er.get("events") for er in candidate.get("event_registrations", []) if er.get("events")],
                 "allowed_actions": await stage_management_service.get_allowed_actions(candidate["id"])
@@ -1,11 +1,14 @@
+import base64
+import uuid
 from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from models import (
     RecruitmentStage, CandidateAction, ActionResult, WorkflowSummary,
     StageTransition, WorkflowAction
 )
 from supabase_client import supabase
 from services.workflow_service import WorkflowService
+from services.stage_history_service import stage_history_service
 from datetime import datetime, timedelta
 from workflow_state_machine import WorkflowStateMachine
 
@@ -136,22 +139,25 @@ def get_candidate_available_actions(candidate_id: str):
 
 
 @router.get("/candidate/{candidate_id}/history")
-def get_candidate_workflow_history(candidate_id: str):
+def get_candidate_workflow_history(
+    candidate_id: str,
+    since: Optional[str] = Query(
+        None, description="Include archived history from this date")
+):
     """Get complete workflow history for a candidate"""
     try:
-        # Get candidate
-        candidate_response = supabase.table("candidates").select(
-            "currentStage").eq("id", candidate_id).execute()
-        if not candidate_response.data:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-
-        current_stage = candidate_response.data[0].get(
-            "currentStage", "applied")
+        # History rows carry the candidate's current stage from the view join
+        stage_history = stage_history_service.query(
+            candidate_id=candidate_id, since=since)
 
-        # Get stage history
-        history_response = supabase.table("candidate_stage_history").select(
-            "*").eq("candidate_id", candidate_id).order("timestamp", desc=True).execute()
-        stage_history = history_response.data
+        if stage_history:
+            current_stage = stage_history[0].get("candidate_stage") or "applied"
+        else:
+            candidate_response = supabase.table("candidates").select(
+                "stage").eq("id", candidate_id).execute()
+            if not candidate_response.data:
+                raise HTTPException(status_code=404, detail="Candidate not found")
+            current_stage = candidate_response.data[0].get("stage") or "applied"
 
         return {
             "candidateId": candidate_id,
@@ -170,17 +176,13 @@ def get_candidate_workflow_history(candidate_id: str):
 def get_recent_transitions(limit: int = Query(20, description="Number of recent transitions to return")):
     """Get recent stage transitions across all candidates"""
     try:
-        response = supabase.table("candidate_stage_history").select(
-            "*").order("timestamp", desc=True).limit(limit).execute()
-        transitions = response.data
+        transitions = stage_history_service.query(limit=limit)
 
-        # Add candidate names to transitions
+        # Candidate names come from the view join (no per-row lookups); the
+        # name is NULL only when the candidate no longer exists
         for transition in transitions:
-            candidate_response = supabase.table("candidates").select(
-                "name").eq("id", transition["candidate_id"]).execute()
-            if candidate_response.data:
-                transition["candidateName"] = candidate_response.data[0].get(
-                    "name", "Unknown")
+            if transition.get("candidate_name") is not None:
+                transition["candidateName"] = transition["candidate_name"]
 
         return {
             "transitions": transitions,
@@ -237,6 +239,21 @@ def get_workflow_performance():
             status_code=500, detail=f"Error getting performance metrics: {str(e)}")
 
 
+def _encode_audit_cursor(row: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(
+        f"{row['timestamp']}|{row['id']}".encode()).decode()
+
+
+def _decode_audit_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split("|", 1)
+        # Both halves go into a PostgREST filter, so re-emit them from parsed values
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).isoformat(), str(uuid.UUID(row_id))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/audit/actions")
 def get_workflow_audit_log(
     limit: int = Query(50, description="Number of actions to return"),
@@ -244,25 +261,35 @@ def get_workflow_audit_log(
         None, description="Filter by candidate ID"),
     action: Optional[str] = Query(None, description="Filter by action type"),
     performed_by: Optional[str] = Query(
-        None, description="Filter by performer")
+        None, description="Filter by performer"),
+    cursor: Optional[str] = Query(
+        None, description="nextCursor from the previous page"),
+    since: Optional[str] = Query(
+        None, description="Start of a historical range (ISO date)"),
+    until: Optional[str] = Query(
+        None, description="End of a historical range (ISO date, exclusive)")
 ):
-    """Get workflow audit log with optional filters"""
+    """Get workflow audit log with optional filters, newest first"""
     try:
-        query = supabase.table("candidate_stage_history").select("*")
-
-        if candidate_id:
-            query = query.eq("candidate_id", candidate_id)
-        if action:
-            query = query.eq("action", action)
-        if performed_by:
-            query = query.eq("performed_by", performed_by)
-
-        response = query.order("timestamp", desc=True).limit(limit).execute()
+        # Hot partitions only, unless `since` asks for archived months
+        actions = stage_history_service.query(
+            candidate_id=candidate_id,
+            since=since,
+            until=until,
+            filters={"action": action, "performed_by": performed_by},
+            limit=limit,
+            before=_decode_audit_cursor(cursor) if cursor else None
+        )
 
         return {
-            "actions": response.data,
-            "total": len(response.data)
+            "actions": actions,
+            "total": len(actions),
+            "nextCursor": _encode_audit_cursor(actions[-1]) if len(actions) == limit else None
         }
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error getting audit log: {str(e)}")
@@ -284,19 +311,12 @@ def bulk_workflow_action(
             raise HTTPException(
                 status_code=400, detail=f"Invalid action: {action}")
 
-        results = []
-        for candidate_id in candidate_ids:
-            result = WorkflowService.perform_action(
-                candidate_id=candidate_id,
-                action=candidate_action,
-                performed_by=performed_by,
-                notes=notes
-            )
-            results.append({
-                "candidateId": candidate_id,
-                "success": result.success,
-                "message": result.message
-            })
+        results = WorkflowService.perform_bulk_action(
+            candidate_ids=candidate_ids,
+            action=candidate_action,
+            performed_by=performed_by,
+            notes=notes
+        )
 
         success_count = len([r for r in results if r["success"]])
 
@@ -430,21 +450,15 @@ def validate_transition(current_stage: str, action: str):
                 status_code=400, detail=f"Invalid stage or action: {str(e)}")
 
         # Check if transition is valid
-        is_valid = WorkflowStateMachine.is_valid_transition(
-            recruitment_stage, candidate_action)
-
-        if is_valid:
-            next_stage = WorkflowStateMachine.get_next_stage(
-                recruitment_stage, candidate_action)
-        else:
-            next_stage = None
+        [(is_valid, next_stage)] = WorkflowStateMachine.validate_transitions(
+            [(recruitment_stage, candidate_action)])
 
         return {
             "currentStage": current_stage,
             "action": action,
             "isValid": is_valid,
             "nextStage": next_stage.value if next_stage else None,
-            "message": f"Valid transition to {next_stage.value}" if is_valid else "Invalid transition"
+            "message": f"Valid transition to {next_stage.value if next_stage else 'previous stage'}" if is_valid else "Invalid transition"
         }
     except HTTPException:
         raise
@@ -453,6 +467,32 @@ def validate_transition(current_stage: str, action: str):
             status_code=500, detail=f"Error validating transition: {str(e)}")
 
 
+@router.post("/validate-transitions")
+def validate_transitions(transitions: List[Dict[str, str]]):
+    """Validate many {currentStage, action} pairs in one call"""
+    try:
+        pairs = [(t.get("currentStage"), t.get("action")) for t in transitions]
+        results = WorkflowStateMachine.validate_transitions(pairs)
+
+        checked = [{
+            "currentStage": stage,
+            "action": action,
+            "isValid": is_valid,
+            "nextStage": next_stage.value if next_stage else None
+        } for (stage, action), (is_valid, next_stage) in zip(pairs, results)]
+        valid_count = sum(1 for is_valid, _ in results if is_valid)
+
+        return {
+            "total": len(checked),
+            "validCount": valid_count,
+            "invalidCount": len(checked) - valid_count,
+            "results": checked
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error validating transitions: {str(e)}")
+
+
 @router.get("/flow-diagram")
 def get_workflow_diagram():
     """Get workflow diagram data for visualization"""
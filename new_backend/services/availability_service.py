@@ -0,0 +1,277 @@
+"""
+Interviewer and room availability engine
+
+Each resource/day is a 48-bit bitmap of 30-minute slots packed into a uint64.
+Working hours come from interviewers.availability_pattern (or default room
+hours), date-specific overrides come from interviewer_availability /
+room_availability, and interview_schedules mark slots busy. Free/busy for
+every resource over a date range is then a handful of NumPy bitwise ops.
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from supabase_client import supabase
+from utils.slot_bitmap import SLOT_MINUTES, SLOTS_PER_DAY, slot_mask, mask_to_ranges, format_minutes
+from .scheduling_service import date_range, booking_interval, to_minutes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOM_HOURS = (9 * 60, 17 * 60)
+WEEKDAYS = ["monday", "tuesday", "wednesday",
+            "thursday", "friday", "saturday", "sunday"]
+
+
+class AvailabilityGrid:
+    """Per resource/day slot bitmaps for one resource type over a date range"""
+
+    def __init__(self, resource_type: str, resources: List[Dict[str, Any]], days: List[date]):
+        self.resource_type = resource_type
+        self.resources = resources
+        self.days = days
+        self.index = {resource["id"]: row for row, resource in enumerate(resources)}
+        self.day_index = {day.isoformat(): col for col, day in enumerate(days)}
+        shape = (len(resources), len(days))
+        self.available = np.zeros(shape, dtype=np.uint64)
+        self.blocked = np.zeros(shape, dtype=np.uint64)
+        self.busy = np.zeros(shape, dtype=np.uint64)
+
+    def free(self) -> np.ndarray:
+        return self.available & ~self.busy
+
+    def apply_overrides(self, overrides: List[Dict[str, Any]], id_field: str) -> None:
+        for override in overrides:
+            row = self.index.get(override.get(id_field))
+            col = self.day_index.get(str(override.get("date")))
+            if row is None or col is None:
+                continue
+            mask = np.uint64(slot_mask(to_minutes(override["start_time"]),
+                                       to_minutes(override["end_time"])))
+            if override.get("is_available", True):
+                self.available[row, col] |= mask
+                self.blocked[row, col] &= ~mask
+            else:
+                self.available[row, col] &= ~mask
+                self.blocked[row, col] |= mask
+
+    def mark_busy(self, bookings: List[Dict[str, Any]], id_field: str) -> None:
+        rows, cols, masks = [], [], []
+        for booking in bookings:
+            row = self.index.get(booking.get(id_field))
+            col = self.day_index.get(str(booking.get("scheduled_date")))
+            if row is None or col is None:
+                continue
+            rows.append(row)
+            cols.append(col)
+            masks.append(slot_mask(*booking_interval(booking)))
+        if rows:
+            np.bitwise_or.at(self.busy, (np.array(rows), np.array(cols)),
+                             np.array(masks, dtype=np.uint64))
+
+    def free_busy(self) -> List[Dict[str, Any]]:
+        """Free and busy time ranges per resource and day"""
+        free = self.free()
+        result = []
+        for row, resource in enumerate(self.resources):
+            days = []
+            for col, day in enumerate(self.days):
+                free_mask = int(free[row, col])
+                busy_mask = int(self.busy[row, col])
+                if not free_mask and not busy_mask:
+                    continue
+                days.append({
+                    "date": day.isoformat(),
+                    "day": day.strftime("%A"),
+                    "free": mask_to_ranges(free_mask),
+                    "busy": mask_to_ranges(busy_mask),
+                    "free_minutes": bin(free_mask).count("1") * SLOT_MINUTES
+                })
+            result.append({
+                f"{self.resource_type}_id": resource["id"],
+                "name": resource.get("name"),
+                "days": days
+            })
+        return result
+
+    def hourly_slots(self, resource_id: str) -> List[Dict[str, Any]]:
+        """Hourly slot view of one resource (the format the scheduling UI renders)"""
+        row = self.index[resource_id]
+        hour_slots = 60 // SLOT_MINUTES
+        result = []
+        for col, day in enumerate(self.days):
+            available = int(self.available[row, col])
+            blocked = int(self.blocked[row, col])
+            busy = int(self.busy[row, col])
+            slots = []
+            for hour in range(24):
+                mask = ((1 << hour_slots) - 1) << (hour * hour_slots)
+                if not (available | blocked | busy) & mask:
+                    continue
+                if busy & mask:
+                    status = "booked"
+                elif available & mask == mask:
+                    status = "available"
+                else:
+                    status = "unavailable"
+                slots.append({
+                    "time": f"{hour:02d}:00",
+                    "is_available": status == "available",
+                    "status": status
+                })
+            if slots:
+                result.append({
+                    "date": day.isoformat(),
+                    "day": day.strftime("%A"),
+                    "slots": slots
+                })
+        return result
+
+
+class AvailabilityService:
+    """Builds interviewer and room availability grids with one query per table"""
+
+    def load_bookings(self, start_date: date, end_date: date) -> List[Dict[str, Any]]:
+        result = supabase.table("interview_schedules").select(
+            "id, interviewer_id, room_id, scheduled_date, scheduled_time, duration_minutes"
+        ).eq("status", "scheduled").gte("scheduled_date", start_date.isoformat()).lte(
+            "scheduled_date", end_date.isoformat()).execute()
+        return result.data or []
+
+    def interviewer_grid(self, start_date: date, end_date: date,
+                         interviewer_ids: Optional[List[str]] = None,
+                         bookings: Optional[List[Dict[str, Any]]] = None) -> AvailabilityGrid:
+        query = supabase.table("interviewers").select(
+            "id, name, role, department, availability_pattern")
+        query = query.in_("id", interviewer_ids) if interviewer_ids else query.eq(
+            "is_active", True)
+        interviewers = query.order("name").execute().data or []
+
+        days = date_range(start_date, end_date)
+        grid = AvailabilityGrid("interviewer", interviewers, days)
+
+        # Weekly pattern -> (interviewers x 7) masks, expanded to days by fancy indexing
+        weekly = np.zeros((len(interviewers), 7), dtype=np.uint64)
+        for row, interviewer in enumerate(interviewers):
+            pattern = interviewer.get("availability_pattern") or {}
+            for weekday, name in enumerate(WEEKDAYS):
+                mask = 0
+                for slot_time in pattern.get(name, []):
+                    start = to_minutes(slot_time)
+                    mask |= slot_mask(start, start + 60)
+                weekly[row, weekday] = mask
+        if days:
+            grid.available[:] = weekly[:, [day.weekday() for day in days]]
+
+        if interviewers:
+            overrides = supabase.table("interviewer_availability").select("*").in_(
+                "interviewer_id", list(grid.index)).gte("date", start_date.isoformat()).lte(
+                "date", end_date.isoformat()).execute().data or []
+            grid.apply_overrides(overrides, "interviewer_id")
+
+        if bookings is None:
+            bookings = self.load_bookings(start_date, end_date)
+        grid.mark_busy(bookings, "interviewer_id")
+        return grid
+
+    def room_grid(self, start_date: date, end_date: date,
+                  room_ids: Optional[List[str]] = None,
+                  bookings: Optional[List[Dict[str, Any]]] = None) -> AvailabilityGrid:
+        query = supabase.table("rooms").select("id, name, type, capacity")
+        query = query.in_("id", room_ids) if room_ids else query.eq(
+            "is_active", True)
+        rooms = query.order("name").execute().data or []
+
+        grid = AvailabilityGrid("room", rooms, date_range(start_date, end_date))
+        grid.available[:] = np.uint64(slot_mask(*DEFAULT_ROOM_HOURS))
+
+        if rooms:
+            overrides = supabase.table("room_availability").select("*").in_(
+                "room_id", list(grid.index)).gte("date", start_date.isoformat()).lte(
+                "date", end_date.isoformat()).execute().data or []
+            grid.apply_overrides(overrides, "room_id")
+
+        if bookings is None:
+            bookings = self.load_bookings(start_date, end_date)
+        grid.mark_busy(bookings, "room_id")
+        return grid
+
+    def free_busy(self, start_date: date, end_date: date,
+                  interviewer_ids: Optional[List[str]] = None,
+                  room_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Free/busy ranges for all (or the given) interviewers and rooms"""
+        bookings = self.load_bookings(start_date, end_date)
+        return {
+            "interviewers": self.interviewer_grid(start_date, end_date, interviewer_ids, bookings).free_busy(),
+            "rooms": self.room_grid(start_date, end_date, room_ids, bookings).free_busy(),
+            "slot_minutes": SLOT_MINUTES,
+            "date_range": {
+                "start": start_date.isoformat(),
+                "end": end_date.isoformat()
+            }
+        }
+
+    def common_slots(self, start_date: date, end_date: date, interviewer_ids: List[str],
+                     room_id: Optional[str] = None, duration_minutes: int = 60,
+                     limit: int = 20) -> Dict[str, Any]:
+        """Slots where every interviewer (and the room, if given) is free for the whole duration"""
+        bookings = self.load_bookings(start_date, end_date)
+        interviewers = self.interviewer_grid(
+            start_date, end_date, interviewer_ids, bookings)
+        missing = [i for i in interviewer_ids if i not in interviewers.index]
+        if missing:
+            return {"success": False, "error": f"Interviewers not found: {', '.join(missing)}"}
+
+        rows = [interviewers.index[i] for i in dict.fromkeys(interviewer_ids)]
+        free = np.bitwise_and.reduce(interviewers.free()[rows], axis=0)
+        busy = np.bitwise_or.reduce(interviewers.busy[rows], axis=0)
+
+        if room_id:
+            rooms = self.room_grid(start_date, end_date, [room_id], bookings)
+            if room_id not in rooms.index:
+                return {"success": False, "error": "Room not found"}
+            free &= rooms.free()[0]
+
+        # Bit i of `window` is set when slots i .. i+k-1 are all free
+        length = -(-duration_minutes // SLOT_MINUTES)
+        window = free.copy()
+        for shift in range(1, length):
+            window &= free >> np.uint64(shift)
+
+        slots = []
+        for col, day in enumerate(interviewers.days):
+            window_mask, free_mask = int(window[col]), int(free[col])
+            load = bin(int(busy[col])).count("1")
+            start = 0
+            while window_mask >> start:
+                if (window_mask >> start) & 1:
+                    end = start + length
+                    # Prefer slots that sit against existing commitments over ones
+                    # that split a free block in two
+                    snug = int(start == 0 or not (free_mask >> (start - 1)) & 1) + \
+                        int(end >= SLOTS_PER_DAY or not (free_mask >> end) & 1)
+                    slots.append({
+                        "date": day.isoformat(),
+                        "day": day.strftime("%A"),
+                        "start_time": format_minutes(start * SLOT_MINUTES),
+                        "end_time": format_minutes(start * SLOT_MINUTES + duration_minutes),
+                        "fit": snug,
+                        "participant_load_minutes": load * SLOT_MINUTES,
+                        "_rank": (col, -snug, load, start)
+                    })
+                start += 1
+
+        slots.sort(key=lambda slot: slot.pop("_rank"))
+        return {
+            "success": True,
+            "interviewer_ids": interviewer_ids,
+            "room_id": room_id,
+            "duration_minutes": duration_minutes,
+            "total_slots": len(slots),
+            "slots": [{"rank": rank, **slot} for rank, slot in enumerate(slots[:limit], start=1)]
+        }
+
+
+availability_service = AvailabilityService()
@@ -6,6 +6,8 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from fastapi import HTTPException, UploadFile
 from .base import BaseService
+from .matching_service import matching_service
+from .stage_history_service import stage_history_service
 from models import (
     Candidate, CandidateStatus, StageTransition, WorkflowAction
 )
@@ -133,6 +135,12 @@ class CandidateService(BaseService):
                     'ai_profile_summary': analysis['summary']
                 }).eq('id', candidate_id).execute()
 
+                # Keep profile_embedding in sync for similarity search
+                matching_service.backfill_candidate_embedding({
+                    'id': candidate_id,
+                    'ai_profile_summary': analysis['summary']
+                })
+
         except Exception as e:
             raise Exception(f"Error updating candidate analysis: {str(e)}")
 
@@ -141,7 +149,7 @@ class CandidateService(BaseService):
         try:
             result = self.db.table("candidates").select(
                 "*",
-                "candidate_files(id, file_type, file_url, file_name, uploaded_at)"
+                "candidate_files(id, file_type, file_category, file_url, file_name, uploaded_at, thumbnail_url)"
             ).eq("stage", stage).eq("status", "active").order("created_at", desc=True).execute()
 
             candidates = result.data if result.data else []
@@ -169,8 +177,8 @@ class CandidateService(BaseService):
                     "timezone": "Asia/Kuala_Lumpur",
                     "formatted_salary": f"RM {candidate.get('salary_expectations', 0):,.2f}" if candidate.get('salary_expectations') else "Not specified",
                     "formatted_phone": candidate.get("phone", "").replace("+60", "").strip() if candidate.get("phone") else "",
-                    "resume_files": [f for f in candidate.get("candidate_files", []) if f.get("file_type") == "resume"],
-                    "other_files": [f for f in candidate.get("candidate_files", []) if f.get("file_type") != "resume"]
+                    "resume_files": [f for f in candidate.get("candidate_files", []) if "resume" in (f.get("file_type"), f.get("file_category"))],
+                    "other_files": [f for f in candidate.get("candidate_files", []) if "resume" not in (f.get("file_type"), f.get("file_category"))]
                 }
                 formatted_candidates.append(formatted_candidate)
 
@@ -187,7 +195,7 @@ class CandidateService(BaseService):
             # Get candidate with related data
             result = self.db.table("candidates").select(
                 "*",
-                "candidate_files(id, file_type, file_url, file_name, uploaded_at)",
+                "candidate_files(id, file_type, file_category, file_url, file_name, uploaded_at, thumbnail_url)",
                 "candidate_stage_history(id, action, from_stage, to_stage, notes, performed_by, timestamp)"
             ).eq("id", candidate_id).single().execute()
 
@@ -228,8 +236,8 @@ class CandidateService(BaseService):
                 "timezone": "Asia/Kuala_Lumpur",
                 "formatted_salary": f"RM {candidate.get('salary_expectations', 0):,.2f}" if candidate.get('salary_expectations') else "Not specified",
                 "formatted_phone": candidate.get("phone", "").replace("+60", "").strip() if candidate.get("phone") else "",
-                "resume_files": [f for f in candidate.get("candidate_files", []) if f.get("file_type") == "resume"],
-                "other_files": [f for f in candidate.get("candidate_files", []) if f.get("file_type") != "resume"],
+                "resume_files": [f for f in candidate.get("candidate_files", []) if "resume" in (f.get("file_type"), f.get("file_category"))],
+                "other_files": [f for f in candidate.get("candidate_files", []) if "resume" not in (f.get("file_type"), f.get("file_category"))],
                 "stage_history": candidate.get("candidate_stage_history", []),
                 "events": [er.get("events") for er in candidate.get("event_registrations", []) if er.get("events")]
             })
@@ -329,73 +337,37 @@ class CandidateService(BaseService):
     def perform_action(self, candidate_id: str, action: CandidateAction, metadata: Optional[Dict] = None) -> Dict[str, Any]:
         """Perform a workflow action on a candidate"""
         try:
-            # Get current candidate state
-            candidate = self.get_candidate(candidate_id)
-            current_stage = RecruitmentStage(candidate["stage"])
-
-            # Determine new stage based on action
-            new_stage = self._get_next_stage(current_stage, action)
-
-            # Update candidate stage
-            if new_stage:
-                self.update_candidate(
-                    candidate_id, CandidateUpdate(stage=new_stage))
-
-            # Record the transition
-            transition = StageTransition(
-                candidateId=candidate_id,
-                fromStage=current_stage,
-                toStage=new_stage if new_stage else current_stage,
-                action=action,
-                performedBy="system",
-                timestamp=datetime.utcnow().isoformat()
-            )
-
-            # Store transition in stage history
-            self._record_stage_transition(transition)
+            # Validation, stage update and history insert run in one transaction
+            result = self.db.rpc("transition_candidate", {
+                "p_candidate_id": candidate_id,
+                "p_action": action.value,
+                "p_performed_by": (metadata or {}).get("performed_by", "system"),
+                "p_notes": (metadata or {}).get("notes")
+            }).execute().data or {}
+
+            if not result.get("success"):
+                status_code = 404 if result.get("error") == "not_found" else 409
+                raise HTTPException(status_code=status_code,
+                                    detail=result.get("message", "Transition failed"))
 
             return {
                 "success": True,
                 "message": f"Action {action.value} performed successfully",
-                "newStage": new_stage.value if new_stage else current_stage.value
+                "newStage": result["to_stage"],
+                "nextActions": result.get("next_actions", [])
             }
 
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(
                 f"Error performing action {action} on candidate {candidate_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
-    def _get_next_stage(self, current_stage: RecruitmentStage, action: CandidateAction) -> Optional[RecruitmentStage]:
-        """Determine the next stage based on current stage and action"""
-        stage_transitions = {
-            (RecruitmentStage.APPLIED, CandidateAction.SHORTLIST): RecruitmentStage.SCREENING,
-            (RecruitmentStage.APPLIED, CandidateAction.REJECT): RecruitmentStage.REJECTED,
-            (RecruitmentStage.SCREENING, CandidateAction.SCHEDULE_INTERVIEW): RecruitmentStage.INTERVIEW_SCHEDULED,
-            (RecruitmentStage.INTERVIEW_SCHEDULED, CandidateAction.START_INTERVIEW): RecruitmentStage.INTERVIEWING,
-            (RecruitmentStage.INTERVIEWING, CandidateAction.COMPLETE_INTERVIEW): RecruitmentStage.INTERVIEW_COMPLETED,
-            (RecruitmentStage.INTERVIEW_COMPLETED, CandidateAction.MOVE_TO_FINAL_REVIEW): RecruitmentStage.FINAL_REVIEW,
-            (RecruitmentStage.FINAL_REVIEW, CandidateAction.EXTEND_OFFER): RecruitmentStage.OFFER_EXTENDED,
-            (RecruitmentStage.OFFER_EXTENDED, CandidateAction.OFFER_ACCEPTED): RecruitmentStage.HIRED,
-            (RecruitmentStage.OFFER_EXTENDED, CandidateAction.OFFER_DECLINED): RecruitmentStage.REJECTED,
-        }
-
-        return stage_transitions.get((current_stage, action))
-
-    def _record_stage_transition(self, transition: StageTransition) -> None:
-        """Record a stage transition in the history"""
+    def get_stage_history(self, candidate_id: str, since: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the stage history for a candidate (hot window unless `since` is earlier)"""
         try:
-            self.db.table("candidate_stage_history").insert(
-                transition.dict()).execute()
-        except Exception as e:
-            logger.error(f"Error recording stage transition: {str(e)}")
-            # Don't raise exception as this is a non-critical operation
-
-    def get_stage_history(self, candidate_id: str) -> List[Dict[str, Any]]:
-        """Get the stage history for a candidate"""
-        try:
-            result = self.db.table("candidate_stage_history").select(
-                "*").eq("candidate_id", candidate_id).order("timestamp", desc=True).execute()
-            return result.data if result.data else []
+            return stage_history_service.query(candidate_id=candidate_id, since=since)
 
         except Exception as e:
             logger.error(
@@ -506,7 +478,7 @@ class CandidateService(BaseService):
                 # For applied candidates, include their files and initial AI analysis
                 query = query.select("""
                     *,
-                    candidate_files(id, file_type, file_url, file_name),
+                    candidate_files(id, file_type, file_category, file_url, file_name, thumbnail_url),
                     candidate_ai_analysis(analysis_json)
                 """)
 
@@ -0,0 +1,257 @@
+"""
+Duplicate candidate detection
+
+Keeps an in-memory MinHash/LSH index over normalized candidate identity
+(name, email, phone) and resume text so registrations can be checked for
+likely duplicates without scanning the candidates table.
+"""
+
+import re
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from supabase_client import supabase
+from utils.minhash import minhash_signature, band_keys, estimate_similarity
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity at which a candidate is reported as a duplicate
+PROFILE_THRESHOLD = 0.6
+RESUME_THRESHOLD = 0.7
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def normalize_email(email: Optional[str]) -> str:
+    if not email:
+        return ""
+    local, _, domain = email.strip().lower().partition("@")
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.split("+", 1)[0].replace(".", "")
+    return f"{local}@{domain}" if domain else local
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    digits = re.sub(r"\D", "", phone or "")
+    # Compare on the local part so "+6012..." and "012..." collide
+    if (phone or "").strip().startswith("+60"):
+        digits = digits[2:]
+    return digits.lstrip("0")
+
+
+def normalize_name(name: Optional[str]) -> str:
+    return " ".join(WORD_PATTERN.findall((name or "").lower()))
+
+
+def profile_shingles(name: str, email: str, phone: str) -> Set[str]:
+    shingles = set()
+    padded = f"  {name} "
+    shingles.update(f"n:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    if email:
+        shingles.add(f"e:{email}")
+        shingles.add(f"el:{email.split('@', 1)[0]}")
+    if phone:
+        shingles.add(f"p:{phone}")
+    return shingles
+
+
+def resume_shingles(text: Optional[str], size: int = 3) -> Set[str]:
+    words = WORD_PATTERN.findall((text or "").lower())
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class DuplicateDetectionService:
+    """Incrementally maintained LSH index for duplicate candidate lookups"""
+
+    PAGE_SIZE = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._loading = False
+        self._by_email: Dict[str, Set[str]] = defaultdict(set)
+        self._by_phone: Dict[str, Set[str]] = defaultdict(set)
+        self._buckets: Dict[tuple, Set[str]] = defaultdict(set)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def find_duplicates(self, candidate: Dict[str, Any], resume_text: Optional[str] = None,
+                        limit: int = 5) -> List[Dict[str, Any]]:
+        """Return likely duplicates of a candidate, best match first (none until the index is built)"""
+        if not self._loaded:
+            # Never build the index inside a request; warm() normally runs at startup
+            if not self._loading:
+                threading.Thread(target=self.warm, daemon=True).start()
+            logger.info("Duplicate index not built yet; skipping duplicate check")
+            return []
+        entry = self._build_entry(candidate, resume_text)
+
+        with self._lock:
+            return self._match(candidate, entry, limit)
+
+    def _match(self, candidate: Dict[str, Any], entry: Dict[str, Any],
+               limit: int) -> List[Dict[str, Any]]:
+        """Index lookup for find_duplicates; called with the lock held"""
+        matches: Dict[str, Set[str]] = defaultdict(set)
+        if entry["email"]:
+            for candidate_id in self._by_email.get(entry["email"], ()):
+                matches[candidate_id].add("email")
+        if entry["phone"]:
+            for candidate_id in self._by_phone.get(entry["phone"], ()):
+                matches[candidate_id].add("phone")
+
+        for kind in ("profile", "resume"):
+            signature = entry[kind]
+            if signature is None:
+                continue
+            for key in band_keys(signature):
+                for candidate_id in self._buckets.get((kind,) + key, ()):
+                    matches.setdefault(candidate_id, set())
+
+        results = []
+        for candidate_id, matched_on in matches.items():
+            existing = self._entries.get(candidate_id)
+            if existing is None or candidate_id == candidate.get("id"):
+                continue
+
+            profile_similarity = estimate_similarity(
+                entry["profile"], existing["profile"])
+            resume_similarity = estimate_similarity(
+                entry["resume"], existing["resume"])
+            if profile_similarity >= PROFILE_THRESHOLD:
+                matched_on.add("profile")
+            if resume_similarity >= RESUME_THRESHOLD:
+                matched_on.add("resume")
+            if not matched_on:
+                continue
+
+            score = 1.0 if matched_on & {"email", "phone"} else max(
+                profile_similarity, resume_similarity)
+            results.append({
+                "candidate_id": candidate_id,
+                "name": existing["name"],
+                "score": round(score, 3),
+                "profile_similarity": round(profile_similarity, 3),
+                "resume_similarity": round(resume_similarity, 3),
+                "matched_on": sorted(matched_on)
+            })
+
+        results.sort(key=lambda r: r["score"], reverse=True)
+        return results[:limit]
+
+    def add_candidate(self, candidate: Dict[str, Any], resume_text: Optional[str] = None) -> None:
+        """Index (or re-index) a candidate after it is created or updated"""
+        if not (self._loaded or self._loading):
+            return
+        with self._lock:
+            self._index(self._build_entry(candidate, resume_text))
+
+    def add_resume_text(self, candidate_id: str, resume_text: str) -> None:
+        """Attach resume text to an already indexed candidate"""
+        with self._lock:
+            existing = self._entries.get(candidate_id)
+            if existing is None:
+                return
+            self._unindex(candidate_id)
+            existing["resume"] = minhash_signature(
+                resume_shingles(resume_text))
+            self._index(existing)
+
+    def remove_candidate(self, candidate_id: str) -> None:
+        with self._lock:
+            self._unindex(candidate_id)
+
+    def warm(self) -> None:
+        """Build the index from the database; run in a startup or background task"""
+        with self._lock:
+            if self._loaded or self._loading:
+                return
+            self._loading = True
+        try:
+            self._load_index()
+            self._loaded = True
+        except Exception as e:
+            logger.error(f"Error building duplicate index: {str(e)}")
+        finally:
+            self._loading = False
+
+    def _load_index(self) -> None:
+        """
+        Build the index once from existing candidates and resume texts. The lock is
+        only held per page, so candidates added meanwhile are indexed as usual.
+        """
+        resumes = {}
+        start = 0
+        while True:
+            result = supabase.table("candidate_files").select("candidate_id, extracted_text").eq(
+                "file_category", "resume").not_.is_("extracted_text", "null").range(
+                start, start + self.PAGE_SIZE - 1).execute()
+            page = result.data or []
+            for row in page:
+                resumes[row["candidate_id"]] = row["extracted_text"]
+            if len(page) < self.PAGE_SIZE:
+                break
+            start += self.PAGE_SIZE
+
+        start = 0
+        while True:
+            result = supabase.table("candidates").select("id, name, email, phone").order(
+                "id").range(start, start + self.PAGE_SIZE - 1).execute()
+            page = result.data or []
+            entries = [self._build_entry(row, resumes.get(row["id"])) for row in page]
+            with self._lock:
+                for entry in entries:
+                    self._index(entry)
+            if len(page) < self.PAGE_SIZE:
+                break
+            start += self.PAGE_SIZE
+
+        logger.info(f"Duplicate index built for {len(self._entries)} candidates")
+
+    @staticmethod
+    def _build_entry(candidate: Dict[str, Any], resume_text: Optional[str]) -> Dict[str, Any]:
+        name = normalize_name(candidate.get("name"))
+        email = normalize_email(candidate.get("email"))
+        phone = normalize_phone(candidate.get("phone"))
+        return {
+            "id": candidate.get("id"),
+            "name": candidate.get("name"),
+            "email": email,
+            "phone": phone,
+            "profile": minhash_signature(profile_shingles(name, email, phone)),
+            "resume": minhash_signature(resume_shingles(resume_text))
+        }
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        candidate_id = entry["id"]
+        if not candidate_id:
+            return
+        self._unindex(candidate_id)
+        self._entries[candidate_id] = entry
+        if entry["email"]:
+            self._by_email[entry["email"]].add(candidate_id)
+        if entry["phone"]:
+            self._by_phone[entry["phone"]].add(candidate_id)
+        for kind in ("profile", "resume"):
+            if entry[kind] is not None:
+                for key in band_keys(entry[kind]):
+                    self._buckets[(kind,) + key].add(candidate_id)
+
+    def _unindex(self, candidate_id: str) -> None:
+        entry = self._entries.pop(candidate_id, None)
+        if entry is None:
+            return
+        self._by_email.get(entry["email"], set()).discard(candidate_id)
+        self._by_phone.get(entry["phone"], set()).discard(candidate_id)
+        for kind in ("profile", "resume"):
+            if entry[kind] is not None:
+                for key in band_keys(entry[kind]):
+                    bucket = self._buckets.get((kind,) + key)
+                    if bucket is not None:
+                        bucket.discard(candidate_id)
+                        if not bucket:
+                            del self._buckets[(kind,) + key]
+
+
+duplicate_detection_service = DuplicateDetectionService()
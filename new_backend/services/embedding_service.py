@@ -0,0 +1,59 @@
+import os
+import json
+import logging
+from typing import Any, List, Optional
+
+import google.generativeai as genai
+
+logger = logging.getLogger(__name__)
+
+# candidates.profile_embedding is VECTOR(1536)
+EMBEDDING_DIMENSIONS = 1536
+EMBEDDING_MODEL = "models/gemini-embedding-001"
+
+
+class EmbeddingService:
+    """Generates and parses profile embeddings stored in pgvector columns"""
+
+    def __init__(self):
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            logger.warning("GEMINI_API_KEY not found - embeddings disabled")
+            self.enabled = False
+            return
+
+        genai.configure(api_key=api_key)
+        self.enabled = True
+
+    def embed_text(self, text: str, task_type: str = "RETRIEVAL_DOCUMENT") -> Optional[List[float]]:
+        """Embed a piece of text, returning None when embeddings are unavailable"""
+        if not self.enabled or not text or not text.strip():
+            return None
+
+        try:
+            result = genai.embed_content(
+                model=EMBEDDING_MODEL,
+                content=text,
+                task_type=task_type,
+                output_dimensionality=EMBEDDING_DIMENSIONS
+            )
+            return result["embedding"]
+        except Exception as e:
+            logger.error(f"Error generating embedding: {str(e)}")
+            return None
+
+    @staticmethod
+    def parse_vector(value: Any) -> Optional[List[float]]:
+        """Parse a pgvector value as returned by PostgREST ("[0.1,0.2,...]")"""
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return value
+        try:
+            parsed = json.loads(value)
+            return parsed if isinstance(parsed, list) and parsed else None
+        except (TypeError, ValueError):
+            return None
+
+
+embedding_service = EmbeddingService()
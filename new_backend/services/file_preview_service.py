@@ -0,0 +1,96 @@
+"""
+Precomputed previews for candidate files
+
+When candidate_files rows are created, a background task downloads each
+original, renders a small JPEG of the first page (PDFs and images) and keeps
+the first few hundred characters of text. Thumbnails are stored in the same
+bucket under previews/, so candidate cards and the files tab load kilobytes
+instead of opening the full documents.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from supabase_client import supabase
+from utils.previews import render_preview
+from .text_extraction_service import text_extraction_service
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_CONCURRENCY = 2
+PREVIEW_PREFIX = "previews"
+# Columns the file endpoints return: previews instead of the full extracted text
+FILE_LIST_COLUMNS = ("id, candidate_id, file_type, file_url, file_name, file_size, file_category, "
+                     "uploaded_at, processing_status, thumbnail_url, preview_text, preview_status")
+
+
+def storage_location(file_record: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(bucket, path) of a file; older rows only have the public URL"""
+    if file_record.get("storage_bucket") and file_record.get("storage_path"):
+        return file_record["storage_bucket"], file_record["storage_path"]
+    marker = "/storage/v1/object/public/"
+    path = urlparse(file_record.get("file_url") or "").path
+    if marker not in path:
+        return None
+    bucket, _, object_path = path.split(marker, 1)[1].partition("/")
+    return (bucket, unquote(object_path)) if object_path else None
+
+
+class FilePreviewService:
+    """Renders and stores thumbnails and text previews for candidate_files rows"""
+
+    async def generate_many(self, file_records: List[Dict[str, Any]]) -> None:
+        """Background task: previews for freshly inserted rows"""
+        semaphore = asyncio.Semaphore(PREVIEW_CONCURRENCY)
+
+        async def generate(record: Dict[str, Any]) -> None:
+            async with semaphore:
+                await self.generate(record)
+
+        await asyncio.gather(*[generate(record) for record in file_records if record.get("id")])
+
+    async def generate(self, file_record: Dict[str, Any],
+                       content: Optional[bytes] = None) -> Dict[str, Any]:
+        """Render, store and record one file's preview; `content` skips the download"""
+        file_id = file_record["id"]
+        update: Dict[str, Any] = {"preview_status": "failed"}
+        try:
+            location = storage_location(file_record)
+            if not location:
+                raise ValueError("File has no storage location")
+            bucket, path = location
+            if content is None:
+                content = await asyncio.to_thread(supabase.storage.from_(bucket).download, path)
+
+            thumbnail, preview_text = await text_extraction_service.run(
+                render_preview, content, file_record.get("file_name") or path,
+                file_record.get("extracted_text"))
+
+            update = {"preview_text": preview_text, "preview_status": "processed"}
+            if thumbnail:
+                thumbnail_path = f"{PREVIEW_PREFIX}/{path}.jpg"
+                storage = supabase.storage.from_(bucket)
+                await asyncio.to_thread(
+                    storage.upload, thumbnail_path, thumbnail,
+                    {"content-type": "image/jpeg", "upsert": "true", "cache-control": "31536000"})
+                update["thumbnail_url"] = storage.get_public_url(thumbnail_path)
+        except Exception as e:
+            logger.error(f"Error generating preview for file {file_id}: {str(e)}")
+
+        await asyncio.to_thread(
+            lambda: supabase.table("candidate_files").update(update).eq("id", file_id).execute())
+        return update
+
+    async def backfill(self, limit: int = 100) -> Dict[str, int]:
+        """Previews for existing rows that never had one"""
+        rows = await asyncio.to_thread(
+            lambda: supabase.table("candidate_files").select(
+                "id, file_url, file_name, storage_bucket, storage_path, extracted_text").is_(
+                "preview_status", "null").limit(limit).execute().data or [])
+        await self.generate_many(rows)
+        return {"processed": len(rows)}
+
+
+file_preview_service = FilePreviewService()
@@ -0,0 +1,328 @@
+"""
+Live interview assistant
+
+Keeps a rolling window of recent utterances and a running summary per
+interview. Prompts carry only the summary, the utterances since the last
+suggestion and the interview context, so prompt size stays flat however long
+the interview runs. Suggestions stream token by token over SSE or the
+suggestions WebSocket; when a candidate finishes an answer, a fresh
+suggestion is pushed to every connected interviewer.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set
+
+import google.generativeai as genai
+from fastapi import WebSocket, WebSocketDisconnect
+
+from supabase_client import supabase
+from .transcript_stream_service import transcript_stream_service
+from .interview_summary_service import interview_summary_service, parse_json_response
+
+logger = logging.getLogger(__name__)
+
+WINDOW_UTTERANCES = 12
+SUMMARY_BATCH = 8
+MIN_DELTA_UTTERANCES = 4
+SUGGESTION_CONFIG = {"max_output_tokens": 256, "temperature": 0.4}
+
+
+def _format(utterances: List[Dict[str, Any]]) -> str:
+    return "\n".join(f"{u.get('speaker', 'unknown')}: {u.get('text', '')}" for u in utterances)
+
+
+def _is_candidate(utterance: Optional[Dict[str, Any]]) -> bool:
+    return bool(utterance) and str(utterance.get("speaker", "")).lower() == "candidate"
+
+
+class InterviewSession:
+    """Rolling transcript state for one live interview"""
+
+    def __init__(self, interview_id: str):
+        self.interview_id = interview_id
+        self.window: Deque[Dict[str, Any]] = deque()
+        self.evicted: List[Dict[str, Any]] = []
+        self.summary = ""
+        self.context: Optional[Dict[str, Any]] = None
+        self.observed = 0
+        self.last_prompted = 0
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.generation: Optional[asyncio.Task] = None
+        self.summarizing: Optional[asyncio.Task] = None
+
+
+class InterviewAssistantService:
+    """Incremental question suggestions and response analysis for live interviews"""
+
+    def __init__(self):
+        self.sessions: Dict[str, InterviewSession] = {}
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            logger.warning("GEMINI_API_KEY not found - interview assistant disabled")
+            self.model = None
+        else:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel('gemini-pro')
+        transcript_stream_service.subscribe(self.observe)
+
+    def session(self, interview_id: str) -> InterviewSession:
+        return self.sessions.setdefault(interview_id, InterviewSession(interview_id))
+
+    def observe(self, interview_id: str, utterance: Dict[str, Any]) -> None:
+        """Feed one utterance into the rolling window (called for every streamed utterance)"""
+        session = self.session(interview_id)
+        previous = session.window[-1] if session.window else None
+        session.observed += 1
+        session.window.append({**utterance, "_index": session.observed})
+        while len(session.window) > WINDOW_UTTERANCES:
+            session.evicted.append(session.window.popleft())
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if len(session.evicted) >= SUMMARY_BATCH and not session.summarizing:
+            session.summarizing = asyncio.create_task(self._fold_summary(session))
+
+        # The candidate finished an answer: push a fresh suggestion to interviewers
+        finished = utterance.get("end_of_answer") or (
+            _is_candidate(previous) and not _is_candidate(utterance))
+        if finished and session.subscribers:
+            self._start_push(session)
+
+    async def stream_suggestions(self, interview_id: str) -> AsyncIterator[str]:
+        """Stream the next suggested question(s) token by token"""
+        if not self.model:
+            raise Exception("Gemini AI not configured")
+        session = self.session(interview_id)
+        prompt = await self._suggestion_prompt(session)
+        async for chunk in self._stream(prompt):
+            yield chunk
+
+    async def sse(self, interview_id: str) -> AsyncIterator[str]:
+        """stream_suggestions framed as server-sent events, ending with a done event"""
+        try:
+            async for chunk in self.stream_suggestions(interview_id):
+                yield f"data: {json.dumps({'type': 'token', 'text': chunk})}\n\n"
+            yield f"data: {json.dumps({'type': 'done'})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming suggestions for interview {interview_id}: {str(e)}")
+            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+
+    async def suggest_questions(self, interview_id: str, transcript: Optional[List[Dict[str, Any]]] = None,
+                                context: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Non-streaming suggestions; a posted transcript seeds sessions that are not being streamed"""
+        session = self._seed(interview_id, transcript, context)
+        text = "".join([chunk async for chunk in self.stream_suggestions(session.interview_id)])
+        return [line.strip().lstrip("-*0123456789. ").strip()
+                for line in text.splitlines() if line.strip()]
+
+    async def analyze_response(self, interview_id: str, transcript: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Assess the candidate's latest answer: confidence, key points and flags"""
+        if not self.model:
+            raise Exception("Gemini AI not configured")
+        session = self._seed(interview_id, transcript)
+        latest = self._latest_exchange(session)
+        prompt = f"""
+        You are assisting an interviewer during a live interview.
+        Interview so far (summary): {session.summary or "Not yet summarized"}
+
+        Latest exchange:
+        {_format(latest)}
+
+        Assess the candidate's latest answer. Return only JSON:
+        {{"confidence": "number 0-1", "key_points": ["strings"], "flags": ["concerns or follow-ups, may be empty"]}}
+        """
+        text = await self._generate(prompt)
+        try:
+            analysis = parse_json_response(text)
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse response analysis: {text}")
+            return {"confidence": 0.0, "key_points": [], "flags": []}
+        return {
+            "confidence": float(analysis.get("confidence") or 0),
+            "key_points": analysis.get("key_points", []),
+            "flags": analysis.get("flags", [])
+        }
+
+    async def serve(self, websocket: WebSocket, interview_id: str) -> None:
+        """
+        Push suggestions to one interviewer.
+
+        Server messages: {"type": "token", "text"}, {"type": "done"}, {"type": "error", "message"}.
+        Client may send {"type": "suggest"} to ask for a suggestion immediately.
+        """
+        await websocket.accept()
+        session = self.session(interview_id)
+        queue: asyncio.Queue = asyncio.Queue()
+        session.subscribers.add(queue)
+
+        async def forward():
+            while True:
+                await websocket.send_json(await queue.get())
+
+        sender = asyncio.create_task(forward())
+        try:
+            while True:
+                message = await websocket.receive_json()
+                if message.get("type") == "suggest":
+                    self._start_push(session)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            session.subscribers.discard(queue)
+
+    def end_session(self, interview_id: str) -> Optional[InterviewSession]:
+        session = self.sessions.pop(interview_id, None)
+        if session and session.generation:
+            session.generation.cancel()
+        return session
+
+    def _seed(self, interview_id: str, transcript: Optional[List[Dict[str, Any]]],
+              context: Optional[Dict[str, Any]] = None) -> InterviewSession:
+        session = self.session(interview_id)
+        if context:
+            session.context = {**(session.context or {}), **context}
+        if transcript and not session.observed:
+            for utterance in transcript:
+                self.observe(interview_id, utterance)
+        return session
+
+    def _start_push(self, session: InterviewSession) -> None:
+        # A newer answer makes any in-flight suggestion stale
+        if session.generation and not session.generation.done():
+            session.generation.cancel()
+        session.generation = asyncio.create_task(self._push(session))
+
+    async def _push(self, session: InterviewSession) -> None:
+        def broadcast(message: Dict[str, Any]) -> None:
+            for queue in list(session.subscribers):
+                queue.put_nowait(message)
+        try:
+            async for chunk in self.stream_suggestions(session.interview_id):
+                broadcast({"type": "token", "text": chunk})
+            broadcast({"type": "done"})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming suggestions for interview {session.interview_id}: {str(e)}")
+            broadcast({"type": "error", "message": str(e)})
+
+    def _latest_exchange(self, session: InterviewSession) -> List[Dict[str, Any]]:
+        """Utterances since the last prompt (at least the last few for context)"""
+        delta = [u for u in session.window if u["_index"] > session.last_prompted]
+        if len(delta) < MIN_DELTA_UTTERANCES:
+            delta = list(session.window)[-MIN_DELTA_UTTERANCES:]
+        return delta
+
+    async def _suggestion_prompt(self, session: InterviewSession) -> str:
+        if session.context is None:
+            session.context = await asyncio.to_thread(self._load_context, session.interview_id)
+        delta = self._latest_exchange(session)
+        session.last_prompted = session.observed
+        context = session.context or {}
+        return f"""
+        You are assisting an interviewer during a live interview.
+        Role: {context.get('position') or 'Not specified'}
+        Candidate: {context.get('candidate_name') or 'Unknown'}, {context.get('current_position') or ''}
+        Interview type: {context.get('interview_type') or 'general'}
+
+        Interview so far (summary): {session.summary or "Just started"}
+
+        Latest exchange:
+        {_format(delta)}
+
+        Suggest 2-3 short follow-up questions the interviewer could ask next,
+        one per line, most useful first. No preamble.
+        """
+
+    async def _fold_summary(self, session: InterviewSession) -> None:
+        """Fold utterances that left the window into the running summary"""
+        try:
+            while len(session.evicted) >= SUMMARY_BATCH:
+                chunk = session.evicted[:SUMMARY_BATCH]
+                if self.model:
+                    folded = parse_json_response(await self._generate(f"""
+                    Running summary of an interview so far:
+                    {session.summary or "(empty)"}
+
+                    Next part of the transcript:
+                    {_format(chunk)}
+
+                    Return only JSON:
+                    {{"chunk_summary": "summary of just the new part, under 120 words",
+                      "running_summary": "the running summary rewritten to include the new part, under 200 words"}}
+                    Focus on the candidate's answers, evidence and open questions.
+                    """))
+                    session.summary = folded.get("running_summary") or session.summary
+                    await self._store_chunk(session.interview_id, chunk, folded.get("chunk_summary"))
+                del session.evicted[:SUMMARY_BATCH]
+        except Exception as e:
+            logger.error(f"Error updating running summary for interview {session.interview_id}: {str(e)}")
+        finally:
+            session.summarizing = None
+
+    @staticmethod
+    async def _store_chunk(interview_id: str, chunk: List[Dict[str, Any]], summary: Optional[str]) -> None:
+        """Persist the chunk summary so end-of-interview summarization can reuse it"""
+        first, last = chunk[0].get("sequence"), chunk[-1].get("sequence")
+        if not summary or first is None or last is None:
+            return
+        await asyncio.to_thread(interview_summary_service.store_chunk, interview_id, first, last, summary)
+
+    @staticmethod
+    def _load_context(interview_id: str) -> Dict[str, Any]:
+        try:
+            interview = supabase.table("interviews").select(
+                "candidate_id, interview_type, jobs(title)").eq("id", interview_id).execute().data
+            if not interview:
+                return {}
+            interview = interview[0]
+            candidate = supabase.table("candidates").select(
+                "name, current_position").eq("id", interview.get("candidate_id")).execute().data or [{}]
+            return {
+                "interview_type": interview.get("interview_type"),
+                "position": (interview.get("jobs") or {}).get("title"),
+                "candidate_name": candidate[0].get("name"),
+                "current_position": candidate[0].get("current_position")
+            }
+        except Exception as e:
+            logger.warning(f"Could not load context for interview {interview_id}: {str(e)}")
+            return {}
+
+    async def _generate(self, prompt: str) -> str:
+        response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+    async def _stream(self, prompt: str) -> AsyncIterator[str]:
+        """Bridge Gemini's blocking stream into async chunks as they arrive"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in self.model.generate_content(
+                        prompt, stream=True, generation_config=SUGGESTION_CONFIG):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        loop.run_in_executor(None, produce)
+        while True:
+            item = await queue.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+interview_assistant_service = InterviewAssistantService()
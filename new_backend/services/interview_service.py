@@ -1,10 +1,15 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+import uuid
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from models import Interview, InterviewCreate, InterviewUpdate, InterviewStatus, InterviewType, InterviewTranscript, InterviewAnalysis
 from supabase_client import supabase
 import logging
 from fastapi import HTTPException
 from .base import BaseService
+from .transcript_stream_service import transcript_stream_service
+from .interview_assistant_service import interview_assistant_service
+from .interview_summary_service import interview_summary_service
 
 logger = logging.getLogger(__name__)
 
@@ -65,9 +70,14 @@ class InterviewService(BaseService):
     def get_interview_by_id(interview_id: str) -> Optional[Dict[str, Any]]:
         """Get interview by ID"""
         try:
+            # notes is rendered from interview_notes (migration 020) for older clients
             result = supabase.table("interviews").select(
-                "*").eq("id", interview_id).execute()
-            return result.data[0] if result.data else None
+                "*, all_notes").eq("id", interview_id).execute()
+            if not result.data:
+                return None
+            interview = result.data[0]
+            interview["notes"] = interview.pop("all_notes", None) or interview.get("notes")
+            return interview
         except Exception as e:
             logger.error(f"Error fetching interview {interview_id}: {str(e)}")
             return None
@@ -186,17 +196,10 @@ class InterviewService(BaseService):
     def get_interviews_by_interviewer(interviewer_id: str) -> List[Dict[str, Any]]:
         """Get interviews by interviewer ID"""
         try:
-            result = supabase.table("interviews").select("*").execute()
-            interviews = result.data if result.data else []
-
-            # Filter by interviewer ID (since interviewer is stored as JSON)
-            filtered_interviews = []
-            for interview in interviews:
-                interviewer = interview.get("interviewer", {})
-                if interviewer.get("id") == interviewer_id:
-                    filtered_interviews.append(interview)
-
-            return filtered_interviews
+            # interviewer_ids is a GIN-indexed mirror of the interviewer column
+            result = supabase.table("interviews").select("*").contains(
+                "interviewer_ids", [interviewer_id]).order("date", desc=True).execute()
+            return result.data if result.data else []
         except Exception as e:
             logger.error(
                 f"Error fetching interviews by interviewer {interviewer_id}: {str(e)}")
@@ -382,33 +385,19 @@ class InterviewService(BaseService):
     def add_interview_note(interview_id: str, note_text: str, author: str = "system") -> Dict[str, Any]:
         """Add a note to an interview"""
         try:
-            # Get current interview
-            interview = InterviewService.get_interview_by_id(interview_id)
-            if not interview:
-                return {
-                    "success": False,
-                    "error": "Interview not found"
-                }
-
-            # Add note to existing notes or create new notes field
-            notes = interview.get("notes", "")
-            new_notes = f"{notes}\n\n[{datetime.utcnow().isoformat()}] {author}: {note_text}"
-
-            update_dict = {
-                "notes": new_notes,
-                "updated_by": author,
-                "updated_at": datetime.utcnow().isoformat()
-            }
-
-            result = supabase.table("interviews").update(
-                update_dict).eq("id", interview_id).execute()
+            # One append-only insert: no read of the interview, no lost concurrent notes
+            result = supabase.table("interview_notes").insert({
+                "interview_id": interview_id,
+                "author": author,
+                "note": note_text
+            }).execute()
 
             if result.data:
                 logger.info(f"Note added to interview: {interview_id}")
                 return {
                     "success": True,
                     "message": "Note added successfully",
-                    "interview": result.data[0]
+                    "note": result.data[0]
                 }
             else:
                 return {
@@ -417,6 +406,12 @@ class InterviewService(BaseService):
                 }
 
         except Exception as e:
+            # 23503: foreign key violation, the interview does not exist
+            if getattr(e, "code", None) == "23503":
+                return {
+                    "success": False,
+                    "error": "Interview not found"
+                }
             logger.error(
                 f"Error adding note to interview {interview_id}: {str(e)}")
             return {
@@ -424,6 +419,37 @@ class InterviewService(BaseService):
                 "error": f"Error adding note: {str(e)}"
             }
 
+    @staticmethod
+    def get_interview_notes(interview_id: str, limit: int = 50,
+                            after: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """Notes on an interview, oldest first, paged by (created_at, id)"""
+        query = supabase.table("interview_notes").select(
+            "*").eq("interview_id", interview_id)
+        if after:
+            # Interpolated into a PostgREST filter; raises ValueError on a malformed cursor
+            created_at = datetime.fromisoformat(after[0].replace("Z", "+00:00")).isoformat()
+            note_id = str(uuid.UUID(after[1]))
+            query = query.or_(
+                f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{note_id})')
+        result = query.order("created_at").order("id").limit(limit).execute()
+        return result.data if result.data else []
+
+    @staticmethod
+    def search_interviews(query: str, limit: int = 20, offset: int = 0,
+                          sources: Optional[List[str]] = None,
+                          candidate_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ranked full-text matches over transcripts, notes and evaluations (migration 021)"""
+        params = {
+            "p_query": query,
+            "p_limit": limit,
+            "p_offset": offset,
+            "p_candidate_id": candidate_id
+        }
+        if sources:
+            params["p_sources"] = sources
+        result = supabase.rpc("search_interviews", params).execute()
+        return result.data if result.data else []
+
     @staticmethod
     def get_interview_analytics() -> Dict[str, Any]:
         """Get interview analytics"""
@@ -473,27 +499,23 @@ class InterviewService(BaseService):
     def get_interview_availability(date: str, interviewer_id: Optional[str] = None) -> Dict[str, Any]:
         """Get interview availability for a specific date"""
         try:
-            # Get interviews for the specified date
-            result = supabase.table("interviews").select(
-                "*").eq("date", date).execute()
-            interviews = result.data if result.data else []
-
-            # Filter by interviewer if specified
+            # Get active interviews for the specified date (and interviewer)
+            query = supabase.table("interviews").select(
+                "id, time, duration_minutes, status").eq("date", date).in_(
+                "status", ["scheduled", "in-progress"])
             if interviewer_id:
-                interviews = [i for i in interviews if i.get(
-                    "interviewer", {}).get("id") == interviewer_id]
+                query = query.contains("interviewer_ids", [interviewer_id])
+            result = query.execute()
+            interviews = result.data if result.data else []
 
             # Calculate availability (assuming 9 AM to 5 PM with 1-hour slots)
             booked_slots = []
             for interview in interviews:
-                if interview.get("status") in ["scheduled", "in-progress"]:
-                    time = interview.get("time", "")
-                    duration = interview.get("duration_minutes", 60)
-                    booked_slots.append({
-                        "time": time,
-                        "duration": duration,
-                        "interview_id": interview.get("id")
-                    })
+                booked_slots.append({
+                    "time": interview.get("time", ""),
+                    "duration": interview.get("duration_minutes", 60),
+                    "interview_id": interview.get("id")
+                })
 
             return {
                 "date": date,
@@ -523,42 +545,54 @@ class InterviewService(BaseService):
     async def update_transcript(self, interview_id: str, transcript_data: Dict) -> Dict:
         """Update interview transcript in real-time"""
         try:
-            # Store transcript update
-            transcript = await self.db.table('interview_transcripts').insert({
-                "interview_id": interview_id,
-                "speaker": transcript_data["speaker"],
-                "text": transcript_data["text"],
-                "timestamp": datetime.utcnow().isoformat()
-            }).execute()
-            return {"status": "success", "data": transcript.data[0] if transcript.data else None}
+            # Store transcript update (live sessions should use the WebSocket stream)
+            rows = await transcript_stream_service.write(interview_id, [transcript_data])
+            return {"status": "success", "data": rows[0] if rows else None}
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def get_suggested_questions(self, transcript: List[Dict], context: Dict) -> List[str]:
+    async def get_suggested_questions(self, interview_id: str, transcript: List[Dict], context: Dict) -> List[str]:
         """Generate suggested questions based on transcript and context"""
         try:
-            # TODO: Implement AI question generation
-            return []
+            # Live sessions stream via /questions/stream; this returns the same suggestions whole
+            return await interview_assistant_service.suggest_questions(interview_id, transcript, context)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def analyze_response(self, transcript: List[Dict]) -> Dict:
+    async def analyze_response(self, interview_id: str, transcript: List[Dict]) -> Dict:
         """Analyze interview responses in real-time"""
         try:
-            # TODO: Implement AI analysis
-            return {}
+            return await interview_assistant_service.analyze_response(interview_id, transcript)
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
     async def end_interview(self, interview_id: str, summary: Dict) -> Dict:
         """End interview and save final summary"""
         try:
-            # Update interview status and save summary
-            interview = await self.db.table('interviews').update({
-                "end_time": datetime.utcnow().isoformat(),
-                "status": InterviewStatus.COMPLETED,
-                "summary": summary
-            }).eq("id", interview_id).execute()
+            # Buffered live utterances must be persisted before summarizing
+            await transcript_stream_service.flush(interview_id)
+            interview_assistant_service.end_session(interview_id)
+            generated = interview_summary_service.pop_unsaved(interview_id)
+            if generated is None:
+                try:
+                    generated = await interview_summary_service.summarize(interview_id)
+                except Exception as e:
+                    logger.error(f"Error summarizing interview {interview_id}: {str(e)}")
+                    generated = {}
+
+            # Fields posted by the interviewer take precedence over generated ones
+            try:
+                interview = await asyncio.to_thread(
+                    lambda: supabase.table('interviews').update({
+                        "end_time": datetime.utcnow().isoformat(),
+                        "status": InterviewStatus.COMPLETED,
+                        "summary": {**generated, **(summary or {})}
+                    }).eq("id", interview_id).execute())
+            except Exception:
+                # A retried end_interview saves this instead of summarizing again
+                if generated:
+                    interview_summary_service.keep_unsaved(interview_id, generated)
+                raise
             return {"status": "success", "data": interview.data[0] if interview.data else None}
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
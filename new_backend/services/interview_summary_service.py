@@ -0,0 +1,215 @@
+"""
+End-of-interview summarization
+
+Long transcripts do not fit one prompt, so summaries are built map-reduce
+style: the transcript is split into chunks, chunks are summarized in parallel
+(at most MAP_CONCURRENCY requests at a time), and the chunk summaries are
+reduced into the final structured summary. Chunks already summarized by the
+live assistant during the interview are read back from
+interview_transcript_chunks instead of being summarized again, so usually
+only the last few minutes need a map call.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional
+
+import google.generativeai as genai
+
+from supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+CHUNK_CHARS = 8000
+REDUCE_CHARS = 12000
+MAP_CONCURRENCY = 4
+PAGE_SIZE = 1000
+
+
+def parse_json_response(text: str) -> Any:
+    """json.loads after stripping the ```json fences Gemini tends to add"""
+    text = text.strip()
+    if text.startswith('```json'):
+        text = text[7:-3]
+    elif text.startswith('```'):
+        text = text[3:-3]
+    return json.loads(text)
+
+
+def _format(rows: List[Dict[str, Any]]) -> str:
+    return "\n".join(f"{row.get('speaker', 'unknown')}: {row.get('text', '')}" for row in rows)
+
+
+class InterviewSummaryService:
+    """Map-reduce summaries of interview transcripts"""
+
+    def __init__(self):
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            logger.warning("GEMINI_API_KEY not found - interview summaries disabled")
+            self.model = None
+        else:
+            genai.configure(api_key=api_key)
+            self.model = genai.GenerativeModel('gemini-pro')
+        # Summaries whose interview update failed, so a retry does not summarize again
+        self._unsaved: Dict[str, Dict[str, Any]] = {}
+
+    def keep_unsaved(self, interview_id: str, summary: Dict[str, Any]) -> None:
+        self._unsaved[interview_id] = summary
+
+    def pop_unsaved(self, interview_id: str) -> Optional[Dict[str, Any]]:
+        return self._unsaved.pop(interview_id, None)
+
+    async def summarize(self, interview_id: str) -> Dict[str, Any]:
+        """Structured summary of the whole interview"""
+        if not self.model:
+            raise Exception("Gemini AI not configured")
+        rows, chunks = await asyncio.gather(
+            asyncio.to_thread(self._load_transcript, interview_id),
+            asyncio.to_thread(self._load_chunks, interview_id))
+        if not rows:
+            return {"overview": "No transcript recorded", "strengths": [], "concerns": [],
+                    "key_points": [], "recommendation": None, "confidence": 0.0}
+
+        semaphore = asyncio.Semaphore(MAP_CONCURRENCY)
+        plan = self._plan(rows, chunks)
+        pending = [item for item in plan if not isinstance(item, str)]
+        logger.info(
+            f"Summarizing interview {interview_id}: {len(rows)} utterances, "
+            f"{len(plan) - len(pending)} reused chunk summaries, {len(pending)} to summarize")
+
+        mapped = iter(await asyncio.gather(*[self._map(interview_id, rows, semaphore) for rows in pending]))
+        summaries = [item if isinstance(item, str) else next(mapped) for item in plan]
+        return await self._reduce(summaries, semaphore)
+
+    def store_chunk(self, interview_id: str, first_sequence: int, last_sequence: int, summary: str) -> None:
+        """Keep a chunk summary for reuse at the end of the interview"""
+        supabase.table("interview_transcript_chunks").upsert({
+            "interview_id": interview_id,
+            "first_sequence": first_sequence,
+            "last_sequence": last_sequence,
+            "summary": summary
+        }, on_conflict="interview_id,first_sequence").execute()
+
+    def _plan(self, rows: List[Dict[str, Any]], chunks: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Transcript order as a list of reusable summaries (str) and row chunks
+        still to summarize (list of rows, at most CHUNK_CHARS of text each).
+        """
+        plan: List[Any] = []
+        pending: List[Dict[str, Any]] = []
+        pending_chars = 0
+        chunk_index, reused_index = 0, -1
+        for row in rows:
+            sequence = row.get("sequence")
+            while chunk_index < len(chunks) and sequence is not None \
+                    and chunks[chunk_index]["last_sequence"] < sequence:
+                chunk_index += 1
+            chunk = chunks[chunk_index] if chunk_index < len(chunks) else None
+            if chunk and sequence is not None and chunk["first_sequence"] <= sequence:
+                if pending:
+                    plan.append(pending)
+                    pending, pending_chars = [], 0
+                if reused_index != chunk_index:
+                    plan.append(chunk["summary"])
+                    reused_index = chunk_index
+                continue
+            size = len(row.get("text") or "")
+            if pending and pending_chars + size > CHUNK_CHARS:
+                plan.append(pending)
+                pending, pending_chars = [], 0
+            pending.append(row)
+            pending_chars += size
+        if pending:
+            plan.append(pending)
+        return plan
+
+    async def _map(self, interview_id: str, rows: List[Dict[str, Any]], semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            summary = (await self._generate(f"""
+            Summarize this part of an interview transcript in under 120 words.
+            Focus on what the candidate said: skills, evidence, concerns and open questions.
+
+            {_format(rows)}
+            """)).strip()
+
+        first, last = rows[0].get("sequence"), rows[-1].get("sequence")
+        if first is not None and last is not None:
+            try:
+                await asyncio.to_thread(self.store_chunk, interview_id, first, last, summary)
+            except Exception as e:
+                logger.warning(f"Could not store chunk summary for interview {interview_id}: {str(e)}")
+        return summary
+
+    async def _reduce(self, summaries: List[str], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        # Too many chunk summaries for one prompt: combine them in groups first
+        while len(summaries) > 1 and sum(len(s) for s in summaries) > REDUCE_CHARS:
+            groups, group, size = [], [], 0
+            for summary in summaries:
+                if group and size + len(summary) > REDUCE_CHARS:
+                    groups.append(group)
+                    group, size = [], 0
+                group.append(summary)
+                size += len(summary)
+            groups.append(group)
+            if len(groups) == len(summaries):
+                break
+            summaries = list(await asyncio.gather(*[self._combine(g, semaphore) for g in groups]))
+
+        parts = "\n\n".join(f"Part {i + 1}:\n{s}" for i, s in enumerate(summaries))
+        text = await self._generate(f"""
+        Below are summaries of consecutive parts of one interview, in order.
+        Write the final interview summary. Return only JSON:
+        {{
+            "overview": "3-5 sentence summary of the interview",
+            "strengths": ["strings"],
+            "concerns": ["strings"],
+            "key_points": ["strings"],
+            "recommendation": "strong_hire, hire, no_hire or strong_no_hire",
+            "confidence": "number 0-1"
+        }}
+
+        {parts}
+        """)
+        try:
+            summary = parse_json_response(text)
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse interview summary: {text}")
+            return {"overview": text.strip(), "strengths": [], "concerns": [],
+                    "key_points": [], "recommendation": None, "confidence": 0.0}
+        summary["confidence"] = float(summary.get("confidence") or 0)
+        return summary
+
+    async def _combine(self, summaries: List[str], semaphore: asyncio.Semaphore) -> str:
+        async with semaphore:
+            return (await self._generate(
+                "Combine these consecutive interview summaries into one summary under 200 words, "
+                "keeping concrete evidence and concerns:\n\n" + "\n\n".join(summaries))).strip()
+
+    async def _generate(self, prompt: str) -> str:
+        response = await asyncio.to_thread(self.model.generate_content, prompt)
+        return response.text
+
+    @staticmethod
+    def _load_transcript(interview_id: str) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        while True:
+            page = supabase.table("interview_transcripts").select(
+                "sequence, speaker, text, timestamp").eq("interview_id", interview_id).order(
+                "sequence").order("timestamp").range(
+                len(rows), len(rows) + PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                return rows
+
+    @staticmethod
+    def _load_chunks(interview_id: str) -> List[Dict[str, Any]]:
+        result = supabase.table("interview_transcript_chunks").select(
+            "first_sequence, last_sequence, summary").eq(
+            "interview_id", interview_id).order("first_sequence").execute()
+        return result.data or []
+
+
+interview_summary_service = InterviewSummaryService()
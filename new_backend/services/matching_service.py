@@ -0,0 +1,343 @@
+"""
+Candidate-to-job matching service
+
+Scores every candidate against a job in one vectorized NumPy pass, combining
+profile embedding similarity with skill, experience and education features,
+and returns a top-k shortlist.
+"""
+
+import re
+import heapq
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from supabase_client import supabase
+from .embedding_service import embedding_service
+
+logger = logging.getLogger(__name__)
+
+EDUCATION_LEVELS = {
+    "high school": 1,
+    "diploma": 2,
+    "associate": 2,
+    "bachelor": 3,
+    "degree": 3,
+    "master": 4,
+    "phd": 5,
+    "doctor": 5
+}
+
+# Relative weight of each feature in the final score
+MATCH_WEIGHTS = np.array([0.40, 0.35, 0.15, 0.10], dtype=np.float32)
+MATCH_COMPONENTS = ["embedding", "skills", "experience", "education"]
+
+YEARS_PATTERN = re.compile(r"(\d+)\s*\+?\s*(?:years?|yrs?)", re.IGNORECASE)
+
+
+def education_level(text: Optional[str]) -> int:
+    """Map free-text education to an ordinal level (0 when unknown)"""
+    if not text:
+        return 0
+    text = text.lower()
+    return max((level for edu, level in EDUCATION_LEVELS.items() if edu in text), default=0)
+
+
+def normalize_skill(skill: Any) -> str:
+    return str(skill).strip().lower()
+
+
+class CandidateFeatures(NamedTuple):
+    updated_at: Optional[str]
+    embedding: Optional[np.ndarray]  # unit-normalized float32
+    skills: frozenset
+    years_experience: float
+    education_level: int
+
+
+class JobProfile(NamedTuple):
+    updated_at: Optional[str]
+    embedding: Optional[np.ndarray]
+    skills: List[str]
+    required_years: float
+    required_education: int
+
+
+class MatchingService:
+    """Ranks candidates for a job using cached per-candidate feature vectors"""
+
+    CANDIDATE_FIELDS = "id, name, email, phone, stage, status, current_position, skills, years_experience, education, updated_at"
+    PAGE_SIZE = 1000
+    EMBEDDING_BATCH_SIZE = 200
+    MAX_CACHED_CANDIDATES = 10000
+
+    def __init__(self):
+        self._feature_cache: "OrderedDict[str, CandidateFeatures]" = OrderedDict()
+        self._job_cache: Dict[str, JobProfile] = {}
+
+    def rank_candidates_for_job(self, job_id: str, top_k: int = 20, stage: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Score all active candidates against a job and return the top-k shortlist"""
+        job_result = supabase.table("jobs").select(
+            "*").eq("id", job_id).execute()
+        if not job_result.data:
+            return None
+
+        job_profile = self._get_job_profile(job_result.data[0])
+        candidates = self._fetch_candidates(stage)
+        if not candidates:
+            return {
+                "job_id": job_id,
+                "total_candidates": 0,
+                "shortlist": []
+            }
+
+        features = self._get_candidate_features(candidates)
+        scores, components = self.score_candidates(features, job_profile)
+
+        top_indices = heapq.nlargest(
+            top_k, range(len(scores)), key=scores.__getitem__)
+
+        job_skills = set(job_profile.skills)
+        shortlist = []
+        for rank, index in enumerate(top_indices, start=1):
+            candidate = candidates[index]
+            shortlist.append({
+                "rank": rank,
+                "candidate_id": candidate["id"],
+                "name": candidate.get("name"),
+                "email": candidate.get("email"),
+                "stage": candidate.get("stage"),
+                "current_position": candidate.get("current_position"),
+                "score": round(float(scores[index]) * 100, 2),
+                "components": {
+                    name: round(float(components[index, i]) * 100, 2)
+                    for i, name in enumerate(MATCH_COMPONENTS)
+                },
+                "matched_skills": sorted(features[index].skills & job_skills)
+            })
+
+        return {
+            "job_id": job_id,
+            "total_candidates": len(candidates),
+            "shortlist": shortlist
+        }
+
+    @staticmethod
+    def score_candidates(features: List[CandidateFeatures], job: JobProfile):
+        """Vectorized scoring; returns (scores, per-component matrix) in [0, 1]"""
+        n = len(features)
+        components = np.zeros((n, len(MATCH_COMPONENTS)), dtype=np.float32)
+        available = np.zeros_like(components)
+
+        # Embedding cosine similarity (vectors are pre-normalized)
+        if job.embedding is not None:
+            dim = job.embedding.shape[0]
+            has_embedding = np.array(
+                [f.embedding is not None and f.embedding.shape[0] == dim for f in features])
+            if has_embedding.any():
+                matrix = np.zeros((n, dim), dtype=np.float32)
+                matrix[has_embedding] = np.stack(
+                    [f.embedding for f, ok in zip(features, has_embedding) if ok])
+                components[:, 0] = np.clip(matrix @ job.embedding, 0.0, 1.0)
+                available[:, 0] = has_embedding
+
+        # Normalized skill overlap against the job's skill vocabulary
+        if job.skills:
+            vocabulary = {skill: i for i, skill in enumerate(job.skills)}
+            rows, cols = [], []
+            for row, f in enumerate(features):
+                for skill in f.skills:
+                    col = vocabulary.get(skill)
+                    if col is not None:
+                        rows.append(row)
+                        cols.append(col)
+            skill_matrix = np.zeros((n, len(vocabulary)), dtype=np.float32)
+            skill_matrix[rows, cols] = 1.0
+            components[:, 1] = skill_matrix.sum(axis=1) / len(vocabulary)
+            available[:, 1] = 1.0
+
+        if job.required_years > 0:
+            years = np.fromiter(
+                (f.years_experience for f in features), dtype=np.float32, count=n)
+            components[:, 2] = np.minimum(years / job.required_years, 1.0)
+            available[:, 2] = 1.0
+
+        if job.required_education > 0:
+            levels = np.fromiter(
+                (f.education_level for f in features), dtype=np.float32, count=n)
+            components[:, 3] = np.minimum(
+                levels / job.required_education, 1.0)
+            available[:, 3] = 1.0
+
+        # Re-normalize weights per candidate over the features that apply
+        weights = available * MATCH_WEIGHTS
+        total_weight = weights.sum(axis=1)
+        scores = np.divide((components * weights).sum(axis=1), total_weight,
+                           out=np.zeros(n, dtype=np.float32), where=total_weight > 0)
+        return scores, components
+
+    def find_similar_candidates(self, candidate_id: str, limit: int = 10, stage: Optional[str] = None,
+                                event_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Nearest-neighbour lookup over stored profile embeddings (no LLM call when embedded)"""
+        result = supabase.table("candidates").select(
+            "id, name, ai_profile_summary, profile_embedding").eq("id", candidate_id).execute()
+        if not result.data:
+            return None
+
+        candidate = result.data[0]
+        embedding = embedding_service.parse_vector(
+            candidate.get("profile_embedding"))
+        if embedding is None:
+            embedding = self.backfill_candidate_embedding(candidate)
+        if embedding is None:
+            return {
+                "candidate_id": candidate_id,
+                "similar_candidates": [],
+                "message": "Candidate has no profile summary to compare"
+            }
+
+        matches = supabase.rpc("match_similar_candidates", {
+            "query_embedding": embedding,
+            "exclude_candidate_id": candidate_id,
+            "match_count": limit,
+            "filter_stage": stage,
+            "filter_event_id": event_id
+        }).execute()
+
+        return {
+            "candidate_id": candidate_id,
+            "similar_candidates": [
+                {**match, "similarity": round(float(match["similarity"]) * 100, 2)}
+                for match in matches.data or []
+            ]
+        }
+
+    def backfill_candidate_embedding(self, candidate: Dict[str, Any]) -> Optional[List[float]]:
+        """Embed a candidate's ai_profile_summary and persist it to profile_embedding"""
+        embedding = embedding_service.embed_text(
+            candidate.get("ai_profile_summary") or "")
+        if embedding is None:
+            return None
+
+        supabase.table("candidates").update({
+            "profile_embedding": embedding
+        }).eq("id", candidate["id"]).execute()
+        self.invalidate_candidate(candidate["id"])
+        return embedding
+
+    def backfill_missing_embeddings(self, limit: int = 100) -> Dict[str, int]:
+        """Embed summaries for candidates that do not have a profile embedding yet"""
+        result = supabase.table("candidates").select("id, ai_profile_summary").is_(
+            "profile_embedding", "null").not_.is_("ai_profile_summary", "null").limit(limit).execute()
+
+        rows = result.data or []
+        embedded = sum(
+            1 for row in rows if self.backfill_candidate_embedding(row) is not None)
+        return {"processed": len(rows), "embedded": embedded}
+
+    def invalidate_candidate(self, candidate_id: str) -> None:
+        self._feature_cache.pop(candidate_id, None)
+
+    def _fetch_candidates(self, stage: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Fetch lightweight candidate rows (no embeddings) page by page"""
+        candidates = []
+        start = 0
+        while True:
+            query = supabase.table("candidates").select(
+                self.CANDIDATE_FIELDS).eq("status", "active")
+            if stage:
+                query = query.eq("stage", stage)
+            result = query.order("id").range(
+                start, start + self.PAGE_SIZE - 1).execute()
+            page = result.data or []
+            candidates.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return candidates
+            start += self.PAGE_SIZE
+
+    def _get_candidate_features(self, candidates: List[Dict[str, Any]]) -> List[CandidateFeatures]:
+        """Return cached features, loading embeddings only for new or updated candidates"""
+        stale_ids = [
+            c["id"] for c in candidates
+            if c["id"] not in self._feature_cache
+            or self._feature_cache[c["id"]].updated_at != c.get("updated_at")
+        ]
+        embeddings = self._fetch_embeddings(stale_ids) if stale_ids else {}
+
+        features = []
+        for candidate in candidates:
+            candidate_id = candidate["id"]
+            if candidate_id in embeddings or candidate_id not in self._feature_cache:
+                self._feature_cache[candidate_id] = self._build_features(
+                    candidate, embeddings.get(candidate_id))
+            self._feature_cache.move_to_end(candidate_id)
+            features.append(self._feature_cache[candidate_id])
+
+        while len(self._feature_cache) > self.MAX_CACHED_CANDIDATES:
+            self._feature_cache.popitem(last=False)
+
+        return features
+
+    def _fetch_embeddings(self, candidate_ids: List[str]) -> Dict[str, Any]:
+        embeddings = {}
+        for i in range(0, len(candidate_ids), self.EMBEDDING_BATCH_SIZE):
+            batch = candidate_ids[i:i + self.EMBEDDING_BATCH_SIZE]
+            result = supabase.table("candidates").select(
+                "id, profile_embedding").in_("id", batch).execute()
+            for row in result.data or []:
+                embeddings[row["id"]] = row.get("profile_embedding")
+        return embeddings
+
+    @staticmethod
+    def _build_features(candidate: Dict[str, Any], raw_embedding: Any) -> CandidateFeatures:
+        return CandidateFeatures(
+            updated_at=candidate.get("updated_at"),
+            embedding=_unit_vector(embedding_service.parse_vector(raw_embedding)),
+            skills=frozenset(normalize_skill(s)
+                             for s in (candidate.get("skills") or []) if s),
+            years_experience=float(candidate.get("years_experience") or 0),
+            education_level=education_level(candidate.get("education"))
+        )
+
+    def _get_job_profile(self, job: Dict[str, Any]) -> JobProfile:
+        cached = self._job_cache.get(job["id"])
+        if cached and cached.updated_at == job.get("updated_at"):
+            return cached
+
+        requirements = job.get("requirements") or []
+        skills = job.get("skills_required") or requirements
+        requirement_text = " ".join(
+            [job.get("experience") or "", job.get("experience_level") or ""] + list(requirements))
+
+        years = [int(match) for match in YEARS_PATTERN.findall(requirement_text)]
+        job_text = "\n".join(filter(None, [
+            job.get("title"),
+            job.get("description"),
+            ", ".join(requirements)
+        ]))
+
+        profile = JobProfile(
+            updated_at=job.get("updated_at"),
+            embedding=_unit_vector(embedding_service.embed_text(
+                job_text, task_type="RETRIEVAL_QUERY")),
+            skills=list(dict.fromkeys(normalize_skill(s) for s in skills if s)),
+            required_years=float(min(years)) if years else 0.0,
+            required_education=education_level(" ".join(requirements))
+        )
+        # A failed embedding (e.g. a transient Gemini error) is retried next time
+        if profile.embedding is not None:
+            self._job_cache[job["id"]] = profile
+        return profile
+
+
+def _unit_vector(values: Optional[List[float]]) -> Optional[np.ndarray]:
+    if values is None or len(values) == 0:
+        return None
+    vector = np.asarray(values, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else None
+
+
+matching_service = MatchingService()
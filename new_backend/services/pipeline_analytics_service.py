@@ -0,0 +1,199 @@
+"""
+Incremental pipeline analytics
+
+Consumes candidate_stage_history rows past a persisted watermark and folds
+each stage exit into a per-stage dwell-time histogram (plus a time-to-hire
+histogram). State lives in pipeline_analytics_state, so dashboard reads are
+one row and O(#stages) quantile lookups regardless of history size. Refreshes
+run in the background; each batch commits its watermark and candidate cursors
+in one transaction (commit_pipeline_analytics_batch). Only rows older than a
+settle lag are consumed, so a transaction that commits after the watermark has
+passed its timestamp is not skipped.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from supabase_client import supabase
+from utils.histogram import LogHistogram
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "stage_dwell"
+BATCH_SIZE = 1000
+SECONDS_PER_DAY = 86400
+# History timestamps are transaction start times (or set by an app server), so
+# rows can become visible out of timestamp order; leave recent ones to settle
+SETTLE_SECONDS = 300
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _days(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds / SECONDS_PER_DAY, 2) if seconds is not None else None
+
+
+def _describe(histogram: LogHistogram) -> Dict[str, Any]:
+    return {
+        "count": histogram.count,
+        "mean_days": _days(histogram.mean()),
+        "median_days": _days(histogram.quantile(0.5)),
+        "p90_days": _days(histogram.quantile(0.9)),
+        "max_days": _days(histogram.max)
+    }
+
+
+class PipelineAnalyticsService:
+    """Maintains dwell-time and time-to-hire distributions from the history stream"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def refresh(self, max_batches: int = 10) -> int:
+        """Consume new history rows; returns how many were processed"""
+        processed = 0
+        # A refresh already running will pick up the new rows too
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            for _ in range(max_batches):
+                consumed = self._process_batch()
+                processed += consumed
+                if consumed < BATCH_SIZE:
+                    break
+        except Exception as e:
+            logger.error(f"Error refreshing pipeline analytics: {str(e)}")
+        finally:
+            self._lock.release()
+        return processed
+
+    def _load_state(self) -> Dict[str, Any]:
+        result = supabase.table("pipeline_analytics_state").select(
+            "*").eq("name", STATE_NAME).execute()
+        return result.data[0] if result.data else {"name": STATE_NAME, "version": 0}
+
+    def _process_batch(self) -> int:
+        state = self._load_state()
+
+        settled = datetime.now(timezone.utc) - timedelta(seconds=SETTLE_SECONDS)
+        query = supabase.table("candidate_stage_history").select(
+            "id, candidate_id, from_stage, to_stage, timestamp").lt(
+            "timestamp", settled.isoformat())
+        if state.get("last_timestamp"):
+            # Keyset on (timestamp, id) so ties at the watermark are not skipped or repeated
+            last_ts, last_id = state["last_timestamp"], state["last_history_id"]
+            query = query.or_(
+                f'timestamp.gt."{last_ts}",and(timestamp.eq."{last_ts}",id.gt.{last_id})')
+        rows = query.order("timestamp").order("id").limit(BATCH_SIZE).execute().data or []
+        if not rows:
+            return 0
+
+        time_in_stage = {stage: LogHistogram.from_dict(data)
+                         for stage, data in (state.get("time_in_stage") or {}).items()}
+        time_to_hire = LogHistogram.from_dict(state.get("time_to_hire"))
+        cursors = self._load_cursors({row["candidate_id"] for row in rows})
+        touched = set()
+
+        for row in rows:
+            from_stage, to_stage = row.get("from_stage"), row.get("to_stage")
+            if not to_stage or from_stage == to_stage:
+                continue  # Actions that do not move the candidate
+            at = _parse_timestamp(row["timestamp"])
+            cursor = cursors.get(row["candidate_id"])
+            if cursor and cursor["entered_at"] and at < cursor["entered_at"]:
+                continue  # Already folded in by an earlier run
+
+            if cursor and cursor["entered_at"]:
+                stage = from_stage or cursor["stage"]
+                time_in_stage.setdefault(stage, LogHistogram()).add(
+                    (at - cursor["entered_at"]).total_seconds())
+            applied_at = cursor["applied_at"] if cursor else None
+            if to_stage == "hired" and applied_at:
+                time_to_hire.add((at - applied_at).total_seconds())
+
+            cursors[row["candidate_id"]] = {
+                "stage": to_stage, "entered_at": at, "applied_at": applied_at}
+            touched.add(row["candidate_id"])
+
+        last = rows[-1]
+        claimed = supabase.rpc("commit_pipeline_analytics_batch", {
+            "p_name": STATE_NAME,
+            "p_version": state.get("version", 0),
+            "p_last_timestamp": last["timestamp"],
+            "p_last_history_id": last["id"],
+            "p_time_in_stage": {stage: h.to_dict() for stage, h in time_in_stage.items()},
+            "p_time_to_hire": time_to_hire.to_dict(),
+            # Deleted candidates still have history; the function skips their cursors
+            "p_cursors": [{
+                "candidate_id": candidate_id,
+                "stage": cursors[candidate_id]["stage"],
+                "entered_at": cursors[candidate_id]["entered_at"].isoformat(),
+                "applied_at": cursors[candidate_id]["applied_at"].isoformat()
+                if cursors[candidate_id]["applied_at"] else None
+            } for candidate_id in touched]
+        }).execute()
+        if not claimed.data:
+            # Another worker advanced the watermark first; its result wins
+            logger.info("Pipeline analytics batch superseded by another worker")
+            return 0
+
+        logger.info(f"Pipeline analytics consumed {len(rows)} history rows")
+        return len(rows)
+
+    def _load_cursors(self, candidate_ids: set) -> Dict[str, Dict[str, Any]]:
+        """Open stage intervals for these candidates; new candidates start at created_at"""
+        ids = list(candidate_ids)
+        cursors = {}
+        for row in supabase.table("candidate_stage_cursors").select("*").in_(
+                "candidate_id", ids).execute().data or []:
+            cursors[row["candidate_id"]] = {
+                "stage": row["stage"],
+                "entered_at": _parse_timestamp(row["entered_at"]),
+                "applied_at": _parse_timestamp(row.get("applied_at"))
+            }
+
+        missing = [i for i in ids if i not in cursors]
+        if missing:
+            for row in supabase.table("candidates").select("id, created_at").in_(
+                    "id", missing).execute().data or []:
+                created_at = _parse_timestamp(row.get("created_at"))
+                cursors[row["id"]] = {
+                    "stage": "applied", "entered_at": created_at, "applied_at": created_at}
+        return cursors
+
+    def time_in_stage(self) -> Dict[str, Any]:
+        """Dwell-time and time-to-hire summaries from the persisted histograms"""
+        state = self._load_state()
+        stages = {stage: _describe(LogHistogram.from_dict(data))
+                  for stage, data in (state.get("time_in_stage") or {}).items()}
+        return {
+            "time_in_stage": stages,
+            "time_to_hire": _describe(LogHistogram.from_dict(state.get("time_to_hire"))),
+            "as_of": state.get("last_timestamp")
+        }
+
+    @staticmethod
+    def dwell_bottlenecks(time_in_stage: Dict[str, Any], factor: float = 2.0) -> List[Dict[str, Any]]:
+        """Stages whose median dwell is well above the typical stage median"""
+        medians = sorted(s["median_days"] for s in time_in_stage.values()
+                         if s["median_days"] is not None)
+        if len(medians) < 2:
+            return []
+        typical = medians[len(medians) // 2]
+        return [{
+            "stage": stage,
+            "median_days": stats["median_days"],
+            "p90_days": stats["p90_days"],
+            "issue": "Candidates wait much longer in this stage than in others"
+        } for stage, stats in time_in_stage.items()
+            if stats["median_days"] is not None and typical and stats["median_days"] > factor * typical]
+
+
+pipeline_analytics_service = PipelineAnalyticsService()
@@ -0,0 +1,243 @@
+"""
+Cascading reschedule planner
+
+When an interviewer is deactivated or blocks time with an availability
+override, finds their affected bookings and moves each one to an equivalent
+interviewer at the same time, or failing that to the nearest free slot.
+Plans are built against the in-memory availability grids (so moves never
+collide with each other). A preview carries a plan_token (an HMAC of the
+moves under a server secret); applying takes the previewed moves back and
+commits exactly those in one transaction (apply_interview_moves), failing if
+any booking or slot changed meanwhile.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from supabase_client import supabase
+from utils.slot_bitmap import format_minutes
+from .availability_service import (
+    availability_service, AvailabilityGrid, SLOT_MINUTES, slot_mask
+)
+from .scheduling_service import booking_interval, is_booking_conflict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZON_DAYS = 30
+DEFAULT_SEARCH_DAYS = 7
+# Without a configured secret, tokens are only valid until the server restarts
+PLAN_TOKEN_SECRET = (os.getenv("RESCHEDULE_PLAN_SECRET") or secrets.token_hex(32)).encode()
+
+
+class StalePlanError(Exception):
+    """The previewed plan no longer matches the schedule"""
+
+    def __init__(self, message: str, interview_ids: Optional[List[str]] = None):
+        super().__init__(message)
+        self.interview_ids = interview_ids or []
+
+
+def plan_token(interviewer_id: str, moves: List[Dict[str, Any]]) -> str:
+    """Signature of a plan's moves, so apply can tell it got the previewed plan unedited"""
+    payload = json.dumps([interviewer_id, moves], sort_keys=True, default=str).encode()
+    return hmac.new(PLAN_TOKEN_SECRET, payload, hashlib.sha256).hexdigest()
+
+
+class ReschedulePlanner:
+    """Plans and applies moves for bookings an interviewer can no longer attend"""
+
+    def plan(self, interviewer_id: str, start_date: Optional[date] = None,
+             end_date: Optional[date] = None,
+             search_days: int = DEFAULT_SEARCH_DAYS) -> Optional[Dict[str, Any]]:
+        start_date = start_date or date.today()
+        end_date = end_date or start_date + timedelta(days=DEFAULT_HORIZON_DAYS)
+
+        target = supabase.table("interviewers").select(
+            "id, name, role, department, is_active").eq("id", interviewer_id).execute()
+        if not target.data:
+            return None
+        target = target.data[0]
+
+        search_end = end_date + timedelta(days=search_days)
+        bookings = availability_service.load_bookings(start_date, search_end)
+        interviewers = availability_service.interviewer_grid(
+            start_date, search_end, bookings=bookings)
+        rooms = availability_service.room_grid(
+            start_date, search_end, bookings=bookings)
+
+        affected = self._affected_bookings(
+            target, interviewers, bookings, end_date)
+        equivalents = self._equivalent_interviewers(target, interviewers)
+
+        moves, unresolved = [], []
+        for booking in affected:
+            move = self._same_time_swap(booking, equivalents, interviewers) or \
+                self._nearest_slot(booking, target, equivalents, interviewers, rooms, search_days)
+            if move is None:
+                unresolved.append(self._describe(booking))
+                continue
+            self._reserve(move, interviewers, rooms)
+            moves.append(move)
+
+        return {
+            "interviewer_id": interviewer_id,
+            "interviewer_active": target.get("is_active", True),
+            "affected": len(affected),
+            "moves": moves,
+            "unresolved": unresolved,
+            "plan_token": plan_token(interviewer_id, moves),
+            "applied": False
+        }
+
+    def apply(self, interviewer_id: str, moves: List[Dict[str, Any]], token: str) -> Dict[str, Any]:
+        """Commit previewed moves as-is; raises StalePlanError if the schedule changed"""
+        if not hmac.compare_digest(token, plan_token(interviewer_id, moves)):
+            raise ValueError("Moves do not match the previewed plan")
+        if any(move["old_interviewer_id"] != interviewer_id for move in moves):
+            raise ValueError("Plan contains interviews of another interviewer")
+        if not moves:
+            return {"interviewer_id": interviewer_id, "moves": [], "applied": False}
+
+        try:
+            outcome = supabase.rpc("apply_interview_moves", {"p_moves": moves}).execute().data or {}
+        except Exception as e:
+            # A booking that raced the function's checks trips the overlap constraints
+            if is_booking_conflict(e):
+                raise StalePlanError("Some new slots were booked since the preview")
+            raise
+        if not outcome.get("success"):
+            raise StalePlanError(outcome.get("message", "Reschedule failed"),
+                                 outcome.get("interview_ids"))
+        logger.info(
+            f"Rescheduled {outcome.get('applied')} interviews for interviewer {interviewer_id}")
+        return {"interviewer_id": interviewer_id, "moves": moves, "applied": True}
+
+    @staticmethod
+    def _affected_bookings(target: Dict[str, Any], interviewers: AvailabilityGrid,
+                           bookings: List[Dict[str, Any]], end_date: date) -> List[Dict[str, Any]]:
+        """Bookings on an inactive interviewer or overlapping time they blocked out"""
+        own = [b for b in bookings
+               if b.get("interviewer_id") == target["id"] and str(b["scheduled_date"]) <= end_date.isoformat()]
+        row = interviewers.index.get(target["id"])
+        if not target.get("is_active", True) or row is None:
+            return own
+
+        affected = []
+        for booking in own:
+            col = interviewers.day_index[str(booking["scheduled_date"])]
+            if int(interviewers.blocked[row, col]) & slot_mask(*booking_interval(booking)):
+                affected.append(booking)
+        return affected
+
+    @staticmethod
+    def _equivalent_interviewers(target: Dict[str, Any], interviewers: AvailabilityGrid) -> List[str]:
+        """Active interviewers in the same department (or with the same role when no department)"""
+        key = "department" if target.get("department") else "role"
+        return [r["id"] for r in interviewers.resources
+                if r["id"] != target["id"] and r.get(key) == target.get(key)]
+
+    def _same_time_swap(self, booking: Dict[str, Any], equivalents: List[str],
+                        interviewers: AvailabilityGrid) -> Optional[Dict[str, Any]]:
+        start, end = booking_interval(booking)
+        mask = slot_mask(start, end)
+        col = interviewers.day_index[str(booking["scheduled_date"])]
+        free = interviewers.free()[:, col]
+
+        options = [i for i in equivalents if int(free[interviewers.index[i]]) & mask == mask]
+        if not options:
+            return None
+        # Least loaded interviewer that day
+        best = min(options, key=lambda i: bin(
+            int(interviewers.busy[interviewers.index[i], col])).count("1"))
+        return self._move(booking, best, str(booking["scheduled_date"]), start, "reassigned")
+
+    def _nearest_slot(self, booking: Dict[str, Any], target: Dict[str, Any], equivalents: List[str],
+                      interviewers: AvailabilityGrid, rooms: AvailabilityGrid,
+                      search_days: int) -> Optional[Dict[str, Any]]:
+        start, end = booking_interval(booking)
+        length = -(-(end - start) // SLOT_MINUTES)
+        original_slot = start // SLOT_MINUTES
+        people = ([target["id"]] if target.get("is_active", True) and target["id"] in interviewers.index else []) + equivalents
+        rows = [interviewers.index[i] for i in people]
+        if not rows:
+            return None
+
+        room_row = rooms.index.get(booking.get("room_id"))
+        base_col = interviewers.day_index[str(booking["scheduled_date"])]
+        interviewer_free = interviewers.free()
+        room_free = rooms.free()
+
+        for col in range(base_col, min(base_col + search_days + 1, len(interviewers.days))):
+            free = interviewer_free[rows, col]
+            if room_row is not None:
+                free = free & room_free[room_row, col]
+            window = free.copy()
+            for shift in range(1, length):
+                window &= free >> np.uint64(shift)
+
+            best: Optional[Tuple[int, int, int]] = None  # (distance, slot, row index)
+            for position, mask in enumerate(int(w) for w in window):
+                slot = 0
+                while mask >> slot:
+                    if (mask >> slot) & 1:
+                        candidate = (abs(slot - original_slot), slot, position)
+                        if best is None or candidate < best:
+                            best = candidate
+                    slot += 1
+            if best is not None:
+                _, slot, position = best
+                reason = "moved" if people[position] == booking["interviewer_id"] else "reassigned_and_moved"
+                return self._move(booking, people[position], interviewers.days[col].isoformat(),
+                                  slot * SLOT_MINUTES, reason)
+        return None
+
+    @staticmethod
+    def _move(booking: Dict[str, Any], interviewer_id: str, new_date: str, start: int,
+              reason: str) -> Dict[str, Any]:
+        original_start, original_end = booking_interval(booking)
+        return {
+            "interview_id": booking["id"],
+            "reason": reason,
+            "old_interviewer_id": booking["interviewer_id"],
+            "new_interviewer_id": interviewer_id,
+            "room_id": booking.get("room_id"),
+            "old_date": str(booking["scheduled_date"]),
+            "old_time": format_minutes(original_start),
+            "new_date": new_date,
+            "new_time": format_minutes(start),
+            "duration_minutes": original_end - original_start
+        }
+
+    @staticmethod
+    def _reserve(move: Dict[str, Any], interviewers: AvailabilityGrid, rooms: AvailabilityGrid) -> None:
+        """Mark the new slot busy so later moves in the same plan cannot reuse it"""
+        booking = {
+            "interviewer_id": move["new_interviewer_id"],
+            "room_id": move["room_id"],
+            "scheduled_date": move["new_date"],
+            "scheduled_time": move["new_time"],
+            "duration_minutes": move["duration_minutes"]
+        }
+        interviewers.mark_busy([booking], "interviewer_id")
+        rooms.mark_busy([booking], "room_id")
+
+    @staticmethod
+    def _describe(booking: Dict[str, Any]) -> Dict[str, Any]:
+        start, end = booking_interval(booking)
+        return {
+            "interview_id": booking["id"],
+            "scheduled_date": str(booking["scheduled_date"]),
+            "start_time": format_minutes(start),
+            "end_time": format_minutes(end)
+        }
+
+
+reschedule_planner = ReschedulePlanner()
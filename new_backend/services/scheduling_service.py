@@ -0,0 +1,542 @@
+"""
+Interview scheduling service
+
+Detects booking conflicts with true time-range overlap (taking
+duration_minutes into account) using one interval tree per interviewer and
+per room for each day. A booking that runs past midnight is also entered in
+the next day's tree. A day's bookings are loaded in a single query.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from supabase_client import supabase
+from utils.interval_tree import IntervalTree
+from utils.slot_bitmap import format_minutes
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DURATION_MINUTES = 60
+MINUTES_PER_DAY = 24 * 60
+
+ResourceKey = Tuple[str, str, str]  # (resource type, resource id, ISO date)
+
+
+def to_minutes(value: Union[str, time]) -> int:
+    """Minutes since midnight for a time or "HH:MM[:SS]" string"""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    hours, minutes = str(value).split(":")[:2]
+    return int(hours) * 60 + int(minutes)
+
+
+def _iso(value: Union[str, date]) -> str:
+    return value.isoformat() if isinstance(value, date) else str(value)
+
+
+def is_booking_conflict(error: Exception) -> bool:
+    """Whether a database error is an overlapping booking (migration 026 constraints, 011 check)"""
+    message = str(error)
+    return "23P01" in message or "exclusion" in message or "conflicts with an existing booking" in message
+
+
+def booking_interval(booking: Dict[str, Any]) -> Tuple[int, int]:
+    start = to_minutes(booking["scheduled_time"])
+    duration = booking.get("duration_minutes") or DEFAULT_DURATION_MINUTES
+    return start, start + int(duration)
+
+
+def day_segments(day: Union[str, date], start: int, end: int) -> List[Tuple[str, int, int]]:
+    """(ISO date, start, end) pieces of an interval, split at midnight"""
+    day = date.fromisoformat(_iso(day))
+    segments = []
+    while end > start:
+        segments.append((day.isoformat(), start, min(end, MINUTES_PER_DAY)))
+        day += timedelta(days=1)
+        start, end = 0, end - MINUTES_PER_DAY
+    return segments
+
+
+class ScheduleBook:
+    """Interval trees of scheduled interviews keyed by (resource, id, date)"""
+
+    def __init__(self):
+        self._trees: Dict[ResourceKey, IntervalTree] = defaultdict(IntervalTree)
+
+    def add(self, booking: Dict[str, Any]) -> None:
+        for resource, resource_id in self._resources(booking):
+            for day, start, end in day_segments(booking["scheduled_date"], *booking_interval(booking)):
+                self._trees[(resource, resource_id, day)].add(start, end, booking)
+
+    def conflicts(self, booking: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Existing bookings that overlap the proposed booking's interviewer or room"""
+        found, seen = [], set()
+        for resource, resource_id in self._resources(booking):
+            for day, start, end in day_segments(booking["scheduled_date"], *booking_interval(booking)):
+                tree = self._trees.get((resource, resource_id, day))
+                if tree is None:
+                    continue
+                for _, _, other in tree.search(start, end):
+                    if booking.get("id") and other.get("id") == booking.get("id"):
+                        continue
+                    # A booking across midnight can overlap in both of its days
+                    if (resource, id(other)) in seen:
+                        continue
+                    seen.add((resource, id(other)))
+                    other_start, other_end = booking_interval(other)
+                    found.append({
+                        "resource": resource,
+                        "resource_id": resource_id,
+                        "interview_id": other.get("id"),
+                        "candidate_id": other.get("candidate_id"),
+                        "scheduled_date": _iso(other["scheduled_date"]),
+                        "start_time": format_minutes(other_start),
+                        "end_time": format_minutes(other_end % MINUTES_PER_DAY)
+                    })
+        return found
+
+    def is_free(self, resource: str, resource_id: str, day: str, start: int, end: int) -> bool:
+        for segment_day, segment_start, segment_end in day_segments(day, start, end):
+            tree = self._trees.get((resource, resource_id, segment_day))
+            if tree is not None and tree.overlaps(segment_start, segment_end):
+                return False
+        return True
+
+    def bookings_for(self, resource: str, resource_id: str, day: str) -> List[Dict[str, Any]]:
+        tree = self._trees.get((resource, resource_id, day))
+        return [value for _, _, value in tree.search(0, 24 * 60)] if tree else []
+
+    @staticmethod
+    def _resources(booking: Dict[str, Any]) -> List[Tuple[str, str]]:
+        resources = [("interviewer", booking["interviewer_id"])]
+        if booking.get("room_id"):
+            resources.append(("room", booking["room_id"]))
+        return resources
+
+
+def date_range(start: date, end: date) -> List[date]:
+    return [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+
+
+def apply_overrides(starts: List[int], overrides: List[Dict[str, Any]], duration: int) -> List[int]:
+    """
+    Slot start minutes for one interviewer/day after date-specific overrides:
+    available windows add back-to-back slots, unavailable windows remove every
+    slot they overlap.
+    """
+    starts = set(starts)
+    for override in overrides:
+        if override.get("is_available", True):
+            window_start, window_end = to_minutes(override["start_time"]), to_minutes(override["end_time"])
+            starts.update(range(window_start, window_end - duration + 1, duration))
+    for override in overrides:
+        if not override.get("is_available", True):
+            block_start, block_end = to_minutes(override["start_time"]), to_minutes(override["end_time"])
+            starts = {start for start in starts if start + duration <= block_start or block_end <= start}
+    return sorted(starts)
+
+
+class AutoScheduler:
+    """
+    Greedy assignment of (candidate, interview type) tasks to interviewer slots,
+    followed by local search that repairs unassigned tasks by relocating a
+    blocking assignment and evens out interviewer load.
+    """
+
+    MAX_BALANCE_MOVES = 1000
+
+    def __init__(self, book: ScheduleBook, slots: List[Tuple[str, int, int, str]],
+                 rooms: List[Dict[str, Any]], eligible: Dict[str, List[str]]):
+        self.book = book
+        self.rooms = rooms
+        self.eligible = eligible  # interview type -> interviewer ids
+        self.assignments: Dict[int, Dict[str, Any]] = {}
+        self.load: Dict[str, int] = defaultdict(int)
+        self._busy: Dict[ResourceKey, Dict[int, Tuple[int, int]]] = defaultdict(dict)
+        # Free room per (day, start, end); interviewers share slot times so this is reused heavily
+        self._room_cache: Dict[Tuple[str, int, int], Union[str, None, bool]] = {}
+        self._slots_by_type: Dict[str, List[Tuple[str, int, int, str]]] = {}
+        for interview_type, interviewer_ids in eligible.items():
+            allowed = set(interviewer_ids)
+            self._slots_by_type[interview_type] = [slot for slot in slots if slot[3] in allowed]
+        for slot in slots:
+            self.load.setdefault(slot[3], 0)
+
+    def solve(self, tasks: List[Tuple[str, str]]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # Most constrained interview types first
+        order = sorted(range(len(tasks)), key=lambda i: len(
+            self.eligible.get(tasks[i][1], [])))
+        unassigned = []
+        # Types with no free interviewer/room slot left; greedy placement only
+        # adds assignments, so every later task of such a type fails the same way
+        exhausted = set()
+        for i in order:
+            interview_type = tasks[i][1]
+            if interview_type in exhausted or not self._place(i, tasks[i]):
+                unassigned.append(i)
+                if interview_type not in exhausted and not self._open_slots(interview_type):
+                    exhausted.add(interview_type)
+
+        still_unassigned = []
+        open_slots = {t: self._open_slots(t) for t in self.eligible}
+        for i in unassigned:
+            # Nowhere to move a blocker to, so no single move can help any task
+            if any(open_slots.values()) and self._repair(i, tasks[i], open_slots):
+                open_slots = {t: self._open_slots(t) for t in self.eligible}
+            else:
+                still_unassigned.append(i)
+        unassigned = still_unassigned
+        self._balance()
+
+        assignments = [self.assignments[i] for i in sorted(self.assignments)]
+        missing = [{"candidate_id": tasks[i][0], "interview_type": tasks[i][1]}
+                   for i in sorted(unassigned)]
+        return assignments, missing
+
+    def _candidate_slots(self, interview_type: str) -> List[Tuple[str, int, int, str]]:
+        """Slots for an interview type, least loaded interviewers first"""
+        return sorted(self._slots_by_type.get(interview_type, []),
+                      key=lambda slot: (self.load[slot[3]], slot[0], slot[1]))
+
+    def _place(self, index: int, task: Tuple[str, str],
+               slots: Optional[List[Tuple[str, int, int, str]]] = None,
+               exclude: Optional[Tuple] = None) -> bool:
+        for slot in slots if slots is not None else self._candidate_slots(task[1]):
+            if slot == exclude:
+                continue
+            room_id = self._feasible(task[0], slot)
+            if room_id is not False:
+                self._assign(index, task, slot, room_id)
+                return True
+        return False
+
+    def _feasible(self, candidate_id: str, slot: Tuple[str, int, int, str]) -> Union[str, None, bool]:
+        """Room id (or None when rooms are not used) if the slot can be taken, else False"""
+        day, start, end, interviewer_id = slot
+        if not self._interviewer_free(slot):
+            return False
+        if not self._free(("candidate", candidate_id, day), start, end):
+            return False
+        return self._room_for(day, start, end)
+
+    def _interviewer_free(self, slot: Tuple[str, int, int, str]) -> bool:
+        day, start, end, interviewer_id = slot
+        return self._free(("interviewer", interviewer_id, day), start, end) and \
+            self.book.is_free("interviewer", interviewer_id, day, start, end)
+
+    def _room_for(self, day: str, start: int, end: int) -> Union[str, None, bool]:
+        if not self.rooms:
+            return None
+        key = (day, start, end)
+        if key not in self._room_cache:
+            self._room_cache[key] = next(
+                (room["id"] for room in self.rooms
+                 if self._free(("room", room["id"], day), start, end)
+                 and self.book.is_free("room", room["id"], day, start, end)),
+                False)
+        return self._room_cache[key]
+
+    def _free(self, key: ResourceKey, start: int, end: int) -> bool:
+        return all(end <= s or e <= start for s, e in self._busy.get(key, {}).values())
+
+    def _assign(self, index: int, task: Tuple[str, str], slot: Tuple[str, int, int, str],
+                room_id: Optional[str]) -> None:
+        day, start, end, interviewer_id = slot
+        self.assignments[index] = {
+            "candidate_id": task[0],
+            "interview_type": task[1],
+            "interviewer_id": interviewer_id,
+            "room_id": room_id,
+            "scheduled_date": day,
+            "scheduled_time": format_minutes(start),
+            "end_time": format_minutes(end),
+            "slot": slot
+        }
+        for key in self._assignment_keys(self.assignments[index]):
+            self._busy[key][index] = (start, end)
+        self.load[interviewer_id] += 1
+        if room_id:
+            self._room_cache.clear()
+
+    def _unassign(self, index: int) -> Dict[str, Any]:
+        assignment = self.assignments.pop(index)
+        for key in self._assignment_keys(assignment):
+            self._busy[key].pop(index, None)
+        self.load[assignment["interviewer_id"]] -= 1
+        if assignment["room_id"]:
+            self._room_cache.clear()
+        return assignment
+
+    @staticmethod
+    def _assignment_keys(assignment: Dict[str, Any]) -> List[ResourceKey]:
+        day = assignment["scheduled_date"]
+        keys = [("interviewer", assignment["interviewer_id"], day),
+                ("candidate", assignment["candidate_id"], day)]
+        if assignment["room_id"]:
+            keys.append(("room", assignment["room_id"], day))
+        return keys
+
+    def _open_slots(self, interview_type: str) -> List[Tuple[str, int, int, str]]:
+        """Slots with a free interviewer and room, regardless of candidate"""
+        return [slot for slot in self._candidate_slots(interview_type)
+                if self._interviewer_free(slot) and self._room_for(*slot[:3]) is not False]
+
+    def _repair(self, index: int, task: Tuple[str, str],
+                open_slots: Dict[str, List[Tuple[str, int, int, str]]]) -> bool:
+        """Free a slot for an unassigned task by moving one blocking assignment elsewhere"""
+        for slot in self._candidate_slots(task[1]):
+            day, start, end, interviewer_id = slot
+            if not self.book.is_free("interviewer", interviewer_id, day, start, end):
+                continue
+            blockers = [i for i, (s, e) in self._busy.get(("interviewer", interviewer_id, day), {}).items()
+                        if s < end and start < e]
+            if len(blockers) != 1:
+                continue
+
+            blocker_task = (self.assignments[blockers[0]]["candidate_id"],
+                            self.assignments[blockers[0]]["interview_type"])
+            if not open_slots.get(blocker_task[1]):
+                continue
+
+            moved = self._unassign(blockers[0])
+            room_id = self._feasible(task[0], slot)
+            if room_id is not False:
+                self._assign(index, task, slot, room_id)
+                if self._place(blockers[0], blocker_task, open_slots[blocker_task[1]], exclude=slot):
+                    return True
+                self._unassign(index)
+            self._assign(blockers[0], blocker_task, moved["slot"], moved["room_id"])
+        return False
+
+    def _balance(self) -> None:
+        """Move assignments from the busiest interviewer to less loaded ones"""
+        for _ in range(self.MAX_BALANCE_MOVES):
+            busiest = max(self.load, key=self.load.get, default=None)
+            if busiest is None or not self._move_one(busiest):
+                return
+
+    def _move_one(self, interviewer_id: str) -> bool:
+        for index in [i for i, a in self.assignments.items() if a["interviewer_id"] == interviewer_id]:
+            task = (self.assignments[index]["candidate_id"], self.assignments[index]["interview_type"])
+            targets = [slot for slot in self._candidate_slots(task[1])
+                       if self.load[slot[3]] + 1 < self.load[interviewer_id]]
+            if not targets:
+                continue
+            moved = self._unassign(index)
+            if self._place(index, task, targets):
+                return True
+            self._assign(index, task, moved["slot"], moved["room_id"])
+        return False
+
+
+class SchedulingService:
+    """Conflict detection and validation for interview_schedules"""
+
+    BOOKING_FIELDS = "id, candidate_id, interviewer_id, room_id, scheduled_date, scheduled_time, duration_minutes, status"
+
+    def load_schedule(self, dates: Iterable[Union[str, date]],
+                      interviewer_ids: Optional[Iterable[str]] = None,
+                      room_ids: Optional[Iterable[str]] = None) -> ScheduleBook:
+        """Load all scheduled bookings for the given days in one query"""
+        book = ScheduleBook()
+        days = {date.fromisoformat(_iso(d)) for d in dates}
+        if not days:
+            return book
+        # Neighbouring days too, for bookings that run past midnight
+        days = sorted({(day + timedelta(days=offset)).isoformat()
+                       for day in days for offset in (-1, 0, 1)})
+
+        query = supabase.table("interview_schedules").select(
+            self.BOOKING_FIELDS).eq("status", "scheduled").in_("scheduled_date", days)
+
+        interviewer_ids = set(interviewer_ids or [])
+        room_ids = set(room_ids or [])
+        result = query.execute()
+
+        for booking in result.data or []:
+            # Keep only bookings touching the resources we care about (if given)
+            if interviewer_ids or room_ids:
+                if booking.get("interviewer_id") not in interviewer_ids and booking.get("room_id") not in room_ids:
+                    continue
+            book.add(booking)
+        return book
+
+    def find_conflicts(self, booking: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Conflicts for a single proposed booking"""
+        return self.validate_bookings([booking])[0]["conflicts"]
+
+    def validate_bookings(self, bookings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Validate proposed bookings against the schedule and against each other.
+        Bookings are considered in order; each valid one is reserved for the rest.
+        """
+        book = self.load_schedule(
+            [b["scheduled_date"] for b in bookings],
+            [b["interviewer_id"] for b in bookings],
+            [b["room_id"] for b in bookings if b.get("room_id")]
+        )
+
+        results = []
+        for index, booking in enumerate(bookings):
+            conflicts = book.conflicts(booking)
+            if not conflicts:
+                book.add({**booking, "id": booking.get("id") or f"proposed:{index}"})
+            start, end = booking_interval(booking)
+            results.append({
+                "index": index,
+                "valid": not conflicts,
+                "interviewer_id": booking["interviewer_id"],
+                "room_id": booking.get("room_id"),
+                "scheduled_date": _iso(booking["scheduled_date"]),
+                "start_time": format_minutes(start),
+                "end_time": format_minutes(end),
+                "conflicts": conflicts
+            })
+        return results
+
+    def book_panel(self, candidate_id: str, interviewer_ids: List[str], scheduled_date: date,
+                   scheduled_time: time, duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                   room_id: Optional[str] = None, interview_type: str = "technical",
+                   interview_mode: str = "in-person", notes: Optional[str] = None,
+                   meeting_link: Optional[str] = None, created_by: Optional[str] = None) -> Dict[str, Any]:
+        """Reserve every panelist (and the room) for one interview atomically"""
+        proposed = [{
+            "interviewer_id": interviewer_id,
+            "room_id": room_id,
+            "scheduled_date": scheduled_date,
+            "scheduled_time": scheduled_time,
+            "duration_minutes": duration_minutes
+        } for interviewer_id in dict.fromkeys(interviewer_ids)]
+        # Room is shared by the panel, so only check it once
+        for booking in proposed[1:]:
+            booking["room_id"] = None
+
+        conflicts = [c for result in self.validate_bookings(proposed) for c in result["conflicts"]]
+        if conflicts:
+            return {"success": False, "conflicts": conflicts}
+
+        # The database function re-checks under advisory locks and inserts all rows in one transaction
+        result = supabase.rpc("book_panel_interview", {
+            "p_candidate_id": candidate_id,
+            "p_interviewer_ids": [b["interviewer_id"] for b in proposed],
+            "p_scheduled_date": _iso(scheduled_date),
+            "p_scheduled_time": scheduled_time.isoformat(),
+            "p_duration_minutes": duration_minutes,
+            "p_room_id": room_id,
+            "p_interview_type": interview_type,
+            "p_interview_mode": interview_mode,
+            "p_notes": notes,
+            "p_meeting_link": meeting_link,
+            "p_created_by": created_by
+        }).execute()
+
+        rows = result.data or []
+        return {
+            "success": True,
+            "panel_id": rows[0].get("panel_id") if rows else None,
+            "interviews": rows
+        }
+
+    def auto_assign(self, candidate_ids: List[str], start_date: date, end_date: date,
+                    interview_types: List[str], duration_minutes: int = DEFAULT_DURATION_MINUTES,
+                    interviewer_ids: Optional[List[str]] = None, room_ids: Optional[List[str]] = None,
+                    event_id: Optional[str] = None, min_room_capacity: int = 2,
+                    type_departments: Optional[Dict[str, str]] = None,
+                    interview_mode: str = "in-person", created_by: Optional[str] = None,
+                    commit: bool = True) -> Dict[str, Any]:
+        """Assign interviews for many candidates at once and commit them with one bulk insert"""
+        days = date_range(start_date, end_date)
+
+        query = supabase.table("interviewers").select(
+            "id, name, department, availability_pattern").eq("is_active", True)
+        if interviewer_ids:
+            query = query.in_("id", interviewer_ids)
+        interviewers = query.execute().data or []
+
+        rooms = []
+        if interview_mode != "virtual":
+            query = supabase.table("rooms").select(
+                "id, name, capacity, type").eq("is_active", True).gte("capacity", min_room_capacity)
+            if room_ids:
+                query = query.in_("id", room_ids)
+            if event_id:
+                query = query.eq("event_id", event_id)
+            # Smallest suitable rooms first so large rooms stay free
+            rooms = [room for room in query.order("capacity").execute().data or []
+                     if room.get("type") != "virtual"]
+            if not rooms:
+                return {"success": False, "error": "No suitable rooms available"}
+
+        # Date-specific overrides take precedence over the weekly pattern
+        overrides = defaultdict(list)
+        if interviewers:
+            for override in supabase.table("interviewer_availability").select(
+                    "interviewer_id, date, start_time, end_time, is_available").in_(
+                    "interviewer_id", [i["id"] for i in interviewers]).gte(
+                    "date", start_date.isoformat()).lte("date", end_date.isoformat()).execute().data or []:
+                overrides[(override["interviewer_id"], _iso(override["date"]))].append(override)
+
+        slots = []
+        for interviewer in interviewers:
+            pattern = interviewer.get("availability_pattern") or {}
+            for day in days:
+                starts = [to_minutes(t) for t in pattern.get(day.strftime("%A").lower(), [])]
+                slots.extend(
+                    (day.isoformat(), start, start + duration_minutes, interviewer["id"])
+                    for start in apply_overrides(
+                        starts, overrides.get((interviewer["id"], day.isoformat()), []),
+                        duration_minutes))
+
+        type_departments = type_departments or {}
+        eligible = {
+            interview_type: [
+                interviewer["id"] for interviewer in interviewers
+                if interview_type not in type_departments
+                or interviewer.get("department") == type_departments[interview_type]
+            ]
+            for interview_type in interview_types
+        }
+
+        book = self.load_schedule(days, [i["id"] for i in interviewers], [r["id"] for r in rooms])
+        tasks = [(candidate_id, interview_type)
+                 for candidate_id in candidate_ids for interview_type in interview_types]
+
+        scheduler = AutoScheduler(book, slots, rooms, eligible)
+        assignments, unassigned = scheduler.solve(tasks)
+
+        rows = [{
+            "candidate_id": a["candidate_id"],
+            "interviewer_id": a["interviewer_id"],
+            "room_id": a["room_id"],
+            "scheduled_date": a["scheduled_date"],
+            "scheduled_time": a["scheduled_time"],
+            "duration_minutes": duration_minutes,
+            "interview_type": a["interview_type"],
+            "interview_mode": interview_mode,
+            "status": "scheduled",
+            "created_by": created_by
+        } for a in assignments]
+
+        created = []
+        if commit and rows:
+            created = supabase.table("interview_schedules").insert(rows).execute().data or []
+
+        interviewer_names = {i["id"]: i.get("name") for i in interviewers}
+        return {
+            "success": True,
+            "committed": bool(commit and rows),
+            "requested": len(tasks),
+            "assigned": len(rows),
+            "assignments": created or [
+                {**row, "end_time": a["end_time"]} for row, a in zip(rows, assignments)],
+            "unassigned": unassigned,
+            "interviewer_load": {
+                interviewer_id: {"name": interviewer_names.get(interviewer_id), "interviews": count}
+                for interviewer_id, count in scheduler.load.items()
+            }
+        }
+
+
+scheduling_service = SchedulingService()
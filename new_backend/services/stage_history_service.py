@@ -0,0 +1,239 @@
+"""
+Hot/cold routing for candidate_stage_history
+
+The history table is partitioned by month (migration 017). Reads default to
+the hot window so Postgres only touches recent partitions; a range reaching
+further back also pulls the archived months from Parquet files in storage.
+archive_old_partitions() exports months older than the window and drops them.
+"""
+
+import logging
+import os
+import uuid
+from datetime import date, datetime, time, timezone
+from functools import lru_cache
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Tuple
+
+from supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+HOT_MONTHS = int(os.getenv("STAGE_HISTORY_HOT_MONTHS", "12"))
+ARCHIVE_BUCKET = "stage-history-archive"
+EXPORT_PAGE_SIZE = 1000
+
+
+@lru_cache(maxsize=1)
+def archive_schema():
+    # pyarrow is only needed for archived months, so the API does not require it
+    import pyarrow as pa
+    return pa.schema([
+        ("id", pa.string()),
+        ("candidate_id", pa.string()),
+        ("action", pa.string()),
+        ("from_stage", pa.string()),
+        ("to_stage", pa.string()),
+        ("performed_by", pa.string()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("notes", pa.string()),
+        ("status", pa.string()),
+        ("candidate_name", pa.string()),
+    ])
+
+
+def _parse_timestamp(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, date):
+        parsed = datetime.combine(value, time.min)
+    else:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _sort_key(row: Dict[str, Any]) -> Tuple[datetime, str]:
+    return _parse_timestamp(row["timestamp"]), str(row["id"])
+
+
+def month_start(day: date, months_back: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class StageHistoryService:
+    """Reads stage history from hot partitions and archived Parquet months"""
+
+    def hot_start(self) -> datetime:
+        """Start of the hot window: the current month plus HOT_MONTHS - 1 before it"""
+        start = month_start(date.today(), HOT_MONTHS - 1)
+        return datetime.combine(start, time.min, tzinfo=timezone.utc)
+
+    def query(self, candidate_id: Optional[str] = None, since: Optional[Any] = None,
+              until: Optional[Any] = None, filters: Optional[Dict[str, Any]] = None,
+              limit: Optional[int] = None, before: Optional[Tuple[str, str]] = None) -> List[Dict[str, Any]]:
+        """Transitions newest first; months older than the hot window only when `since` reaches them"""
+        since = _parse_timestamp(since) if since else self.hot_start()
+        until = _parse_timestamp(until) if until else None
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        if candidate_id:
+            filters["candidate_id"] = candidate_id
+
+        # Bounding the timestamp lets Postgres prune to the matching partitions
+        query = supabase.table("candidate_stage_history_view").select(
+            "*").gte("timestamp", since.isoformat())
+        if until:
+            query = query.lt("timestamp", until.isoformat())
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        if before:
+            # Interpolated into a PostgREST filter; raises ValueError on a malformed cursor
+            timestamp = _parse_timestamp(before[0]).isoformat()
+            row_id = str(uuid.UUID(str(before[1])))
+            before = (timestamp, row_id)
+            query = query.or_(
+                f'timestamp.lt."{timestamp}",and(timestamp.eq."{timestamp}",id.lt.{row_id})')
+        query = query.order("timestamp", desc=True).order("id", desc=True)
+        if limit:
+            query = query.limit(limit)
+        rows = query.execute().data or []
+
+        if since >= self.hot_start() or (limit and len(rows) >= limit):
+            return rows
+
+        archived = self._archived_rows(since, until, filters, before)
+        if not archived:
+            return rows
+        merged = sorted(rows + archived, key=_sort_key, reverse=True)
+        return merged[:limit] if limit else merged
+
+    def _archived_rows(self, since: datetime, until: Optional[datetime], filters: Dict[str, Any],
+                       before: Optional[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        query = supabase.table("stage_history_archives").select(
+            "*").gt("range_end", since.date().isoformat())
+        if until:
+            query = query.lt("range_start", until.date().isoformat())
+        archives = query.order("range_start").execute().data or []
+
+        before_key = (_parse_timestamp(before[0]), before[1]) if before else None
+        rows = []
+        for archive in archives:
+            for row in self._read_archive(archive["storage_bucket"], archive["storage_path"]):
+                at = _parse_timestamp(row["timestamp"])
+                if at < since or (until and at >= until):
+                    continue
+                if any(row.get(column) != value for column, value in filters.items()):
+                    continue
+                if before_key and (at, row["id"]) >= before_key:
+                    continue
+                rows.append(dict(row))
+        self._add_candidate_fields(rows)
+        return rows
+
+    @staticmethod
+    def _add_candidate_fields(rows: List[Dict[str, Any]]) -> None:
+        """Current name and stage, which the view joins in for hot rows"""
+        candidate_ids = list({row["candidate_id"] for row in rows if row.get("candidate_id")})
+        if not candidate_ids:
+            return
+        candidates = {c["id"]: c for c in supabase.table("candidates").select(
+            "id, name, stage").in_("id", candidate_ids).execute().data or []}
+        for row in rows:
+            candidate = candidates.get(row.get("candidate_id"))
+            if candidate:
+                row["candidate_name"] = candidate.get("name") or row.get("candidate_name")
+                row["candidate_stage"] = candidate.get("stage")
+
+    @staticmethod
+    @lru_cache(maxsize=12)
+    def _read_archive(bucket: str, path: str) -> Tuple[Dict[str, Any], ...]:
+        import pyarrow.parquet as pq
+        content = supabase.storage.from_(bucket).download(path)
+        rows = pq.read_table(BytesIO(content)).to_pylist()
+        for row in rows:
+            row["timestamp"] = row["timestamp"].isoformat()
+        return tuple(rows)
+
+    def archive_old_partitions(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Export every monthly partition older than the hot window to Parquet and drop it"""
+        created = supabase.rpc("ensure_stage_history_partitions", {}).execute().data
+        partitions = supabase.rpc("list_stage_history_partitions", {}).execute().data or []
+        cutoff = self.hot_start().date().isoformat()
+        due = [p for p in partitions if p["range_end"] <= cutoff]
+
+        result = {"partitions_created": created, "due": [p["partition_name"] for p in due],
+                  "archived": [], "failed": []}
+        if dry_run or not due:
+            return result
+
+        self._ensure_bucket()
+        for partition in due:
+            try:
+                result["archived"].append(self.archive_partition(partition))
+            except Exception as e:
+                logger.error(f"Error archiving {partition['partition_name']}: {str(e)}")
+                result["failed"].append({"partition_name": partition["partition_name"], "error": str(e)})
+        return result
+
+    def archive_partition(self, partition: Dict[str, Any]) -> Dict[str, Any]:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = archive_schema()
+        rows = self._export_rows(partition["range_start"], partition["range_end"])
+        table = pa.Table.from_pylist([{
+            **{field.name: row.get(field.name) for field in schema},
+            "timestamp": _parse_timestamp(row["timestamp"])
+        } for row in rows], schema=schema)
+
+        buffer = BytesIO()
+        pq.write_table(table, buffer, compression="zstd")
+        content = buffer.getvalue()
+        path = f"{partition['range_start'][:4]}/{partition['partition_name']}.parquet"
+        supabase.storage.from_(ARCHIVE_BUCKET).upload(
+            path, content,
+            file_options={"content-type": "application/vnd.apache.parquet", "upsert": "true"})
+
+        # Drops the partition only if no rows arrived since the export
+        outcome = supabase.rpc("archive_stage_history_partition", {
+            "p_partition_name": partition["partition_name"],
+            "p_storage_bucket": ARCHIVE_BUCKET,
+            "p_storage_path": path,
+            "p_row_count": len(rows)
+        }).execute().data or {}
+        if not outcome.get("success"):
+            raise Exception(outcome.get("message", "Archive failed"))
+
+        logger.info(
+            f"Archived {len(rows)} history rows from {partition['partition_name']} to {path} "
+            f"({len(content)} bytes)")
+        return {"partition_name": partition["partition_name"], "row_count": len(rows),
+                "storage_path": path, "bytes": len(content)}
+
+    def _export_rows(self, range_start: str, range_end: str) -> List[Dict[str, Any]]:
+        """All rows in [range_start, range_end), paged by (timestamp, id)"""
+        rows: List[Dict[str, Any]] = []
+        while True:
+            query = supabase.table("candidate_stage_history_view").select("*").gte(
+                "timestamp", range_start).lt("timestamp", range_end)
+            if rows:
+                last_ts, last_id = rows[-1]["timestamp"], rows[-1]["id"]
+                query = query.or_(
+                    f'timestamp.gt."{last_ts}",and(timestamp.eq."{last_ts}",id.gt.{last_id})')
+            page = query.order("timestamp").order("id").limit(
+                EXPORT_PAGE_SIZE).execute().data or []
+            rows.extend(page)
+            if len(page) < EXPORT_PAGE_SIZE:
+                return rows
+
+    def _ensure_bucket(self) -> None:
+        try:
+            names = [bucket.name for bucket in supabase.storage.list_buckets()]
+            if ARCHIVE_BUCKET not in names:
+                supabase.storage.create_bucket(ARCHIVE_BUCKET, {"public": False})
+                logger.info(f"Created bucket: {ARCHIVE_BUCKET}")
+        except Exception as e:
+            logger.warning(f"Could not check/create bucket {ARCHIVE_BUCKET}: {str(e)}")
+
+
+stage_history_service = StageHistoryService()
@@ -7,6 +7,7 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from supabase_client import supabase
+from workflow_state_machine import TransitionTable
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +29,28 @@ class StageManagementService:
             "onboarded": []  # Terminal state
         }
 
+        # Action that moves a candidate into each stage
+        self.stage_actions = {
+            "screened": "shortlist",  # Fixed: shortlist action leads to screened stage
+            "shortlisted": "move_to_shortlisted",
+            "interview": "schedule_interview",
+            "final_review": "move_to_final",
+            "offer": "make_offer",
+            "hired": "hire",
+            "rejected": "reject",
+            "declined": "mark_declined",
+            "onboarded": "complete_onboarding"
+        }
+        self.action_stages = {action: stage for stage,
+                              action in self.stage_actions.items()}
+        self.action_stages["start_screening"] = "screened"
+
+        self.transitions = TransitionTable(
+            {stage: [(self.stage_actions[target], target) for target in targets]
+             for stage, targets in self.stage_transitions.items()},
+            action_aliases={"start_screening": "shortlist"}
+        )
+
         # Define status mappings for each stage
         self.stage_status_mapping = {
             "applied": "active",
@@ -68,33 +91,7 @@ class StageManagementService:
                 return []
 
             current_stage = result.data.get("stage", "applied")
-            allowed_stages = self.stage_transitions.get(current_stage, [])
-
-            # Convert stages to actions
-            actions = []
-            for stage in allowed_stages:
-                if stage == "screened":
-                    # Fixed: shortlist action leads to screened stage
-                    actions.append("shortlist")
-                elif stage == "shortlisted":
-                    # Fixed: separate action for shortlisted
-                    actions.append("move_to_shortlisted")
-                elif stage == "interview":
-                    actions.append("schedule_interview")
-                elif stage == "final_review":
-                    actions.append("move_to_final")
-                elif stage == "offer":
-                    actions.append("make_offer")
-                elif stage == "hired":
-                    actions.append("hire")
-                elif stage == "rejected":
-                    actions.append("reject")
-                elif stage == "declined":
-                    actions.append("mark_declined")
-                elif stage == "onboarded":
-                    actions.append("complete_onboarding")
-
-            return actions
+            return list(self.transitions.available_actions(current_stage))
 
         except Exception as e:
             logger.error(f"Error getting allowed actions: {str(e)}")
@@ -119,8 +116,7 @@ class StageManagementService:
                 return {"success": False, "error": f"Invalid action: {action}"}
 
             # Check if transition is allowed
-            allowed_stages = self.stage_transitions.get(current_stage, [])
-            if new_stage not in allowed_stages:
+            if not self.transitions.is_valid(current_stage, action):
                 return {"success": False, "error": f"Cannot transition from {current_stage} to {new_stage}"}
 
             # Get new status
@@ -170,19 +166,7 @@ class StageManagementService:
 
     def _action_to_stage(self, action: str) -> Optional[str]:
         """Map action to stage"""
-        action_stage_map = {
-            "start_screening": "screened",
-            "shortlist": "screened",
-            "move_to_shortlisted": "shortlisted",
-            "schedule_interview": "interview",
-            "move_to_final": "final_review",
-            "make_offer": "offer",
-            "hire": "hired",
-            "reject": "rejected",
-            "mark_declined": "declined",
-            "complete_onboarding": "onboarded"
-        }
-        return action_stage_map.get(action)
+        return self.action_stages.get(action)
 
     async def get_stage_data_requirements(self, stage: str) -> List[str]:
         """Get data requirements for a specific stage"""
@@ -199,7 +183,7 @@ class StageManagementService:
 
             if "resume" in requirements:
                 select_fields.append(
-                    "candidate_files(id, file_type, file_url, file_name, uploaded_at)")
+                    "candidate_files(id, file_type, file_category, file_url, file_name, uploaded_at, thumbnail_url)")
 
             if "initial_evaluation" in requirements or "evaluations" in requirements:
                 # Note: We'll fetch this separately due to type mismatch
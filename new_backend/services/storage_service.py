@@ -1,15 +1,72 @@
 import os
-from typing import Optional, Tuple
-import PyPDF2
-import docx
+import asyncio
+import hashlib
+import io
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import UploadFile
 from supabase import create_client, Client
 import logging
 import uuid
-from io import BytesIO
+from .text_extraction_service import text_extraction_service
+from .file_preview_service import file_preview_service
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+MAX_RESUME_BYTES = int(os.getenv("MAX_RESUME_BYTES", str(10 * 1024 * 1024)))
+MAX_DOCUMENT_BYTES = int(os.getenv("MAX_DOCUMENT_BYTES", str(25 * 1024 * 1024)))
+# Larger files are stored but not text-extracted (PDF parsing needs the whole file in memory)
+MAX_EXTRACT_BYTES = int(os.getenv("MAX_EXTRACT_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "4"))
+
+# candidate_files.file_category -> (bucket, size limit) for direct uploads
+UPLOAD_CATEGORIES = {
+    "resume": ("resume", MAX_RESUME_BYTES),
+    "supporting_document": ("other-docs", MAX_DOCUMENT_BYTES),
+}
+
+
+class FileTooLargeError(Exception):
+    pass
+
+
+class UploadReader(io.RawIOBase):
+    """
+    Reads an upload once for the storage client: hashes and counts every chunk,
+    enforces the size limit mid-stream, and keeps a copy for text extraction
+    while the file is within MAX_EXTRACT_BYTES. `prefix` is the start of the
+    file already read from `source` (see read_upload_head).
+    """
+
+    def __init__(self, source, max_bytes: int, keep_bytes: int = 0, prefix: bytes = b""):
+        self.source = source
+        self.prefix = io.BytesIO(prefix)
+        self.max_bytes = max_bytes
+        self.keep_bytes = keep_bytes
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self.kept: Optional[bytearray] = bytearray() if keep_bytes else None
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self.prefix.read(len(buffer)) or self.source.read(len(buffer))
+        if not chunk:
+            return 0
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise FileTooLargeError(f"File exceeds the {self.max_bytes // (1024 * 1024)} MB limit")
+        self.sha256.update(chunk)
+        if self.kept is not None:
+            if self.size <= self.keep_bytes:
+                self.kept.extend(chunk)
+            else:
+                self.kept = None
+        buffer[:len(chunk)] = chunk
+        return len(chunk)
+
 
 class StorageService:
     def __init__(self):
@@ -56,40 +113,108 @@ class StorageService:
             logger.warning(f"Could not check/create buckets: {str(e)}")
             # Continue anyway - buckets might exist but we can't list them
 
-    async def upload_resume(self, file: UploadFile, candidate_id: str) -> str:
-        """Upload resume file directly to resume bucket"""
+    async def store_upload(self, file: UploadFile, candidate_id: str, bucket: str,
+                           max_bytes: int, extract: bool = True,
+                           head: Optional[bytes] = None) -> Dict[str, Any]:
+        """
+        Stream an upload to storage in one pass; returns url, bucket, path, size,
+        sha256 and extracted_text (None when not extracted). `head` is what
+        read_upload_head already read; the stream continues after it.
+        """
         if not self.storage_enabled:
-            # Force proper error instead of mock URL
             raise Exception(
                 "Storage service not enabled - check SUPABASE_URL and SUPABASE_KEY environment variables")
+        if file.size is not None and file.size > max_bytes:
+            raise FileTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+        filename = f"{candidate_id}_{file.filename}"
+        if head is None:
+            await file.seek(0)
+        reader = UploadReader(file.file, max_bytes, MAX_EXTRACT_BYTES if extract else 0, head or b"")
+
+        # The storage client streams a BufferedReader in chunks instead of loading it
+        result = await asyncio.to_thread(
+            self.supabase.storage.from_(bucket).upload,
+            filename,
+            io.BufferedReader(reader, buffer_size=UPLOAD_CHUNK_BYTES),
+            {"content-type": file.content_type or "application/octet-stream"}
+        )
+        if hasattr(result, 'error') and result.error:
+            raise Exception(f"Upload failed: {result.error}")
+
+        extracted_text = None
+        if reader.kept is not None:
+            extracted_text = await self._extract_text(bytes(reader.kept), file.filename or "resume.pdf")
+        elif extract:
+            logger.info(f"Skipped text extraction for {filename}: {reader.size} bytes")
+
+        return {
+            "url": self.supabase.storage.from_(bucket).get_public_url(filename),
+            "bucket": bucket,
+            "path": filename,
+            "size": reader.size,
+            "sha256": reader.sha256.hexdigest(),
+            "extracted_text": extracted_text
+        }
+
+    async def store_uploads(self, candidate_id: str, uploads: List[Dict[str, Any]],
+                            concurrency: int = UPLOAD_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Store several uploads concurrently (at most `concurrency` at a time).
+
+        Each item is {"file", "category", "extract"?, "extracted_text"?, "head"?}; results come back
+        in the same order with file_name, category, seconds and either the candidate_files
+        "record" or an "error".
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def store(item: Dict[str, Any]) -> Dict[str, Any]:
+            file = item["file"]
+            bucket, max_bytes = UPLOAD_CATEGORIES[item["category"]]
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    stored = await self.store_upload(
+                        file, candidate_id, bucket, max_bytes, item.get("extract", True),
+                        item.get("head"))
+                    outcome = {"record": self.file_record(
+                        file, stored, candidate_id, item["category"], item.get("extracted_text"))}
+                except Exception as e:
+                    logger.error(f"Error uploading {file.filename}: {str(e)}")
+                    outcome = {"error": str(e)}
+                return {
+                    "file_name": file.filename,
+                    "category": item["category"],
+                    "seconds": round(time.perf_counter() - started, 3),
+                    **outcome
+                }
+
+        return list(await asyncio.gather(*[store(item) for item in uploads]))
+
+    @staticmethod
+    def file_record(file: UploadFile, stored: Dict[str, Any], candidate_id: str,
+                    category: str, extracted_text: Optional[str] = None) -> Dict[str, Any]:
+        """candidate_files row for a stored upload"""
+        return {
+            "candidate_id": candidate_id,
+            "file_type": file.content_type,
+            "file_url": stored["url"],
+            "file_name": file.filename,
+            "file_size": stored["size"],
+            "file_category": category,
+            "extracted_text": extracted_text if extracted_text is not None else stored["extracted_text"],
+            "content_sha256": stored["sha256"],
+            "storage_bucket": stored["bucket"],
+            "storage_path": stored["path"]
+        }
 
+    async def upload_resume(self, file: UploadFile, candidate_id: str) -> str:
+        """Upload resume file directly to resume bucket"""
         try:
-            # Read file content
-            content = await file.read()
-
-            # Generate filename with candidate ID
-            file_extension = os.path.splitext(
-                file.filename)[1] if file.filename else '.pdf'
-            filename = f"{candidate_id}_{file.filename}"
-
-            # Upload directly to resume bucket
-            result = self.supabase.storage.from_("resume").upload(
-                filename,
-                content,
-                file_options={"content-type": file.content_type}
-            )
-
-            # Check if upload was successful
-            if hasattr(result, 'error') and result.error:
-                raise Exception(f"Upload failed: {result.error}")
-
-            # Get public URL
-            public_url = self.supabase.storage.from_(
-                "resume").get_public_url(filename)
-
+            stored = await self.store_upload(file, candidate_id, "resume", MAX_RESUME_BYTES, extract=False)
             logger.info(
-                f"Resume uploaded successfully for candidate {candidate_id}: {public_url}")
-            return public_url
+                f"Resume uploaded successfully for candidate {candidate_id}: {stored['url']}")
+            return stored["url"]
 
         except Exception as e:
             logger.error(f"Error uploading resume: {str(e)}")
@@ -99,43 +224,106 @@ class StorageService:
 
     async def upload_supporting_doc(self, file: UploadFile, candidate_id: str) -> str:
         """Upload supporting documents to other-docs bucket"""
-        if not self.storage_enabled:
-            raise Exception(
-                "Storage service not enabled - check SUPABASE_URL and SUPABASE_KEY environment variables")
-
         try:
-            # Read file content
-            content = await file.read()
-
-            # Generate filename with candidate ID
-            file_extension = os.path.splitext(
-                file.filename)[1] if file.filename else '.pdf'
-            filename = f"{candidate_id}_{file.filename}"
-
-            # Upload directly to other-docs bucket
-            result = self.supabase.storage.from_("other-docs").upload(
-                filename,
-                content,
-                file_options={"content-type": file.content_type}
-            )
-
-            # Check if upload was successful
-            if hasattr(result, 'error') and result.error:
-                raise Exception(f"Upload failed: {result.error}")
-
-            # Get public URL
-            public_url = self.supabase.storage.from_(
-                "other-docs").get_public_url(filename)
-
+            stored = await self.store_upload(file, candidate_id, "other-docs", MAX_DOCUMENT_BYTES, extract=False)
             logger.info(
-                f"Document uploaded successfully for candidate {candidate_id}: {public_url}")
-            return public_url
+                f"Document uploaded successfully for candidate {candidate_id}: {stored['url']}")
+            return stored["url"]
 
         except Exception as e:
             logger.error(f"Error uploading document: {str(e)}")
             raise Exception(
                 f"Failed to upload document to Supabase storage: {str(e)}")
 
+    def create_upload_urls(self, candidate_id: str, files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Signed URLs the client uploads to directly, one per requested file"""
+        if not self.storage_enabled:
+            raise Exception(
+                "Storage service not enabled - check SUPABASE_URL and SUPABASE_KEY environment variables")
+
+        uploads = []
+        for file in files:
+            category = file.get("category") or "resume"
+            if category not in UPLOAD_CATEGORIES:
+                raise ValueError(f"Unknown file category: {category}")
+            bucket, max_bytes = UPLOAD_CATEGORIES[category]
+            if file.get("size") and file["size"] > max_bytes:
+                raise ValueError(
+                    f"{file.get('file_name')} exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+            # The random part keeps re-uploads of the same name from colliding
+            file_name = os.path.basename(file.get("file_name") or "document")
+            path = f"{candidate_id}_{uuid.uuid4().hex[:12]}_{file_name}"
+            signed = self.supabase.storage.from_(bucket).create_signed_upload_url(path)
+            uploads.append({
+                "file_name": file_name,
+                "category": category,
+                "bucket": bucket,
+                "path": path,
+                "signed_url": signed["signed_url"],
+                "token": signed["token"]
+            })
+        return uploads
+
+    def complete_upload(self, candidate_id: str, upload: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Register a directly uploaded object as a candidate_files row; returns (row, created)"""
+        category = upload.get("category") or "resume"
+        bucket, max_bytes = UPLOAD_CATEGORIES.get(category, (None, 0))
+        path = upload.get("path") or ""
+        # Only objects issued to this candidate by create_upload_urls
+        if bucket is None or upload.get("bucket") != bucket or not path.startswith(f"{candidate_id}_"):
+            raise ValueError("Upload does not belong to this candidate")
+
+        existing = self.supabase.table("candidate_files").select("*").eq(
+            "storage_bucket", bucket).eq("storage_path", path).execute()
+        if existing.data:
+            return existing.data[0], False
+
+        storage = self.supabase.storage.from_(bucket)
+        info = storage.info(path)
+        size = int(info.get("size") or 0)
+        if size > max_bytes:
+            storage.remove([path])
+            raise ValueError(f"Upload exceeds the {max_bytes // (1024 * 1024)} MB limit")
+
+        result = self.supabase.table("candidate_files").insert({
+            "candidate_id": candidate_id,
+            "file_type": upload.get("content_type") or info.get("content_type"),
+            "file_url": storage.get_public_url(path),
+            "file_name": upload.get("file_name") or path.split("_", 2)[-1],
+            "file_size": size,
+            "file_category": category,
+            "storage_bucket": bucket,
+            "storage_path": path,
+            "processing_status": "pending"
+        }).execute()
+        return result.data[0], True
+
+    async def process_uploaded_file(self, file_record: Dict[str, Any]) -> None:
+        """Background step for direct uploads: hash, extract text and render a preview"""
+        file_id = file_record["id"]
+        content = None
+        try:
+            content = await asyncio.to_thread(
+                self.supabase.storage.from_(file_record["storage_bucket"]).download,
+                file_record["storage_path"])
+            update = {
+                "content_sha256": hashlib.sha256(content).hexdigest(),
+                "processing_status": "processed"
+            }
+            if len(content) <= MAX_EXTRACT_BYTES:
+                update["extracted_text"] = await self._extract_text(
+                    content, file_record.get("file_name") or file_record["storage_path"])
+        except Exception as e:
+            logger.error(f"Error processing uploaded file {file_id}: {str(e)}")
+            update = {"processing_status": "failed"}
+
+        await asyncio.to_thread(
+            lambda: self.supabase.table("candidate_files").update(update).eq("id", file_id).execute())
+        if content is not None:
+            # Reuses the downloaded bytes and the text extracted above
+            await file_preview_service.generate({**file_record, **update}, content)
+
     async def upload_other_document(self, file: UploadFile, candidate_id: str) -> str:
         """Upload other documents to other-docs bucket"""
         return await self.upload_supporting_doc(file, candidate_id)
@@ -143,18 +331,25 @@ class StorageService:
     async def store_resume(self, file, candidate_id: str) -> Tuple[str, str]:
         """Store resume file and return file URL and extracted text"""
         try:
-            # Upload file and get URL
-            file_url = await self.upload_resume(file, candidate_id)
-
-            # Extract text from file
-            content = await file.read()
-            extracted_text = await self._extract_text(content, file.filename or "resume.pdf")
-
-            return file_url, extracted_text
+            # Upload and extract in the same pass over the file
+            stored = await self.store_upload(file, candidate_id, "resume", MAX_RESUME_BYTES)
+            return stored["url"], stored["extracted_text"] or ""
         except Exception as e:
             logger.error(f"Error storing resume: {str(e)}")
             return "", ""
 
+    async def read_upload_head(self, file: UploadFile) -> Tuple[bytes, str]:
+        """
+        Read the start of an upload (all of it when within MAX_EXTRACT_BYTES) and
+        extract its text; pass the bytes to store_upload(head=...) so the file is
+        not read twice
+        """
+        await file.seek(0)
+        head = await file.read(MAX_EXTRACT_BYTES + 1)
+        if len(head) > MAX_EXTRACT_BYTES:
+            return head, ""
+        return head, await self._extract_text(head, file.filename or "resume.pdf")
+
     async def update_file_candidate_id(self, old_id: str, new_id: str) -> None:
         """Update the candidate ID for a file"""
         # No-op since file handling is optional
@@ -162,28 +357,8 @@ class StorageService:
 
     async def _extract_text(self, content: bytes, filename: str) -> str:
         """Extract text content from resume file"""
-        try:
-            file_ext = os.path.splitext(filename)[1].lower()
-
-            if file_ext == '.pdf':
-                # Extract text from PDF
-                pdf_reader = PyPDF2.PdfReader(BytesIO(content))
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
-
-            elif file_ext in ['.doc', '.docx']:
-                # Extract text from Word document
-                doc = docx.Document(BytesIO(content))
-                return "\n".join([paragraph.text for paragraph in doc.paragraphs])
-
-            else:
-                raise Exception(f"Unsupported file type: {file_ext}")
-
-        except Exception as e:
-            logger.error(f"Error extracting text: {str(e)}")
-            return ""
+        # CPU-bound parsing runs in the extraction process pool, not on the event loop
+        return await text_extraction_service.extract(content, filename)
 
     async def get_resume_text(self, candidate_id: str) -> Optional[str]:
         """Get extracted text from candidate's resume"""
@@ -191,11 +366,12 @@ class StorageService:
             result = self.supabase.table("candidate_files")\
                 .select("extracted_text")\
                 .eq("candidate_id", candidate_id)\
-                .eq("file_type", "resume")\
-                .single()\
+                .eq("file_category", "resume")\
+                .order("uploaded_at", desc=True)\
+                .limit(1)\
                 .execute()
 
-            return result.data.get("extracted_text") if result.data else None
+            return result.data[0].get("extracted_text") if result.data else None
 
         except Exception as e:
             logger.error(f"Error getting resume text: {str(e)}")
@@ -0,0 +1,111 @@
+"""
+Document text extraction off the event loop
+
+PDF and DOCX parsing (and preview rendering) is CPU-bound and holds the GIL,
+so it runs in a small process pool rather than a thread. Each file gets EXTRACTION_TIMEOUT_SECONDS;
+when one overruns, new work moves to a fresh pool and the old one is
+terminated once its other jobs have finished, so one pathological PDF can
+neither hold a worker for good nor take unrelated extractions down with it.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Set
+
+from utils.text_extraction import MAX_PAGES, extract_text
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "2"))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "20"))
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", str(MAX_PAGES)))
+
+
+class TextExtractionService:
+    """Runs utils.text_extraction in a managed process pool"""
+
+    def __init__(self, workers: int = EXTRACTION_WORKERS):
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # In-flight jobs per pool, so a retired pool is only stopped once they finish
+        self._running: Dict[ProcessPoolExecutor, Set[asyncio.Future]] = {}
+        self._retiring: Set[asyncio.Task] = set()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Created on first use so importing the service never forks
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def extract(self, content: bytes, filename: str,
+                      timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+                      max_pages: int = EXTRACTION_MAX_PAGES) -> str:
+        """Extracted text, or "" when the file is unsupported, unreadable or too slow"""
+        try:
+            return await self.run(extract_text, content, filename, max_pages, timeout=timeout)
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            logger.error(f"Text extraction abandoned: {filename}")
+            return ""
+        except Exception as e:
+            logger.error(f"Error extracting text from {filename}: {str(e)}")
+            return ""
+
+    async def run(self, func: Callable[..., Any], *args: Any,
+                  timeout: float = EXTRACTION_TIMEOUT_SECONDS) -> Any:
+        """Run a picklable CPU-bound function in the pool; raises TimeoutError if it overruns"""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        future = loop.run_in_executor(pool, func, *args)
+        running = self._running.setdefault(pool, set())
+        running.add(future)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"{func.__name__} timed out after {timeout}s")
+            self._retire(pool)
+            raise
+        except BrokenProcessPool:
+            logger.error(f"{func.__name__}: worker process died")
+            self._reset(pool)
+            raise
+        finally:
+            running.discard(future)
+
+    def _retire(self, pool: ProcessPoolExecutor) -> None:
+        """Send new work to a fresh pool; stop this one once its other jobs are done"""
+        if self._pool is not pool:
+            return
+        self._pool = None
+        others = {f for f in self._running.get(pool, ()) if not f.done()}
+
+        async def reset_when_idle() -> None:
+            # Every job has its own timeout, so this waits at most one more timeout
+            if others:
+                await asyncio.wait(others)
+            self._reset(pool)
+
+        task = asyncio.get_running_loop().create_task(reset_when_idle())
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    def _reset(self, pool: ProcessPoolExecutor) -> None:
+        """Terminate a pool with a stuck or dead worker; the next call starts a fresh one"""
+        if self._pool is pool:
+            self._pool = None
+        self._running.pop(pool, None)
+        # The executor cannot cancel running work, so stop its processes directly
+        processes = list((getattr(pool, "_processes", None) or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+text_extraction_service = TextExtractionService()
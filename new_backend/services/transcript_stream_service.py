@@ -0,0 +1,232 @@
+"""
+Live transcript ingestion
+
+Utterances streamed over the interview WebSocket are buffered per interview
+and written with one batched insert every FLUSH_SIZE items or FLUSH_INTERVAL_MS.
+Each utterance carries a client sequence number: the (interview_id, sequence)
+unique index makes resends idempotent, and every flush acks the highest
+sequence below which everything is persisted, so a reconnecting client knows
+where to resume (sequences after a gap stay unacked until the gap is filled).
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 20
+FLUSH_INTERVAL_MS = 500
+PAGE_SIZE = 1000
+
+
+class TranscriptBuffer:
+    """Pending utterances for one interview, keyed by sequence"""
+
+    def __init__(self, interview_id: str):
+        self.interview_id = interview_id
+        self.pending: Dict[int, Dict[str, Any]] = {}
+        self.acked: Optional[int] = None
+        # Persisted sequences above a gap in what was received
+        self.persisted: Set[int] = set()
+        self.first_pending_at: Optional[float] = None
+        self.connections = 0
+        self.lock = asyncio.Lock()
+
+
+class TranscriptStreamService:
+    """Buffers streamed utterances and writes them in batches"""
+
+    def __init__(self):
+        self._buffers: Dict[str, TranscriptBuffer] = {}
+        self._listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+
+    def subscribe(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        """Call listener(interview_id, utterance) for every new streamed utterance"""
+        self._listeners.append(listener)
+
+    async def open(self, interview_id: str) -> int:
+        """Register a connection; returns the last persisted sequence (0 if none)"""
+        buffer = self._buffers.setdefault(interview_id, TranscriptBuffer(interview_id))
+        buffer.connections += 1
+        if buffer.acked is None:
+            buffer.acked, buffer.persisted = await asyncio.to_thread(
+                self._last_persisted, interview_id)
+        return buffer.acked
+
+    async def close(self, interview_id: str) -> int:
+        """Flush what is left and forget the buffer once nobody is streaming"""
+        try:
+            return await self.flush(interview_id)
+        finally:
+            buffer = self._buffers.get(interview_id)
+            if buffer:
+                buffer.connections -= 1
+                if buffer.connections <= 0:
+                    if buffer.pending:
+                        # The final flush failed; a reconnecting client resends after its last ack
+                        logger.warning(
+                            f"Dropping {len(buffer.pending)} unflushed utterances for interview {interview_id}")
+                    self._buffers.pop(interview_id, None)
+
+    def add(self, interview_id: str, utterance: Dict[str, Any]) -> bool:
+        """Queue an utterance; returns True when the buffer is full and should be flushed"""
+        buffer = self._buffers[interview_id]
+        sequence = int(utterance["sequence"])
+        if not utterance.get("speaker") or not utterance.get("text"):
+            raise ValueError("speaker and text are required")
+
+        # Already persisted or already queued: a resend after reconnect
+        if sequence <= (buffer.acked or 0) or sequence in buffer.pending \
+                or sequence in buffer.persisted:
+            return False
+
+        buffer.pending[sequence] = {
+            "interview_id": interview_id,
+            "sequence": sequence,
+            "speaker": utterance["speaker"],
+            "text": utterance["text"],
+            "timestamp": utterance.get("timestamp") or datetime.utcnow().isoformat()
+        }
+        if buffer.first_pending_at is None:
+            buffer.first_pending_at = time.monotonic()
+        self._notify(interview_id, buffer.pending[sequence], utterance)
+        return len(buffer.pending) >= FLUSH_SIZE
+
+    def _notify(self, interview_id: str, row: Dict[str, Any], utterance: Dict[str, Any]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(interview_id, {**row, "end_of_answer": bool(utterance.get("end_of_answer"))})
+            except Exception as e:
+                logger.error(f"Transcript listener failed for interview {interview_id}: {str(e)}")
+
+    def flush_due_in(self, interview_id: str) -> Optional[float]:
+        """Seconds until the time-based flush, or None when nothing is pending"""
+        buffer = self._buffers.get(interview_id)
+        if not buffer or buffer.first_pending_at is None:
+            return None
+        elapsed = time.monotonic() - buffer.first_pending_at
+        return max(FLUSH_INTERVAL_MS / 1000 - elapsed, 0.0)
+
+    async def flush(self, interview_id: str) -> int:
+        """Write pending utterances in one insert; returns the acked sequence"""
+        buffer = self._buffers.get(interview_id)
+        if not buffer:
+            return 0
+        async with buffer.lock:
+            if not buffer.pending:
+                return buffer.acked or 0
+            rows = [buffer.pending[s] for s in sorted(buffer.pending)]
+            await asyncio.to_thread(self._insert, rows)
+
+            for row in rows:
+                buffer.pending.pop(row["sequence"], None)
+            buffer.first_pending_at = time.monotonic() if buffer.pending else None
+            buffer.persisted.update(row["sequence"] for row in rows)
+            buffer.acked = self._advance(buffer.acked or 0, buffer.persisted)
+            logger.debug(f"Flushed {len(rows)} utterances for interview {interview_id}")
+            return buffer.acked
+
+    async def write(self, interview_id: str, utterances: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Unbuffered insert for one-off (HTTP) transcript updates"""
+        rows = [{
+            "interview_id": interview_id,
+            "sequence": u.get("sequence"),
+            "speaker": u["speaker"],
+            "text": u["text"],
+            "timestamp": u.get("timestamp") or datetime.utcnow().isoformat()
+        } for u in utterances]
+        inserted = await asyncio.to_thread(self._insert, rows)
+
+        # Listeners see HTTP utterances too; resends that were ignored are not repeated
+        new_sequences = {row.get("sequence") for row in inserted}
+        for row, utterance in zip(rows, utterances):
+            if row["sequence"] is None or row["sequence"] in new_sequences:
+                self._notify(interview_id, row, utterance)
+        return inserted
+
+    @staticmethod
+    def _insert(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        result = supabase.table("interview_transcripts").upsert(
+            rows, on_conflict="interview_id,sequence", ignore_duplicates=True).execute()
+        return result.data or []
+
+    @staticmethod
+    def _advance(acked: int, persisted: Set[int]) -> int:
+        """Move the ack over contiguous persisted sequences, removing them from the set"""
+        while acked + 1 in persisted:
+            acked += 1
+            persisted.discard(acked)
+        # Anything at or below the ack no longer needs tracking
+        persisted.difference_update([s for s in persisted if s <= acked])
+        return acked
+
+    @staticmethod
+    def _last_persisted(interview_id: str) -> Tuple[int, Set[int]]:
+        """Highest contiguous persisted sequence, and the persisted ones above it"""
+        sequences: Set[int] = set()
+        offset = 0
+        while True:
+            result = supabase.table("interview_transcripts").select("sequence").eq(
+                "interview_id", interview_id).not_.is_("sequence", "null").order(
+                "sequence").range(offset, offset + PAGE_SIZE - 1).execute()
+            sequences.update(row["sequence"] for row in result.data or [])
+            if len(result.data or []) < PAGE_SIZE:
+                break
+            offset += PAGE_SIZE
+        acked = TranscriptStreamService._advance(0, sequences)
+        return acked, sequences
+
+    async def serve(self, websocket: WebSocket, interview_id: str) -> None:
+        """
+        Run one transcript WebSocket.
+
+        Client messages: {"type": "utterance", "sequence", "speaker", "text", "timestamp"?},
+        {"type": "utterances", "items": [...]}, {"type": "flush"}.
+        Server messages: {"type": "ready", "last_sequence"}, {"type": "ack", "sequence"},
+        {"type": "error", "message"}.
+        """
+        await websocket.accept()
+        last_sequence = await self.open(interview_id)
+        await websocket.send_json({"type": "ready", "last_sequence": last_sequence})
+
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        websocket.receive_json(), timeout=self.flush_due_in(interview_id))
+                except asyncio.TimeoutError:
+                    await websocket.send_json({"type": "ack", "sequence": await self.flush(interview_id)})
+                    continue
+
+                kind = message.get("type", "utterance")
+                try:
+                    items = message.get("items", []) if kind == "utterances" else \
+                        [message] if kind == "utterance" else []
+                    full = False
+                    for item in items:
+                        full = self.add(interview_id, item) or full
+                except (KeyError, TypeError, ValueError) as e:
+                    await websocket.send_json({"type": "error", "message": f"Invalid utterance: {str(e)}"})
+                    continue
+
+                if full or kind == "flush":
+                    await websocket.send_json({"type": "ack", "sequence": await self.flush(interview_id)})
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.error(f"Transcript stream error for interview {interview_id}: {str(e)}")
+        finally:
+            try:
+                await self.close(interview_id)
+            except Exception as e:
+                logger.error(f"Error flushing transcript for interview {interview_id}: {str(e)}")
+
+
+transcript_stream_service = TranscriptStreamService()
@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from models import (
@@ -127,98 +128,35 @@ class WorkflowService:
                        notes: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> ActionResult:
         """Perform an action on a candidate and update their stage"""
         try:
-            # Get current candidate
-            response = supabase.table("candidates").select(
-                "*").eq("id", candidate_id).execute()
-
-            if not response.data:
-                return ActionResult(
-                    success=False,
-                    message="Candidate not found",
-                    candidateId=candidate_id
-                )
-
-            candidate_data = response.data[0]
-            current_stage = RecruitmentStage(
-                candidate_data.get("currentStage", "applied"))
-
-            # Validate action is allowed for current stage
-            if not WorkflowStateMachine.is_valid_transition(current_stage, action):
-                allowed_actions = WorkflowStateMachine.get_available_actions(
-                    current_stage)
+            # Validation, stage update and history insert run in one transaction
+            response = supabase.rpc("transition_candidate", {
+                "p_candidate_id": candidate_id,
+                "p_action": action.value,
+                "p_performed_by": performed_by,
+                "p_notes": notes
+            }).execute()
+            result = response.data or {}
+
+            if not result.get("success"):
                 return ActionResult(
                     success=False,
-                    message=f"Action '{action.value}' not allowed in stage '{current_stage.value}'. Allowed actions: {[a.value for a in allowed_actions]}",
+                    message=result.get("message", "Transition failed"),
                     candidateId=candidate_id
                 )
 
-            # Determine next stage
-            next_stage = WorkflowStateMachine.get_next_stage(
-                current_stage, action)
-
-            # Create stage transition record
-            transition = {
-                "candidate_id": candidate_id,
-                "action": action.value,
-                "from_stage": current_stage.value,
-                "to_stage": next_stage.value if next_stage else current_stage.value,
-                "performed_by": performed_by,
-                "timestamp": datetime.now().isoformat(),
-                "notes": notes or f"Performed action: {action.value}",
-                "status": "completed"
-            }
-
-            # Prepare updates
-            updates = {
-                "updated_at": datetime.now().isoformat(),
-                "updated_by": performed_by
-            }
-
-            # Update stage if it changes
-            if next_stage and next_stage != current_stage:
-                updates["currentStage"] = next_stage.value
-                updates["stage"] = next_stage.value
-                print(
-                    f"🔄 Moving candidate {candidate_id} from {current_stage.value} to {next_stage.value}")
-
-            # Handle specific action statuses
-            if action == CandidateAction.REJECT or action == CandidateAction.REJECT_AFTER_SCREENING or action == CandidateAction.REJECT_AFTER_INTERVIEW or action == CandidateAction.FINAL_REJECT:
-                updates["status"] = "rejected"
-            elif action == CandidateAction.SHORTLIST:
-                updates["status"] = "shortlisted"
-            elif action == CandidateAction.SCHEDULE_INTERVIEW:
-                updates["status"] = "interview-scheduled"
-            elif action == CandidateAction.START_INTERVIEW:
-                updates["status"] = "interviewing"
-            elif action == CandidateAction.MOVE_TO_FINAL_REVIEW:
-                updates["status"] = "final-review"
-            elif action == CandidateAction.EXTEND_OFFER:
-                updates["status"] = "offer-extended"
-            elif action == CandidateAction.OFFER_ACCEPTED:
-                updates["status"] = "hired"
-
-            # Update candidate
-            supabase.table("candidates").update(
-                updates).eq("id", candidate_id).execute()
-
-            # Log stage transition
-            supabase.table("candidate_stage_history").insert(
-                transition).execute()
-
-            # Get next available actions
-            final_stage = next_stage if next_stage else current_stage
-            next_actions = WorkflowStateMachine.get_available_actions(
-                final_stage)
+            from_stage = RecruitmentStage(result["from_stage"])
+            next_stage = RecruitmentStage(result["to_stage"])
+            next_actions = [CandidateAction(a) for a in result.get("next_actions", [])]
 
             print(
                 f"✅ Action '{action.value}' performed successfully on candidate {candidate_id}")
-            if next_stage:
-                print(f"   Stage: {current_stage.value} → {next_stage.value}")
+            if result.get("stage_changed"):
+                print(f"   Stage: {from_stage.value} → {next_stage.value}")
 
             return ActionResult(
                 success=True,
                 message=f"Successfully performed action '{action.value}'" + (
-                    f" and moved to stage '{next_stage.value}'" if next_stage and next_stage != current_stage else ""),
+                    f" and moved to stage '{next_stage.value}'" if result.get("stage_changed") else ""),
                 candidateId=candidate_id,
                 newStage=next_stage,
                 nextActions=next_actions
@@ -232,6 +170,44 @@ class WorkflowService:
                 candidateId=candidate_id
             )
 
+    @classmethod
+    def perform_bulk_action(cls, candidate_ids: List[str], action: CandidateAction, performed_by: str,
+                            notes: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Perform one action on many candidates with a single set-based transition"""
+        # Malformed ids would fail the uuid[] cast for the whole batch
+        canonical = {}
+        for candidate_id in candidate_ids:
+            try:
+                canonical[candidate_id] = str(uuid.UUID(candidate_id))
+            except ValueError:
+                pass
+
+        outcomes = {}
+        if canonical:
+            response = supabase.rpc("transition_candidates", {
+                "p_candidate_ids": list(set(canonical.values())),
+                "p_action": action.value,
+                "p_performed_by": performed_by,
+                "p_notes": notes
+            }).execute()
+            outcomes = {r["candidate_id"]: r for r in (response.data or {}).get("results", [])}
+
+        results = []
+        for candidate_id in candidate_ids:
+            outcome = outcomes.get(canonical.get(candidate_id)) or {
+                "success": False, "error": "not_found", "message": "Candidate not found"}
+            results.append({
+                "candidateId": candidate_id,
+                "success": outcome["success"],
+                "message": outcome["message"],
+                "fromStage": outcome.get("from_stage"),
+                "newStage": outcome.get("to_stage")
+            })
+
+        moved = sum(1 for r in outcomes.values() if r.get("stage_changed"))
+        print(f"✅ Bulk action '{action.value}': {moved}/{len(candidate_ids)} candidates moved")
+        return results
+
     @classmethod
     def get_workflow_summary(cls) -> WorkflowSummary:
         """Get comprehensive workflow summary with stage breakdown"""
@@ -0,0 +1,88 @@
+"""
+Unit tests for the log-bucketed histogram behind pipeline analytics
+"""
+
+import random
+
+from utils.histogram import BASE_SECONDS, BUCKETS, GROWTH, LogHistogram, bucket_bounds, bucket_index
+
+DAY = 86400
+
+
+def test_bucket_index_and_bounds_agree():
+    assert bucket_index(0) == 0
+    assert bucket_index(BASE_SECONDS - 1) == 0
+    for seconds in (BASE_SECONDS, 90, 3600, DAY, 30 * DAY):
+        low, high = bucket_bounds(bucket_index(seconds))
+        assert low <= seconds < high
+    assert bucket_index(10 ** 12) == BUCKETS - 1
+
+
+def test_empty_histogram():
+    histogram = LogHistogram()
+    assert histogram.count == 0
+    assert histogram.quantile(0.5) is None
+    assert histogram.mean() is None
+
+
+def test_quantiles_within_bucket_error():
+    rng = random.Random(3)
+    values = sorted(rng.uniform(3600, 30 * DAY) for _ in range(2000))
+    histogram = LogHistogram()
+    for value in values:
+        histogram.add(value)
+
+    assert histogram.count == len(values)
+    assert histogram.min == values[0]
+    assert histogram.max == values[-1]
+    for q in (0.1, 0.5, 0.9):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(histogram.quantile(q) - exact) / exact <= GROWTH - 1
+    assert histogram.quantile(0) >= histogram.min
+    assert histogram.quantile(1) <= histogram.max
+
+
+def test_negative_durations_clamped():
+    histogram = LogHistogram()
+    histogram.add(-5)
+    assert histogram.min == 0.0
+    assert histogram.counts[0] == 1
+
+
+def test_merge_matches_single_histogram():
+    rng = random.Random(11)
+    values = [rng.expovariate(1 / DAY) for _ in range(500)]
+    combined, first, second = LogHistogram(), LogHistogram(), LogHistogram()
+    for i, value in enumerate(values):
+        combined.add(value)
+        (first if i % 3 else second).add(value)
+
+    first.merge(second)
+    assert first.counts == combined.counts
+    assert first.count == combined.count
+    assert abs(first.total - combined.total) < 1e-6
+    assert (first.min, first.max) == (combined.min, combined.max)
+    assert first.quantile(0.5) == combined.quantile(0.5)
+
+
+def test_merge_with_empty():
+    histogram = LogHistogram()
+    histogram.add(3600)
+    histogram.merge(LogHistogram())
+    assert (histogram.count, histogram.min, histogram.max) == (1, 3600, 3600)
+
+    empty = LogHistogram()
+    empty.merge(histogram)
+    assert (empty.count, empty.min, empty.max) == (1, 3600, 3600)
+
+
+def test_dict_round_trip():
+    histogram = LogHistogram()
+    for value in (30, 3600, DAY, 7 * DAY):
+        histogram.add(value)
+
+    restored = LogHistogram.from_dict(histogram.to_dict())
+    assert restored.counts == histogram.counts
+    assert restored.count == histogram.count
+    assert (restored.total, restored.min, restored.max) == (histogram.total, histogram.min, histogram.max)
+    assert LogHistogram.from_dict(None).count == 0
@@ -0,0 +1,68 @@
+"""
+Unit tests for the interval tree used by interview conflict detection
+"""
+
+import random
+
+import pytest
+
+from utils.interval_tree import IntervalTree
+
+
+def test_empty_tree():
+    tree = IntervalTree()
+    assert len(tree) == 0
+    assert not tree.overlaps(0, 100)
+    assert tree.search(0, 100) == []
+
+
+def test_rejects_empty_intervals():
+    tree = IntervalTree()
+    with pytest.raises(ValueError):
+        tree.add(10, 10)
+    with pytest.raises(ValueError):
+        tree.add(10, 5)
+    assert len(tree) == 0
+
+
+def test_half_open_boundaries():
+    tree = IntervalTree([(540, 600, "a")])
+    # Back-to-back bookings do not conflict
+    assert not tree.overlaps(480, 540)
+    assert not tree.overlaps(600, 660)
+    assert tree.overlaps(599, 660)
+    assert tree.overlaps(500, 541)
+    assert tree.search(550, 560) == [(540, 600, "a")]
+
+
+def test_search_returns_all_overlaps_ordered_by_start():
+    tree = IntervalTree([(600, 660, "c"), (540, 600, "b"), (0, 1440, "a"), (700, 720, "d")])
+    assert len(tree) == 4
+    assert tree.search(590, 610) == [(0, 1440, "a"), (540, 600, "b"), (600, 660, "c")]
+    assert tree.search(660, 700) == [(0, 1440, "a")]
+
+
+def test_duplicate_starts():
+    tree = IntervalTree([(60, 120, "a"), (60, 90, "b"), (60, 180, "c")])
+    assert {value for _, _, value in tree.search(150, 160)} == {"c"}
+    assert {value for _, _, value in tree.search(0, 61)} == {"a", "b", "c"}
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    intervals = []
+    tree = IntervalTree()
+    for i in range(300):
+        start = rng.randrange(0, 2000)
+        end = start + rng.randrange(1, 120)
+        intervals.append((start, end, i))
+        tree.add(start, end, i)
+
+    for _ in range(500):
+        start = rng.randrange(0, 2100)
+        end = start + rng.randrange(1, 200)
+        expected = sorted(item for item in intervals if item[0] < end and start < item[1])
+        found = tree.search(start, end)
+        assert sorted(found) == expected
+        assert [item[0] for item in found] == sorted(item[0] for item in found)
+        assert tree.overlaps(start, end) == bool(expected)
@@ -0,0 +1,50 @@
+"""
+Unit tests for the MinHash/LSH helpers used by duplicate detection
+"""
+
+from utils.minhash import (
+    LSH_BANDS, NUM_PERMUTATIONS, band_keys, estimate_similarity, minhash_signature
+)
+
+
+def shingles(count, offset=0):
+    return {f"shingle-{i}" for i in range(offset, offset + count)}
+
+
+def test_empty_set_has_no_signature():
+    assert minhash_signature(set()) is None
+    assert estimate_similarity(None, minhash_signature({"a"})) == 0.0
+
+
+def test_signature_is_deterministic_and_order_independent():
+    a = minhash_signature({"x", "y", "z"})
+    b = minhash_signature({"z", "y", "x"})
+    assert a.shape == (NUM_PERMUTATIONS,)
+    assert (a == b).all()
+
+
+def test_identical_sets_are_fully_similar():
+    signature = minhash_signature(shingles(50))
+    assert estimate_similarity(signature, minhash_signature(shingles(50))) == 1.0
+
+
+def test_similarity_tracks_jaccard():
+    # 100 shared of 200 total -> Jaccard 0.5
+    a = minhash_signature(shingles(150))
+    b = minhash_signature(shingles(150, offset=50))
+    assert 0.35 <= estimate_similarity(a, b) <= 0.65
+
+    disjoint = minhash_signature(shingles(150, offset=1000))
+    assert estimate_similarity(a, disjoint) < 0.1
+
+
+def test_band_keys():
+    a = minhash_signature(shingles(100))
+    keys = band_keys(a)
+    assert len(keys) == LSH_BANDS
+    assert [band for band, _ in keys] == list(range(LSH_BANDS))
+
+    near = minhash_signature(shingles(100) | {"extra"})
+    assert set(keys) & set(band_keys(near))
+    far = minhash_signature(shingles(100, offset=1000))
+    assert not set(keys) & set(band_keys(far))
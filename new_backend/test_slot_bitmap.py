@@ -0,0 +1,52 @@
+"""
+Unit tests for the slot bitmaps behind interviewer and room availability
+"""
+
+from utils.slot_bitmap import SLOT_MINUTES, SLOTS_PER_DAY, mask_to_ranges, slot_mask
+
+
+def test_slot_mask_aligned():
+    # 09:00-10:00 is slots 18 and 19
+    assert slot_mask(9 * 60, 10 * 60) == 0b11 << 18
+
+
+def test_slot_mask_rounds_out_to_whole_slots():
+    assert slot_mask(9 * 60 + 10, 9 * 60 + 40) == slot_mask(9 * 60, 10 * 60)
+    assert slot_mask(9 * 60 + 1, 9 * 60 + 2) == 1 << 18
+
+
+def test_slot_mask_empty_and_clamped():
+    assert slot_mask(600, 600) == 0
+    assert slot_mask(600, 540) == 0
+    full_day = (1 << SLOTS_PER_DAY) - 1
+    assert slot_mask(-60, 24 * 60 + 60) == full_day
+    assert slot_mask(0, 24 * 60) == full_day
+
+
+def test_mask_to_ranges():
+    assert mask_to_ranges(0) == []
+    assert mask_to_ranges(slot_mask(9 * 60, 12 * 60) | slot_mask(13 * 60, 17 * 60)) == [
+        {"start": "09:00", "end": "12:00"},
+        {"start": "13:00", "end": "17:00"},
+    ]
+    assert mask_to_ranges((1 << SLOTS_PER_DAY) - 1) == [{"start": "00:00", "end": "24:00"}]
+
+
+def test_bitwise_free_busy():
+    working = slot_mask(9 * 60, 17 * 60)
+    busy = slot_mask(10 * 60, 11 * 60) | slot_mask(14 * 60 + 15, 15 * 60)
+    free = working & ~busy
+    assert mask_to_ranges(free) == [
+        {"start": "09:00", "end": "10:00"},
+        {"start": "11:00", "end": "14:00"},
+        {"start": "15:00", "end": "17:00"},
+    ]
+    assert bin(free).count("1") * SLOT_MINUTES == 6 * 60
+
+
+def test_round_trip():
+    for start in range(0, 24 * 60, SLOT_MINUTES):
+        for end in range(start + SLOT_MINUTES, 24 * 60 + 1, 3 * SLOT_MINUTES):
+            (only,) = mask_to_ranges(slot_mask(start, end))
+            assert only["start"] == f"{start // 60:02d}:{start % 60:02d}"
+            assert only["end"] == f"{end // 60:02d}:{end % 60:02d}"
@@ -0,0 +1,84 @@
+"""
+Log-bucketed duration histogram
+
+Buckets grow geometrically from one minute, so a fixed 64-slot array covers
+durations from seconds to years with ~12% relative error on quantiles.
+Histograms are mergeable by adding counts, which makes them cheap to update
+incrementally and to persist as a plain list.
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+BASE_SECONDS = 60.0
+GROWTH = 1.25
+BUCKETS = 64
+
+
+def bucket_index(seconds: float) -> int:
+    if seconds < BASE_SECONDS:
+        return 0
+    return min(1 + int(math.log(seconds / BASE_SECONDS) / math.log(GROWTH)), BUCKETS - 1)
+
+
+def bucket_bounds(index: int) -> tuple:
+    if index == 0:
+        return 0.0, BASE_SECONDS
+    return BASE_SECONDS * GROWTH ** (index - 1), BASE_SECONDS * GROWTH ** index
+
+
+class LogHistogram:
+    """Counts of durations (in seconds) in geometric buckets"""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self, counts: Optional[List[int]] = None, total: float = 0.0,
+                 min_value: Optional[float] = None, max_value: Optional[float] = None):
+        self.counts = list(counts) if counts else [0] * BUCKETS
+        self.count = sum(self.counts)
+        self.total = total
+        self.min = min_value
+        self.max = max_value
+
+    def add(self, seconds: float) -> None:
+        seconds = max(seconds, 0.0)
+        self.counts[bucket_index(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def merge(self, other: "LogHistogram") -> None:
+        for i, value in enumerate(other.counts):
+            self.counts[i] += value
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (geometric midpoint of the bucket it falls in)"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index, value in enumerate(self.counts):
+            seen += value
+            if seen > rank:
+                low, high = bucket_bounds(index)
+                estimate = math.sqrt(low * high) if low else high / 2
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"counts": self.counts, "total": self.total, "min": self.min, "max": self.max}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "LogHistogram":
+        data = data or {}
+        return cls(data.get("counts"), data.get("total", 0.0), data.get("min"), data.get("max"))
@@ -0,0 +1,110 @@
+"""
+Augmented interval tree over half-open [start, end) integer intervals
+
+Implemented as a treap keyed by start so inserts stay O(log n) on average;
+each node tracks the maximum end in its subtree so overlap queries can prune
+whole branches.
+"""
+
+import random
+from typing import Any, Iterable, List, Optional, Tuple
+
+
+class _Node:
+    __slots__ = ("start", "end", "value", "priority", "max_end", "left", "right")
+
+    def __init__(self, start: int, end: int, value: Any):
+        self.start = start
+        self.end = end
+        self.value = value
+        self.priority = random.random()
+        self.max_end = end
+        self.left: Optional["_Node"] = None
+        self.right: Optional["_Node"] = None
+
+    def update(self) -> None:
+        self.max_end = max(
+            self.end,
+            self.left.max_end if self.left else self.end,
+            self.right.max_end if self.right else self.end
+        )
+
+
+class IntervalTree:
+    """Stores intervals with payloads and reports those overlapping a query range"""
+
+    def __init__(self, intervals: Iterable[Tuple[int, int, Any]] = ()):
+        self._root: Optional[_Node] = None
+        self._size = 0
+        for start, end, value in intervals:
+            self.add(start, end, value)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, start: int, end: int, value: Any = None) -> None:
+        if end <= start:
+            raise ValueError("Interval end must be after start")
+        self._root = self._insert(self._root, _Node(start, end, value))
+        self._size += 1
+
+    def overlaps(self, start: int, end: int) -> bool:
+        return self._first_overlap(self._root, start, end) is not None
+
+    def search(self, start: int, end: int) -> List[Tuple[int, int, Any]]:
+        """All stored intervals overlapping [start, end), ordered by start"""
+        found: List[Tuple[int, int, Any]] = []
+        self._collect(self._root, start, end, found)
+        return found
+
+    def _insert(self, node: Optional[_Node], new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.start < node.start:
+            node.left = self._insert(node.left, new)
+            if node.left.priority > node.priority:
+                node = self._rotate_right(node)
+        else:
+            node.right = self._insert(node.right, new)
+            if node.right.priority > node.priority:
+                node = self._rotate_left(node)
+        node.update()
+        return node
+
+    @staticmethod
+    def _rotate_right(node: _Node) -> _Node:
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    @staticmethod
+    def _rotate_left(node: _Node) -> _Node:
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        node.update()
+        pivot.update()
+        return pivot
+
+    def _first_overlap(self, node: Optional[_Node], start: int, end: int) -> Optional[_Node]:
+        while node is not None:
+            if node.start < end and start < node.end:
+                return node
+            if node.left is not None and node.left.max_end > start:
+                node = node.left
+            else:
+                node = node.right
+        return None
+
+    def _collect(self, node: Optional[_Node], start: int, end: int,
+                 found: List[Tuple[int, int, Any]]) -> None:
+        if node is None or node.max_end <= start:
+            return
+        self._collect(node.left, start, end, found)
+        if node.start < end and start < node.end:
+            found.append((node.start, node.end, node.value))
+        if node.start < end:
+            self._collect(node.right, start, end, found)
@@ -0,0 +1,49 @@
+"""
+MinHash signatures and LSH banding
+
+A signature is the minimum of NUM_PERMUTATIONS multiply-add permutations of
+the 64-bit shingle hashes, so the fraction of equal positions between two
+signatures estimates the Jaccard similarity of their shingle sets. Splitting a
+signature into LSH_BANDS bands gives bucket keys under which similar sets are
+likely to share at least one band.
+"""
+
+import hashlib
+from typing import List, Optional, Set
+
+import numpy as np
+
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+
+# Multiply-add permutations over 64-bit shingle hashes (wrapping mod 2**64)
+_rng = np.random.RandomState(20240601)
+PERMUTATION_A = _rng.randint(0, np.iinfo(np.int64).max, size=NUM_PERMUTATIONS,
+                             dtype=np.int64).astype(np.uint64) | np.uint64(1)
+PERMUTATION_B = _rng.randint(0, np.iinfo(np.int64).max, size=NUM_PERMUTATIONS,
+                             dtype=np.int64).astype(np.uint64)
+
+
+def minhash_signature(shingles: Set[str]) -> Optional[np.ndarray]:
+    """MinHash signature over a shingle set (None when the set is empty)"""
+    if not shingles:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+         for s in shingles),
+        dtype=np.uint64, count=len(shingles))
+    with np.errstate(over="ignore"):
+        permuted = np.outer(PERMUTATION_A, hashes) + PERMUTATION_B[:, None]
+    return permuted.min(axis=1)
+
+
+def band_keys(signature: np.ndarray) -> List[tuple]:
+    return [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+            for band in range(LSH_BANDS)]
+
+
+def estimate_similarity(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> float:
+    if a is None or b is None:
+        return 0.0
+    return float(np.count_nonzero(a == b)) / NUM_PERMUTATIONS
@@ -0,0 +1,60 @@
+"""
+Thumbnails and text previews for candidate files
+
+Pure, CPU-bound functions with picklable arguments so they can run in the
+extraction process pool (see services/file_preview_service.py).
+"""
+
+import os
+from io import BytesIO
+from typing import Optional, Tuple
+
+import pymupdf
+from PIL import Image
+
+from .text_extraction import extract_text
+
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_QUALITY = 70
+PREVIEW_CHARS = 500
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'}
+
+
+def _to_jpeg(image: Image.Image, width: int) -> bytes:
+    image.thumbnail((width, width * 4))
+    out = BytesIO()
+    image.convert("RGB").save(out, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True)
+    return out.getvalue()
+
+
+def render_pdf_thumbnail(content: bytes, width: int = THUMBNAIL_WIDTH) -> Optional[bytes]:
+    """First page of a PDF as a JPEG `width` pixels wide"""
+    with pymupdf.open(stream=content, filetype="pdf") as document:
+        if document.page_count == 0:
+            return None
+        page = document[0]
+        zoom = width / page.rect.width
+        pixmap = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False)
+        image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+    return _to_jpeg(image, width)
+
+
+def render_image_thumbnail(content: bytes, width: int = THUMBNAIL_WIDTH) -> bytes:
+    with Image.open(BytesIO(content)) as image:
+        return _to_jpeg(image, width)
+
+
+def render_preview(content: bytes, filename: str, text: Optional[str] = None,
+                   width: int = THUMBNAIL_WIDTH) -> Tuple[Optional[bytes], Optional[str]]:
+    """(JPEG thumbnail or None, first PREVIEW_CHARS of text or None) for one file"""
+    file_ext = os.path.splitext(filename)[1].lower()
+    thumbnail = None
+    if file_ext == '.pdf':
+        thumbnail = render_pdf_thumbnail(content, width)
+    elif file_ext in IMAGE_EXTENSIONS:
+        thumbnail = render_image_thumbnail(content, width)
+
+    if text is None and file_ext in ('.pdf', '.doc', '.docx'):
+        text = extract_text(content, filename, max_pages=1)
+    preview = " ".join(text.split())[:PREVIEW_CHARS] if text else None
+    return thumbnail, preview
@@ -0,0 +1,45 @@
+"""
+Day slot bitmaps
+
+A day is split into SLOTS_PER_DAY slots of SLOT_MINUTES; bit i of a mask is
+set when slot i (starting at i * SLOT_MINUTES past midnight) is covered.
+"""
+
+from typing import Dict, List
+
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def format_minutes(minutes: int) -> str:
+    """"HH:MM" for minutes since midnight"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def slot_mask(start_minute: int, end_minute: int) -> int:
+    """Bitmap covering [start, end) rounded out to whole slots"""
+    first = max(start_minute // SLOT_MINUTES, 0)
+    last = min(-(-end_minute // SLOT_MINUTES), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def mask_to_ranges(mask: int) -> List[Dict[str, str]]:
+    """Merge set bits into {"start", "end"} time ranges"""
+    ranges = []
+    slot = 0
+    while mask:
+        if mask & 1:
+            start = slot
+            while mask & 1:
+                mask >>= 1
+                slot += 1
+            ranges.append({
+                "start": format_minutes(start * SLOT_MINUTES),
+                "end": format_minutes(slot * SLOT_MINUTES)
+            })
+        else:
+            mask >>= 1
+            slot += 1
+    return ranges
@@ -0,0 +1,47 @@
+"""
+Plain-text extraction from PDF and Word documents
+
+Pure, CPU-bound functions with picklable arguments so they can run in a
+worker process (see services/text_extraction_service.py).
+"""
+
+import os
+from io import BytesIO
+from typing import List
+
+import PyPDF2
+import docx
+
+MAX_PAGES = 50
+
+
+def extract_pdf_text(content: bytes, max_pages: int = MAX_PAGES) -> str:
+    reader = PyPDF2.PdfReader(BytesIO(content))
+    pages: List[str] = []
+    for index, page in enumerate(reader.pages):
+        if index >= max_pages:
+            break
+        pages.append(page.extract_text() or "")
+    return "\n".join(pages)
+
+
+def extract_docx_text(content: bytes) -> str:
+    document = docx.Document(BytesIO(content))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs)
+
+
+def extract_text(content: bytes, filename: str, max_pages: int = MAX_PAGES) -> str:
+    """Text of a .pdf/.doc/.docx file; raises ValueError for other types"""
+    file_ext = os.path.splitext(filename)[1].lower()
+    if file_ext == '.pdf':
+        return extract_pdf_text(content, max_pages)
+    if file_ext in ['.doc', '.docx']:
+        return extract_docx_text(content)
+    raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+def count_pages(content: bytes, filename: str, max_pages: int = MAX_PAGES) -> int:
+    """Pages extract_text reads from a PDF (1 for other documents); used by the extraction benchmark"""
+    if os.path.splitext(filename)[1].lower() == '.pdf':
+        return min(len(PyPDF2.PdfReader(BytesIO(content)).pages), max_pages)
+    return 1
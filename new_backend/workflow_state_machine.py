@@ -4,10 +4,63 @@ Recruitment Workflow State Machine
 Defines valid state transitions and available actions for each recruitment stage.
 """
 
-from typing import Dict, List, Set, Tuple
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Optional, Set, Tuple
 from models import RecruitmentStage, CandidateAction
 
 
+class TransitionTable:
+    """Transition list compiled into dict-of-dicts for O(1) stage/action lookups"""
+
+    def __init__(self, transitions: Mapping[Hashable, Iterable[Tuple[Hashable, Any]]],
+                 stage_aliases: Optional[Mapping[str, Hashable]] = None,
+                 action_aliases: Optional[Mapping[str, Hashable]] = None):
+        self.stage_aliases = dict(stage_aliases or {})
+        self.action_aliases = dict(action_aliases or {})
+        # stage -> {action: next_stage}; next_stage may be None ("previous stage")
+        self.next_stages: Dict[Hashable, Dict[Hashable, Any]] = {
+            stage: {action: next_stage for action, next_stage in pairs}
+            for stage, pairs in transitions.items()
+        }
+        # Insertion-ordered action lists for display, frozensets for membership
+        self.actions: Dict[Hashable, Tuple[Hashable, ...]] = {
+            stage: tuple(moves) for stage, moves in self.next_stages.items()
+        }
+        self.action_sets: Dict[Hashable, FrozenSet[Hashable]] = {
+            stage: frozenset(moves) for stage, moves in self.next_stages.items()
+        }
+        self.all_actions: FrozenSet[Hashable] = frozenset(
+            action for moves in self.next_stages.values() for action in moves)
+
+    def resolve_stage(self, stage: Hashable) -> Hashable:
+        return self.stage_aliases.get(stage, stage)
+
+    def resolve_action(self, action: Hashable) -> Hashable:
+        return self.action_aliases.get(action, action)
+
+    def available_actions(self, stage: Hashable) -> Tuple[Hashable, ...]:
+        return self.actions.get(self.resolve_stage(stage), ())
+
+    def is_valid(self, stage: Hashable, action: Hashable) -> bool:
+        return self.resolve_action(action) in self.action_sets.get(self.resolve_stage(stage), ())
+
+    def next_stage(self, stage: Hashable, action: Hashable, default: Any = None) -> Any:
+        """Next stage for a valid transition, otherwise `default`"""
+        return self.next_stages.get(self.resolve_stage(stage), {}).get(
+            self.resolve_action(action), default)
+
+    def validate_many(self, pairs: Iterable[Tuple[Hashable, Hashable]]) -> List[Tuple[bool, Any]]:
+        """(is_valid, next_stage) for every (stage, action) pair, in order"""
+        missing = object()
+        next_stages, stage_aliases, action_aliases = self.next_stages, self.stage_aliases, self.action_aliases
+        results = []
+        for stage, action in pairs:
+            moves = next_stages.get(stage_aliases.get(stage, stage))
+            next_stage = missing if moves is None else moves.get(
+                action_aliases.get(action, action), missing)
+            results.append((False, None) if next_stage is missing else (True, next_stage))
+        return results
+
+
 class WorkflowStateMachine:
     """Manages recruitment workflow state transitions and action validation"""
 
@@ -112,41 +165,70 @@ class WorkflowStateMachine:
         "move-to-final": CandidateAction.MOVE_TO_FINAL_REVIEW,
     }
 
+    # Compiled once at import; every lookup below goes through this index
+    COMPILED = TransitionTable(TRANSITIONS, STAGE_ALIASES, ACTION_ALIASES)
+
+    # Candidate status set alongside the stage change for specific actions
+    ACTION_STATUS = {
+        CandidateAction.REJECT: "rejected",
+        CandidateAction.REJECT_AFTER_SCREENING: "rejected",
+        CandidateAction.REJECT_AFTER_INTERVIEW: "rejected",
+        CandidateAction.FINAL_REJECT: "rejected",
+        CandidateAction.SHORTLIST: "shortlisted",
+        CandidateAction.SCHEDULE_INTERVIEW: "interview-scheduled",
+        CandidateAction.START_INTERVIEW: "interviewing",
+        CandidateAction.MOVE_TO_FINAL_REVIEW: "final-review",
+        CandidateAction.EXTEND_OFFER: "offer-extended",
+        CandidateAction.OFFER_ACCEPTED: "hired",
+    }
+
     @classmethod
     def get_available_actions(cls, current_stage: RecruitmentStage) -> List[CandidateAction]:
         """Get all available actions for a given stage"""
-        # Handle backward compatibility
-        if isinstance(current_stage, str):
-            current_stage = cls.STAGE_ALIASES.get(current_stage, current_stage)
-
-        transitions = cls.TRANSITIONS.get(current_stage, [])
-        return [action for action, _ in transitions]
+        return list(cls.COMPILED.available_actions(current_stage))
 
     @classmethod
     def get_next_stage(cls, current_stage: RecruitmentStage, action: CandidateAction) -> RecruitmentStage:
         """Get the next stage for a given current stage and action"""
-        # Handle backward compatibility
-        if isinstance(current_stage, str):
-            current_stage = cls.STAGE_ALIASES.get(current_stage, current_stage)
-        if isinstance(action, str):
-            action = cls.ACTION_ALIASES.get(action, action)
-
-        transitions = cls.TRANSITIONS.get(current_stage, [])
-        for valid_action, next_stage in transitions:
-            if valid_action == action:
-                return next_stage
-
-        raise ValueError(
-            f"Invalid action '{action}' for stage '{current_stage}'")
+        if not cls.COMPILED.is_valid(current_stage, action):
+            raise ValueError(
+                f"Invalid action '{action}' for stage '{current_stage}'")
+        return cls.COMPILED.next_stage(current_stage, action)
 
     @classmethod
     def is_valid_transition(cls, current_stage: RecruitmentStage, action: CandidateAction) -> bool:
         """Check if an action is valid for the current stage"""
-        try:
-            cls.get_next_stage(current_stage, action)
-            return True
-        except ValueError:
-            return False
+        return cls.COMPILED.is_valid(current_stage, action)
+
+    @classmethod
+    def validate_transitions(cls, pairs: Iterable[Tuple[RecruitmentStage, CandidateAction]]) -> List[Tuple[bool, Optional[RecruitmentStage]]]:
+        """Validate many (stage, action) pairs in one call"""
+        return cls.COMPILED.validate_many(pairs)
+
+    @classmethod
+    def export_sql(cls) -> str:
+        """SQL that loads TRANSITIONS and STAGE_ALIASES into the workflow tables used by transition_candidate"""
+        def quote(value) -> str:
+            return "NULL" if value is None else "'" + str(value.value if hasattr(value, "value") else value).replace("'", "''") + "'"
+
+        transitions = [
+            f"    ({quote(stage)}, {quote(action)}, {quote(next_stage)}, {quote(cls.ACTION_STATUS.get(action))})"
+            for stage, actions in cls.TRANSITIONS.items()
+            for action, next_stage in actions
+        ]
+        aliases = [f"    ({quote(alias)}, {quote(stage)})"
+                   for alias, stage in cls.STAGE_ALIASES.items()]
+
+        return "\n".join([
+            "-- Generated by WorkflowStateMachine.export_sql(); do not edit by hand",
+            "DELETE FROM workflow_transitions;",
+            "INSERT INTO workflow_transitions (from_stage, action, to_stage, candidate_status) VALUES",
+            ",\n".join(transitions) + ";",
+            "",
+            "DELETE FROM workflow_stage_aliases;",
+            "INSERT INTO workflow_stage_aliases (alias, stage) VALUES",
+            ",\n".join(aliases) + ";",
+        ])
 
     @classmethod
     def is_terminal_stage(cls, stage: RecruitmentStage) -> bool:
@@ -231,3 +313,8 @@ def perform_transition(current_stage: RecruitmentStage, action: CandidateAction)
 
 def is_valid_action(stage: RecruitmentStage, action: CandidateAction) -> bool:
     return WorkflowStateMachine.is_valid_transition(stage, action)
+
+
+if __name__ == "__main__":
+    # python workflow_state_machine.py > migrations/NNN_sync_workflow_transitions.sql
+    print(WorkflowStateMachine.export_sql())